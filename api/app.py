@@ -1,23 +1,36 @@
 import sys
 import os
+import json
+import hashlib
+import re
 import logging
 from logging.config import dictConfig
 from functools import wraps
+from datetime import date
+from typing import Dict, Optional, Tuple
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
-from flask import Flask, jsonify, request, g
+from flask import Flask, Response, jsonify, make_response, request, g, send_file, stream_with_context
 from flask_restful import Resource, Api
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room, disconnect
 from flasgger import Swagger, swag_from
 from pydantic import ValidationError
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from config.config import API_HOST, API_PORT, API_DEBUG, LOGGING_CONFIG, MODULES_ENABLED, DEFAULT_LANG, API_TITLE, API_VERSION, API_DESCRIPTION, SECRET_KEY
+from config.config import API_HOST, API_PORT, API_DEBUG, LOGGING_CONFIG, MODULES_ENABLED, MODULES_EAGER_INIT, DEFAULT_LANG, API_TITLE, API_VERSION, API_DESCRIPTION, SECRET_KEY, AUTH_LOGIN_TIMEOUT_S, THERAPY_JOURNAL_PAGE_SIZE, API_SERVER, API_WORKERS, API_ASYNC_MODE, API_MESSAGE_QUEUE
 from core.localization import get_translator
-from core.utils import get_logger, create_access_token, decode_access_token
-from core.database import get_db, User
+from core.utils import get_logger, create_access_token, decode_access_token, is_gevent_patched
+from core.database import SessionLocal, User, get_pool_status
 from core.module_manager import module_manager
-from api.models import ApiResponse, VoiceControlRequest, JournalEntryCreate, AnonymizeFileRequest, NarrationRequest, RunTestsRequest, ApplyThemeRequest, LoginRequest, TokenResponse, StreamingControlRequest
+from core.token_cache import token_cache, UserSnapshot
+from core.login_pool import login_pool, LoginPoolSaturated
+from core.settings_store import settings_store
+from core.status_service import status_service
+from core.event_bus import event_bus, EVENT_SNAPSHOT
+from core.jobs import job_manager, JobCancelled, JobQueueFull
+from api.message_queue import IPC_SCHEME, IPCManager
+from api.models import ApiResponse, VoiceControlRequest, JournalEntryCreate, AnonymizeFileRequest, NarrationRequest, RunTestsRequest, ApplyThemeRequest, LoginRequest, TokenResponse, StreamingControlRequest, AllyAnalyzeRequest
 
 # Configurar logging
 dictConfig(LOGGING_CONFIG)
@@ -25,11 +38,43 @@ logger = get_logger(__name__)
 
 app = Flask(__name__)
 api = Api(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+
+# Los recursos devuelven `jsonify(...)` (opcionalmente con código de estado); Flask-RESTful
+# intentaría serializar de nuevo el Response, así que se pasa tal cual.
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    if isinstance(data, Response):
+        resp = data
+        resp.status_code = code
+    else:
+        resp = make_response(jsonify(data), code)
+    resp.headers.extend(headers or {})
+    return resp
+
+def socketio_options() -> Dict:
+    """
+    Opciones de Socket.IO según el modo de servidor. Con varios workers (api/serve.py)
+    los eventos se difunden por la cola de mensajes y solo se admite transporte
+    WebSocket, porque gunicorn no reparte con sesiones fijas y el long-polling
+    necesita que todas las peticiones de un cliente lleguen al mismo worker.
+    """
+    options = {"cors_allowed_origins": "*",
+               "async_mode": API_ASYNC_MODE or ("gevent" if is_gevent_patched() else "threading")}
+    if API_MESSAGE_QUEUE:
+        if API_MESSAGE_QUEUE.startswith(f"{IPC_SCHEME}://"):
+            options["client_manager"] = IPCManager(API_MESSAGE_QUEUE)
+        else:
+            options["message_queue"] = API_MESSAGE_QUEUE # redis://, amqp://, ...
+    if API_SERVER == "gunicorn" and API_WORKERS > 1:
+        options["transports"] = ["websocket"]
+    return options
+
+socketio = SocketIO(app, **socketio_options())
 
 app.config['SWAGGER'] = {
     'title': API_TITLE,
-    'uiversion': API_VERSION,
+    'uiversion': 3,
+    'version': API_VERSION,
     'description': API_DESCRIPTION,
     'specs_route': '/swagger/',
     'securityDefinitions': {
@@ -49,6 +94,20 @@ def set_language():
     lang = request.headers.get('Accept-Language', DEFAULT_LANG).split(',')[0].split('-')[0]
     request.locale = get_translator(lang)
 
+# Sesión de DB por petición: se abre en el primer uso y se cierra siempre en el teardown
+def get_request_db():
+    if 'db' not in g:
+        g.db = SessionLocal()
+    return g.db
+
+@app.teardown_appcontext
+def close_request_db(exception=None):
+    db = g.pop('db', None)
+    if db is not None:
+        if exception is not None:
+            db.rollback()
+        db.close()
+
 # Decorador para requerir autenticación JWT
 def token_required(f):
     @wraps(f)
@@ -62,17 +121,20 @@ def token_required(f):
             return jsonify(ApiResponse(status="error", message=_("Token is missing!")).dict()), 401
 
         try:
-            data = decode_access_token(token, SECRET_KEY)
-            if data is None:
-                return jsonify(ApiResponse(status="error", message=_("Token is invalid or expired!")).dict()), 401
-            
-            # Obtener usuario de la DB y adjuntarlo a `g` (global request object)
-            db = next(get_db()) # Obtener una sesión de DB
-            user = db.query(User).filter_by(username=data['sub']).first()
-            if not user:
-                return jsonify(ApiResponse(status="error", message=_("User not found!")).dict()), 401
-            g.current_user = user
-            g.db = db # Adjuntar la sesión de DB a g para que los recursos la usen
+            cached = token_cache.get(token)
+            if cached is None:
+                data = decode_access_token(token, SECRET_KEY)
+                if data is None:
+                    return jsonify(ApiResponse(status="error", message=_("Token is invalid or expired!")).dict()), 401
+
+                # Obtener usuario de la DB; se guarda una instantánea (id, username, role) junto a los claims
+                db = get_request_db() # Sesión de la petición (g.db), cerrada en close_request_db
+                user = db.query(User).filter_by(username=data['sub']).first()
+                if not user:
+                    return jsonify(ApiResponse(status="error", message=_("User not found!")).dict()), 401
+                cached = (data, UserSnapshot.from_user(user))
+                token_cache.put(token, *cached)
+            g.token_claims, g.current_user = cached
 
         except Exception as e:
             logger.error(_("Error during token validation: %s"), e)
@@ -104,6 +166,10 @@ class Login(Resource):
             401: {
                 'description': 'Invalid credentials',
                 'schema': ApiResponse.schema()
+            },
+            429: {
+                'description': 'Login verification pool saturated, retry later',
+                'schema': ApiResponse.schema()
             }
         }
     })
@@ -121,12 +187,26 @@ class Login(Resource):
         except ValidationError as e:
             return jsonify(ApiResponse(status="error", message=_("Invalid request data"), data=e.errors()).dict()), 400
 
-        db = next(get_db())
+        db = get_request_db()
         user = db.query(User).filter_by(username=data.username).first()
-        db.close() # Cerrar la sesión de DB después de usarla
+        if not user:
+            return jsonify(ApiResponse(status="error", message=_("Invalid username or password")).dict()), 401
 
-        if not user or not user.verify_password(data.password):
+        # La verificación (bcrypt) corre en un pool acotado; si está saturado se responde 429
+        try:
+            valid, new_hash = login_pool.verify(data.password, user._password_hash).result(timeout=AUTH_LOGIN_TIMEOUT_S)
+        except LoginPoolSaturated:
+            logger.warning(_("Login rejected: verification pool is saturated"))
+            return jsonify(ApiResponse(status="error", message=_("Too many login attempts, try again later")).dict()), 429, {"Retry-After": "1"}
+        except FutureTimeoutError:
+            return jsonify(ApiResponse(status="error", message=_("Login verification timed out")).dict()), 503, {"Retry-After": "1"}
+        if not valid:
             return jsonify(ApiResponse(status="error", message=_("Invalid username or password")).dict()), 401
+        if new_hash:
+            # El hash usaba otro esquema o coste: se actualiza de forma transparente
+            user._password_hash = new_hash
+            db.commit()
+            logger.info(_("Password hash upgraded for user: %s"), user.username)
 
         token = create_access_token(data={"sub": user.username, "role": user.role}, secret_key=SECRET_KEY)
         return jsonify(TokenResponse(access_token=token, token_type="bearer").dict()), 200
@@ -140,6 +220,9 @@ class Status(Resource):
             200: {
                 'description': 'API status and enabled modules',
                 'schema': ApiResponse.schema()
+            },
+            304: {
+                'description': 'Status unchanged since the ETag sent in If-None-Match'
             }
         }
     })
@@ -148,6 +231,7 @@ class Status(Resource):
         """
         Get API Status
         This endpoint provides the current status of the API and lists enabled modules.
+        Supports conditional requests: send the last ETag in If-None-Match to get 304 when nothing changed.
         ---
         tags:
           - General
@@ -155,11 +239,238 @@ class Status(Resource):
           - BearerAuth: []
         """
         _ = request.locale
+        snapshot = module_manager.get_status_snapshot()
+        # El ETag cubre el estado de los módulos y lo que varía por petición (usuario, rol, idioma)
+        message = _("API is running")
+        etag = hashlib.sha1("|".join((snapshot.etag, g.current_user.username, g.current_user.role, message,
+                                      json.dumps(MODULES_ENABLED, sort_keys=True))).encode("utf-8"), usedforsecurity=False).hexdigest()[:20]
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
         logger.info(_("GET request to API status by user: %s"), g.current_user.username)
-        return jsonify(ApiResponse(status="success", message=_("API is running"), data={"modules_enabled": MODULES_ENABLED, "current_user": g.current_user.username, "current_role": g.current_user.role, "module_statuses": module_manager.get_all_module_statuses()}).dict())
+        # El estado de los módulos ya viene serializado: solo se compone el sobre de ApiResponse
+        body = '{"status":"success","message":%s,"data":{"modules_enabled":%s,"current_user":%s,"current_role":%s,"module_statuses":%s}}' % (
+            json.dumps(message), json.dumps(MODULES_ENABLED), json.dumps(g.current_user.username),
+            json.dumps(g.current_user.role), snapshot.statuses_json)
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
 api.add_resource(Status, '/status')
 
+class Metrics(Resource):
+    @swag_from({
+        'responses': {
+            200: {
+                'description': 'Runtime metrics: DB pool, caches, login pool, settings store, jobs',
+                'schema': ApiResponse.schema()
+            }
+        }
+    })
+    @token_required
+    def get(self):
+        """
+        Get Runtime Metrics
+        Connection pool, verified-token cache, login verification pool, settings write-behind, status snapshot, event bus and background job counters.
+        ---
+        tags:
+          - General
+        security:
+          - BearerAuth: []
+        """
+        _ = request.locale
+        return jsonify(ApiResponse(status="success", message=_("Runtime metrics"), data={
+            "db_pool": get_pool_status(),
+            "token_cache": token_cache.get_stats(),
+            "login_pool": login_pool.get_stats(),
+            "settings_store": settings_store.get_stats(),
+            "status_snapshot": status_service.get_stats(),
+            "event_bus": event_bus.get_stats(),
+            "jobs": job_manager.get_stats(),
+        }).dict())
+
+api.add_resource(Metrics, '/metrics')
+
+# --- Trabajos en segundo plano ---
+# Las operaciones largas de los módulos (tests, narración, anonimización) pueden
+# ejecutarse como trabajos con "background": true: se responde 202 con el id del
+# trabajo y el cliente consulta /jobs/<id> (o sigue /jobs/<id>/events) hasta que termina.
+def _submit_job(kind: str, params: Dict):
+    _ = request.locale
+    try:
+        job_id = job_manager.submit(kind, params, g.current_user.id)
+    except JobQueueFull:
+        return jsonify(ApiResponse(status="error", message=_("Too many background jobs, try again later")).dict()), 429, {"Retry-After": "5"}
+    logger.info(_("User %s queued job %s (%s)"), g.current_user.username, job_id, kind)
+    status_url = api.url_for(JobResource, job_id=job_id)
+    return jsonify(ApiResponse(status="success", message=_("Job queued"), data={"job_id": job_id, "status_url": status_url}).dict()), 202, {"Location": status_url}
+
+class JobResource(Resource):
+    @swag_from({
+        'parameters': [
+            {'in': 'path', 'name': 'job_id', 'type': 'string', 'required': True}
+        ],
+        'responses': {
+            200: {
+                'description': 'Job status, progress and, once finished, its result or error',
+                'schema': ApiResponse.schema()
+            },
+            404: {
+                'description': 'Job not found (or expired)',
+                'schema': ApiResponse.schema()
+            }
+        }
+    })
+    @token_required
+    def get(self, job_id):
+        """
+        Get Job
+        Status of a background job: queued, running, succeeded, failed or cancelled. Finished jobs are kept for JOBS_RETENTION_S.
+        ---
+        tags:
+          - Jobs
+        security:
+          - BearerAuth: []
+        """
+        _ = request.locale
+        job = job_manager.get(job_id, g.current_user.id)
+        if job is None:
+            return jsonify(ApiResponse(status="error", message=_("Job not found")).dict()), 404
+        return jsonify(ApiResponse(status="success", message=_("Job %s") % job["status"], data=job).dict()), 200
+
+    @swag_from({
+        'parameters': [
+            {'in': 'path', 'name': 'job_id', 'type': 'string', 'required': True}
+        ],
+        'responses': {
+            200: {
+                'description': 'Cancellation requested; a queued job is cancelled at once, a running one when it next checks',
+                'schema': ApiResponse.schema()
+            },
+            404: {
+                'description': 'Job not found (or expired)',
+                'schema': ApiResponse.schema()
+            }
+        }
+    })
+    @token_required
+    def delete(self, job_id):
+        """
+        Cancel Job
+        Cancels a queued or running background job. Finished jobs are left unchanged.
+        ---
+        tags:
+          - Jobs
+        security:
+          - BearerAuth: []
+        """
+        _ = request.locale
+        job = job_manager.cancel(job_id, g.current_user.id)
+        if job is None:
+            return jsonify(ApiResponse(status="error", message=_("Job not found")).dict()), 404
+        logger.info(_("User %s cancelled job %s"), g.current_user.username, job_id)
+        return jsonify(ApiResponse(status="success", message=_("Job %s") % job["status"], data=job).dict()), 200
+
+api.add_resource(JobResource, '/jobs/<string:job_id>')
+
+class JobEventsResource(Resource):
+    @swag_from({
+        'parameters': [
+            {'in': 'path', 'name': 'job_id', 'type': 'string', 'required': True},
+            {'in': 'query', 'name': 'timeout', 'type': 'number', 'required': False, 'description': 'Maximum seconds to follow the job (default 300, max 3600)'}
+        ],
+        'produces': ['application/x-ndjson'],
+        'responses': {
+            200: {
+                'description': 'One JSON line with the job each time its status or progress changes, ending when it finishes'
+            },
+            404: {
+                'description': 'Job not found (or expired)',
+                'schema': ApiResponse.schema()
+            }
+        }
+    })
+    @token_required
+    def get(self, job_id):
+        """
+        Follow Job
+        Streams the job's status changes as NDJSON until it finishes, instead of polling /jobs/<job_id>.
+        ---
+        tags:
+          - Jobs
+        security:
+          - BearerAuth: []
+        """
+        _ = request.locale
+        try:
+            timeout_s = min(max(float(request.args.get("timeout", 300)), 0.0), 3600.0)
+        except ValueError:
+            return jsonify(ApiResponse(status="error", message=_("Invalid request data")).dict()), 400
+        events = job_manager.watch(job_id, g.current_user.id, timeout_s=timeout_s)
+        first = next(events, None)
+        if first is None:
+            return jsonify(ApiResponse(status="error", message=_("Job not found")).dict()), 404
+
+        def lines():
+            yield json.dumps(first) + "\n"
+            for job in events:
+                yield json.dumps(job) + "\n"
+
+        return Response(stream_with_context(lines()), mimetype="application/x-ndjson")
+
+api.add_resource(JobEventsResource, '/jobs/<string:job_id>/events')
+
+def _run_tests_job(ctx, params):
+    module = module_manager.get_module("mod-devtools")
+    if not module:
+        raise RuntimeError("Devtools module not initialized")
+    result = module.run_tests(params.get("module_name"), should_cancel=lambda: ctx.cancelled)
+    if result["status"] == "cancelled":
+        raise JobCancelled()
+    return result
+
+def _narration_url(module, path: str) -> str:
+    # Los trabajos corren fuera de una petición: la ruta se construye con el mapa de URLs
+    return app.url_map.bind("").build("narration_audio", {"key": module.narration_cache.key_of(path)})
+
+def _narrate_job(ctx, params):
+    module = module_manager.get_module("mod-educator")
+    if not module:
+        raise RuntimeError("Educator module not initialized")
+    text = params["text"]
+    chunks = module.iter_narration_chunks(text, params["language"], params.get("voice_preset"))
+    done = cached = count = 0
+    try:
+        while True:
+            ctx.check_cancelled() # Al cerrar el generador se cancelan las frases pendientes
+            chunk = next(chunks)
+            count += 1
+            cached += chunk.cached
+            done += len(chunk.text)
+            ctx.set_progress(done / max(len(text), 1))
+    except StopIteration as finished:
+        path = finished.value
+    finally:
+        chunks.close()
+    return {"audio_url": _narration_url(module, path), "chunks": count, "cached_chunks": cached}
+
+def _anonymize_job(ctx, params):
+    module = module_manager.get_module("mod-activism")
+    if not module:
+        raise RuntimeError("Activism module not initialized")
+    ctx.check_cancelled()
+    output_path = module.anonymize_file(params["file_path"], params.get("output_path"))
+    if output_path is None:
+        raise RuntimeError("File could not be anonymized")
+    return {"output_path": output_path}
+
+job_manager.register("devtools.run_tests", _run_tests_job, concurrency=1)
+job_manager.register("educator.narrate", _narrate_job)
+job_manager.register("activism.anonymize", _anonymize_job)
+
 # --- Endpoints de Módulos ---
 
 # Mod-Voice
@@ -454,8 +765,111 @@ class AllyResource(Resource):
 
 api.add_resource(AllyResource, '/modules/ally')
 
+class AllyAnalysisResource(Resource):
+    @swag_from({
+        'parameters': [{
+            'in': 'body',
+            'name': 'body',
+            'schema': AllyAnalyzeRequest.schema()
+        }],
+        'produces': ['application/x-ndjson'],
+        'responses': {
+            200: {
+                'description': 'One JSON line per document ({"document", "sha256", "cached", "analysis"} or {"document", "error"}), then {"summary": {...}}'
+            },
+            400: {
+                'description': 'Invalid request',
+                'schema': ApiResponse.schema()
+            },
+            403: {
+                'description': 'Ally module is disabled',
+                'schema': ApiResponse.schema()
+            }
+        }
+    })
+    @token_required
+    def post(self):
+        """
+        Analyze Documents for Inclusive Language
+        Analyzes many documents, or a microcourse directory, and streams one NDJSON line per document.
+        ---
+        tags:
+          - Ally Module
+        security:
+          - BearerAuth: []
+        """
+        _ = request.locale
+        if not MODULES_ENABLED.get("mod-ally"):
+            return jsonify(ApiResponse(status="error", message=_('Ally module is disabled')).dict()), 403
+        try:
+            data = AllyAnalyzeRequest(**(request.get_json() or {}))
+        except ValidationError as e:
+            return jsonify(ApiResponse(status="error", message=_("Invalid request data"), data=e.errors()).dict()), 400
+        if data.documents is None and data.directory is None:
+            return jsonify(ApiResponse(status="error", message=_('Provide documents or a directory')).dict()), 400
+
+        module = module_manager.get_module("mod-ally")
+        if not module:
+            return jsonify(ApiResponse(status="error", message=_('Ally module not initialized')).dict()), 500
+        try:
+            paths = [module.resolve_microcourse_path(data.directory)] if data.directory is not None else None
+            # En el propio proceso (workers=1): hacer fork desde un hilo del servidor no es seguro
+            records = module.analyze_documents(documents=[(doc.id, doc.text) for doc in data.documents or []],
+                                               paths=paths, workers=1, use_cache=data.use_cache)
+        except (ValueError, FileNotFoundError) as e:
+            return jsonify(ApiResponse(status="error", message=_('Invalid directory'), data={"directory": data.directory, "error": str(e)}).dict()), 400
+        logger.info(_("User %s is analyzing documents for inclusivity"), g.current_user.username)
+        lines = (json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+api.add_resource(AllyAnalysisResource, '/modules/ally/analyze')
+
 # Mod-Therapy
 class TherapyResource(Resource):
+    @swag_from({
+        'parameters': [
+            {'in': 'query', 'name': 'limit', 'type': 'integer', 'required': False, 'description': 'Entries per page'},
+            {'in': 'query', 'name': 'cursor', 'type': 'string', 'required': False, 'description': 'next_cursor from the previous page'}
+        ],
+        'responses': {
+            200: {
+                'description': 'A page of decrypted journal entries, newest first',
+                'schema': ApiResponse.schema()
+            },
+            400: {
+                'description': 'Invalid cursor or limit',
+                'schema': ApiResponse.schema()
+            },
+            403: {
+                'description': 'Therapy module is disabled',
+                'schema': ApiResponse.schema()
+            }
+        }
+    })
+    @token_required
+    def get(self):
+        """
+        List Journal Entries
+        Returns one page of the current user's journal. Pass `next_cursor` back as `cursor` to get the next page.
+        ---
+        tags:
+          - Therapy Module
+        security:
+          - BearerAuth: []
+        """
+        _ = request.locale
+        if not MODULES_ENABLED.get("mod-therapy"):
+            return jsonify(ApiResponse(status="error", message=_('Therapy module is disabled')).dict()), 403
+        module = module_manager.get_module("mod-therapy")
+        if not module:
+            return jsonify(ApiResponse(status="error", message=_('Therapy module not initialized')).dict()), 500
+        try:
+            limit = request.args.get("limit", THERAPY_JOURNAL_PAGE_SIZE, type=int)
+            page = module.get_journal_page(g.current_user.id, limit=limit, cursor=request.args.get("cursor"))
+        except ValueError:
+            return jsonify(ApiResponse(status="error", message=_('Invalid cursor')).dict()), 400
+        return jsonify(ApiResponse(status="success", message=_('Journal entries'), data=page).dict()), 200
+
     @swag_from({
         'parameters': [{
             'in': 'body',
@@ -505,6 +919,138 @@ class TherapyResource(Resource):
 
 api.add_resource(TherapyResource, '/modules/therapy/journal')
 
+class TherapyJournalBulkResource(Resource):
+    @swag_from({
+        'parameters': [
+            {'in': 'query', 'name': 'encrypted', 'type': 'boolean', 'required': False, 'description': 'Export the encrypted tokens instead of the decrypted content'}
+        ],
+        'produces': ['application/x-ndjson'],
+        'responses': {
+            200: {
+                'description': 'One JSON line per journal entry, oldest first'
+            },
+            403: {
+                'description': 'Therapy module is disabled',
+                'schema': ApiResponse.schema()
+            }
+        }
+    })
+    @token_required
+    def get(self):
+        """
+        Export Journal
+        Streams all of the current user's journal entries as NDJSON.
+        ---
+        tags:
+          - Therapy Module
+        security:
+          - BearerAuth: []
+        """
+        _ = request.locale
+        if not MODULES_ENABLED.get("mod-therapy"):
+            return jsonify(ApiResponse(status="error", message=_('Therapy module is disabled')).dict()), 403
+        module = module_manager.get_module("mod-therapy")
+        if not module:
+            return jsonify(ApiResponse(status="error", message=_('Therapy module not initialized')).dict()), 500
+        decrypt = request.args.get("encrypted", "false").lower() != "true"
+        lines = (json.dumps(entry, ensure_ascii=False) + "\n" for entry in module.export_journal_entries(g.current_user.id, decrypt=decrypt))
+        return Response(stream_with_context(lines), mimetype="application/x-ndjson",
+                        headers={"Content-Disposition": "attachment; filename=journal.ndjson"})
+
+    @swag_from({
+        'consumes': ['application/x-ndjson'],
+        'responses': {
+            200: {
+                'description': 'Number of imported and skipped entries',
+                'schema': ApiResponse.schema()
+            },
+            403: {
+                'description': 'Therapy module is disabled',
+                'schema': ApiResponse.schema()
+            }
+        }
+    })
+    @token_required
+    def post(self):
+        """
+        Import Journal
+        Imports NDJSON lines in the export format, with either `content` or `encrypted_content`, into the current user's journal.
+        ---
+        tags:
+          - Therapy Module
+        security:
+          - BearerAuth: []
+        """
+        _ = request.locale
+        if not MODULES_ENABLED.get("mod-therapy"):
+            return jsonify(ApiResponse(status="error", message=_('Therapy module is disabled')).dict()), 403
+        module = module_manager.get_module("mod-therapy")
+        if not module:
+            return jsonify(ApiResponse(status="error", message=_('Therapy module not initialized')).dict()), 500
+
+        def records():
+            for line in request.stream:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield {} # Se cuenta como omitido
+
+        result = module.import_journal_entries(g.current_user.id, records())
+        logger.info(_("User %s imported %s journal entries"), g.current_user.username, result["imported"])
+        return jsonify(ApiResponse(status="success", message=_('Journal imported'), data=result).dict()), 200
+
+api.add_resource(TherapyJournalBulkResource, '/modules/therapy/journal/bulk')
+
+class TherapyTrendResource(Resource):
+    @swag_from({
+        'parameters': [
+            {'in': 'query', 'name': 'period', 'type': 'string', 'enum': ['day', 'week'], 'required': False, 'description': 'Bucket size (default: day)'},
+            {'in': 'query', 'name': 'start', 'type': 'string', 'format': 'date', 'required': False, 'description': 'First day (YYYY-MM-DD)'},
+            {'in': 'query', 'name': 'end', 'type': 'string', 'format': 'date', 'required': False, 'description': 'Last day (YYYY-MM-DD)'}
+        ],
+        'responses': {
+            200: {
+                'description': 'Journal entry counts by sentiment for each day or week',
+                'schema': ApiResponse.schema()
+            },
+            400: {
+                'description': 'Invalid period or date',
+                'schema': ApiResponse.schema()
+            },
+            403: {
+                'description': 'Therapy module is disabled',
+                'schema': ApiResponse.schema()
+            }
+        }
+    })
+    @token_required
+    def get(self):
+        """
+        Mood Trend
+        Sentiment counts per day or week for the current user, read from pre-aggregated buckets without touching journal content.
+        ---
+        tags:
+          - Therapy Module
+        security:
+          - BearerAuth: []
+        """
+        _ = request.locale
+        if not MODULES_ENABLED.get("mod-therapy"):
+            return jsonify(ApiResponse(status="error", message=_('Therapy module is disabled')).dict()), 403
+        module = module_manager.get_module("mod-therapy")
+        if not module:
+            return jsonify(ApiResponse(status="error", message=_('Therapy module not initialized')).dict()), 500
+        try:
+            start = date.fromisoformat(request.args["start"]) if request.args.get("start") else None
+            end = date.fromisoformat(request.args["end"]) if request.args.get("end") else None
+            trend = module.get_mood_trend(g.current_user.id, period=request.args.get("period", "day"), start=start, end=end)
+        except ValueError as e:
+            return jsonify(ApiResponse(status="error", message=_('Invalid period or date'), data={"error": str(e)}).dict()), 400
+        return jsonify(ApiResponse(status="success", message=_('Mood trend'), data=trend).dict()), 200
+
+api.add_resource(TherapyTrendResource, '/modules/therapy/trends')
+
 # Mod-VTuber
 class VTuberResource(Resource):
     @swag_from({
@@ -618,6 +1164,10 @@ class ActivismResource(Resource):
                 'description': 'File anonymized successfully',
                 'schema': ApiResponse.schema()
             },
+            202: {
+                'description': 'With "background": true, the job was queued (poll data.status_url)',
+                'schema': ApiResponse.schema()
+            },
             400: {
                 'description': 'Invalid request',
                 'schema': ApiResponse.schema()
@@ -632,7 +1182,7 @@ class ActivismResource(Resource):
     def post(self):
         """
         Anonymize File
-        Performs OCR anti-doxing and anonymization on a given file.
+        Performs OCR anti-doxing and anonymization on a given file. With "background": true it runs as a job (see /jobs/{job_id}).
         ---
         tags:
           - Activism Module
@@ -648,9 +1198,13 @@ class ActivismResource(Resource):
             if not module:
                 return jsonify(ApiResponse(status="error", message=_('Activism module not initialized')).dict()), 500
             
-            module.anonymize_file(data.file_path)
+            if data.background:
+                return _submit_job("activism.anonymize", {"file_path": data.file_path, "output_path": data.output_path})
+            output_path = module.anonymize_file(data.file_path, data.output_path)
+            if output_path is None:
+                return jsonify(ApiResponse(status="error", message=_('File could not be anonymized')).dict()), 500
             logger.info(_("Anonymizing file for user %s: %s"), g.current_user.username, data.file_path)
-            return jsonify(ApiResponse(status="success", message=_('File anonymized successfully')).dict()), 200
+            return jsonify(ApiResponse(status="success", message=_('File anonymized successfully'), data={"output_path": output_path}).dict()), 200
         except ValidationError as e:
             return jsonify(ApiResponse(status="error", message=_("Invalid request data"), data=e.errors()).dict()), 400
 
@@ -666,7 +1220,11 @@ class EducatorResource(Resource):
         }],
         'responses': {
             200: {
-                'description': 'Narration generated successfully',
+                'description': 'Narration generated successfully (with "stream": true, the audio itself in chunks as each sentence is synthesized)',
+                'schema': ApiResponse.schema()
+            },
+            202: {
+                'description': 'With "background": true, the job was queued (poll data.status_url)',
                 'schema': ApiResponse.schema()
             },
             400: {
@@ -683,7 +1241,7 @@ class EducatorResource(Resource):
     def post(self):
         """
         Generate AI Narration
-        Converts text to speech using AI.
+        Converts text to speech using AI. With "stream": true the audio is sent with chunked transfer encoding as soon as the first sentence is ready; with "background": true it runs as a job (see /jobs/{job_id}).
         ---
         tags:
           - Educator Module
@@ -698,15 +1256,76 @@ class EducatorResource(Resource):
             module = module_manager.get_module("mod-educator")
             if not module:
                 return jsonify(ApiResponse(status="error", message=_('Educator module not initialized')).dict()), 500
-            
-            module.generate_narration(data.text, data.language)
+            lang = data.language or DEFAULT_LANG
+            if data.background:
+                return _submit_job("educator.narrate", {"text": data.text, "language": lang, "voice_preset": data.voice_preset})
+
+            if data.stream:
+                chunks = module.stream_narration(data.text, lang, data.voice_preset)
+                try:
+                    first = next(chunks, b"") # Un fallo antes del primer audio aún puede responder con error
+                except Exception as e:
+                    logger.error(_("Narration streaming failed: %s"), e)
+                    return jsonify(ApiResponse(status="error", message=_('Narration generation failed')).dict()), 500
+
+                def audio():
+                    yield first
+                    try:
+                        yield from chunks
+                    except Exception as e:
+                        logger.error(_("Narration streaming failed: %s"), e) # Cabeceras ya enviadas: se corta el audio
+
+                logger.info(_("Streaming narration for user %s: %s"), g.current_user.username, data.text[:50] + "...")
+                return Response(stream_with_context(audio()), mimetype="audio/mpeg")
+
+            audio_file_path = module.generate_narration(data.text, lang, data.voice_preset)
+            if audio_file_path is None:
+                return jsonify(ApiResponse(status="error", message=_('Narration generation failed')).dict()), 500
             logger.info(_("Generating narration for user %s: %s"), g.current_user.username, data.text[:50] + "...")
-            return jsonify(ApiResponse(status="success", message=_('Narration generated'), data={"audio_url": "/path/to/audio.mp3"}).dict()), 200
+            return jsonify(ApiResponse(status="success", message=_('Narration generated'), data={"audio_url": _narration_url(module, audio_file_path)}).dict()), 200
         except ValidationError as e:
             return jsonify(ApiResponse(status="error", message=_("Invalid request data"), data=e.errors()).dict()), 400
 
 api.add_resource(EducatorResource, '/modules/educator/narrate')
 
+class NarrationAudioResource(Resource):
+    @swag_from({
+        'parameters': [
+            {'in': 'path', 'name': 'key', 'type': 'string', 'required': True, 'description': 'Narration cache key (from data.audio_url)'}
+        ],
+        'produces': ['audio/mpeg'],
+        'responses': {
+            200: {
+                'description': 'The narration audio'
+            },
+            404: {
+                'description': 'Narration not found (never generated or evicted from the cache)',
+                'schema': ApiResponse.schema()
+            }
+        }
+    })
+    @token_required
+    def get(self, key):
+        """
+        Download Narration
+        Audio of a narration generated by /modules/educator/narrate (synchronously or as a job), addressed by its cache key.
+        ---
+        tags:
+          - Educator Module
+        security:
+          - BearerAuth: []
+        """
+        _ = request.locale
+        module = module_manager.get_module("mod-educator")
+        if not module:
+            return jsonify(ApiResponse(status="error", message=_('Educator module not initialized')).dict()), 500
+        path = module.narration_cache.get(key) if re.fullmatch(r"[0-9a-f]{64}", key) else None
+        if path is None:
+            return jsonify(ApiResponse(status="error", message=_('Narration not found')).dict()), 404
+        return send_file(path, mimetype="audio/mpeg")
+
+api.add_resource(NarrationAudioResource, '/modules/educator/narrations/<string:key>', endpoint="narration_audio")
+
 # Mod-Devtools
 class DevtoolsResource(Resource):
     @swag_from({
@@ -720,6 +1339,10 @@ class DevtoolsResource(Resource):
                 'description': 'Tests executed successfully',
                 'schema': ApiResponse.schema()
             },
+            202: {
+                'description': 'With "background": true, the job was queued (poll data.status_url)',
+                'schema': ApiResponse.schema()
+            },
             400: {
                 'description': 'Invalid request',
                 'schema': ApiResponse.schema()
@@ -734,7 +1357,7 @@ class DevtoolsResource(Resource):
     def post(self):
         """
         Run Tests
-        Executes unit or integration tests for specified modules.
+        Executes unit or integration tests for specified modules. Running the suite takes minutes: prefer "background": true and poll /jobs/{job_id}.
         ---
         tags:
           - Devtools Module
@@ -750,9 +1373,11 @@ class DevtoolsResource(Resource):
             if not module:
                 return jsonify(ApiResponse(status="error", message=_('Devtools module not initialized')).dict()), 500
             
-            module.run_tests(data.module_name)
+            if data.background:
+                return _submit_job("devtools.run_tests", {"module_name": data.module_name})
+            result = module.run_tests(data.module_name)
             logger.info(_("Running tests for user %s, module: %s"), g.current_user.username, data.module_name if data.module_name else "all")
-            return jsonify(ApiResponse(status="success", message=_('Tests executed')).dict()), 200
+            return jsonify(ApiResponse(status="success", message=_('Tests executed'), data=result).dict()), 200
         except ValidationError as e:
             return jsonify(ApiResponse(status="error", message=_("Invalid request data"), data=e.errors()).dict()), 400
 
@@ -810,40 +1435,190 @@ class AccessibilityResource(Resource):
 api.add_resource(AccessibilityResource, '/modules/accessibility/apply_theme')
 
 # --- WebSocket Events ---
+# Salas: "module:<nombre>" por módulo y "modules" para todos. Los clientes se suscriben
+# y reciben `module_state` con deltas agrupados en lugar de sondear /status.
+SOCKET_ALL_MODULES_ROOM = "modules"
+_socket_users: Dict[str, Tuple[str, UserSnapshot]] = {} # sid -> (token, usuario autenticado)
+
+def _socket_translator():
+    # Los eventos de Socket.IO no pasan por before_request
+    lang = request.headers.get('Accept-Language', DEFAULT_LANG).split(',')[0].split('-')[0]
+    return get_translator(lang)
+
+def _module_room(module_name: str) -> str:
+    return f"module:{module_name}"
+
+def _authenticate_socket(token: Optional[str]) -> Optional[UserSnapshot]:
+    if not token:
+        return None
+    cached = token_cache.get(token)
+    if cached is None:
+        data = decode_access_token(token, SECRET_KEY)
+        if data is None:
+            return None
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter_by(username=data['sub']).first()
+            if not user:
+                return None
+            cached = (data, UserSnapshot.from_user(user))
+        finally:
+            db.close()
+        token_cache.put(token, *cached)
+    return cached[1]
+
+def _socket_user(status_event: str, **fields) -> Optional[UserSnapshot]:
+    """
+    Usuario del socket, revalidado en cada evento: desde la conexión el token puede haber
+    caducado o el usuario haber cambiado de rol o sido eliminado (la caché de tokens se
+    invalida en esos casos). Si ya no es válido se responde con error y se desconecta.
+    """
+    _ = _socket_translator()
+    entry = _socket_users.get(request.sid)
+    if entry is None:
+        emit(status_event, {**fields, 'message': _('Authentication required')})
+        return None
+    token = entry[0]
+    user = _authenticate_socket(token)
+    if user is None:
+        _socket_users.pop(request.sid, None)
+        emit(status_event, {**fields, 'message': _('Session expired')})
+        disconnect()
+        return None
+    _socket_users[request.sid] = (token, user)
+    return user
+
+def _emit_module_events(events):
+    """Suscriptor del bus: reenvía cada lote de eventos a las salas correspondientes."""
+    for event in events:
+        payload = event.to_dict()
+        socketio.emit('module_state', payload, to=_module_room(event.module))
+        socketio.emit('module_state', payload, to=SOCKET_ALL_MODULES_ROOM)
+
+event_bus.subscribe(_emit_module_events)
+
 @socketio.on('connect')
-def handle_connect():
-    _ = request.locale
+def handle_connect(auth=None):
+    _ = _socket_translator()
+    token = (auth or {}).get('token') if isinstance(auth, dict) else None
+    user = _authenticate_socket(token)
+    if user is not None:
+        _socket_users[request.sid] = (token, user)
     logger.info(_('Client connected to WebSocket'))
-    emit('response', {'data': _('Connected to VoxUnity AI+ WebSocket')})
+    emit('response', {'data': _('Connected to VoxUnity AI+ WebSocket'), 'authenticated': user is not None})
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    _ = request.locale
+    _ = _socket_translator()
+    _socket_users.pop(request.sid, None)
     logger.info(_('Client disconnected from WebSocket'))
 
 @socketio.on('message')
 def handle_message(message):
-    _ = request.locale
+    _ = _socket_translator()
     logger.info(_('Received WebSocket message: %s'), message)
     emit('response', {'data': _('Echo: ') + str(message)})
 
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """Suscribe al cliente a los módulos indicados (o a todos) y le envía su estado actual."""
+    if _socket_user('error') is None:
+        return
+    modules = (data or {}).get('modules') if isinstance(data, dict) else None
+    statuses = module_manager.get_all_module_statuses()
+    if modules:
+        modules = [name for name in modules if name in statuses]
+        for name in modules:
+            join_room(_module_room(name))
+    else:
+        modules = list(statuses)
+        join_room(SOCKET_ALL_MODULES_ROOM)
+    for name in modules:
+        emit('module_state', {"type": EVENT_SNAPSHOT, "module": name, "data": statuses[name]})
+    emit('subscribed', {'modules': modules})
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data=None):
+    modules = (data or {}).get('modules') if isinstance(data, dict) else None
+    if modules:
+        for name in modules:
+            leave_room(_module_room(name))
+    else:
+        leave_room(SOCKET_ALL_MODULES_ROOM)
+    emit('unsubscribed', {'modules': modules or []})
+
 @socketio.on('voice_command')
 def handle_voice_command(data):
-    _ = request.locale
-    action = data.get('action')
-    preset = data.get('preset')
-    logger.info(_('Received voice command via WebSocket: Action=%s, Preset=%s'), action, preset)
-    # Aquí se integraría la lógica real del módulo de voz
-    emit('voice_status', {'status': _('processing'), 'action': action, 'preset': preset})
+    _ = _socket_translator()
+    if _socket_user('voice_status', status='error') is None:
+        return
+    try:
+        command = VoiceControlRequest(**(data or {}))
+    except ValidationError as e:
+        emit('voice_status', {'status': 'error', 'message': _("Invalid request data"), 'errors': e.errors()})
+        return
+    logger.info(_('Received voice command via WebSocket: Action=%s, Preset=%s'), command.action, command.preset)
+
+    module = module_manager.get_module("mod-voice")
+    if not module:
+        emit('voice_status', {'status': 'error', 'action': command.action, 'message': _('Voice module is disabled')})
+        return
+    if command.action == "start":
+        module.start(preset=command.preset)
+    elif command.action == "stop":
+        module.stop()
+    elif command.action == "switch_preset" and command.preset:
+        if not module.switch_preset(command.preset):
+            emit('voice_status', {'status': 'error', 'action': command.action, 'preset': command.preset,
+                                  'message': _('Could not switch voice preset')})
+            return
+    else:
+        emit('voice_status', {'status': 'error', 'action': command.action, 'message': _('Invalid action')})
+        return
+    # El cambio de estado llega además a los suscriptores como `module_state`
+    emit('voice_status', {'status': 'success', 'action': command.action, 'preset': module.current_preset,
+                          'is_active': module.is_active})
+
+@socketio.on('narrate')
+def handle_narrate(data):
+    """Narración por frases: un `narration_chunk` (con el audio binario) por trozo, en orden, y al final `narration_status`."""
+    _ = _socket_translator()
+    if _socket_user('narration_status', status='error') is None:
+        return
+    try:
+        narration = NarrationRequest(**(data or {}))
+    except ValidationError as e:
+        emit('narration_status', {'status': 'error', 'message': _("Invalid request data"), 'errors': e.errors()})
+        return
+    module = module_manager.get_module("mod-educator") if MODULES_ENABLED.get("mod-educator") else None
+    if not module:
+        emit('narration_status', {'status': 'error', 'message': _('Educator module is disabled')})
+        return
+    chunks = cached = 0
+    try:
+        for chunk in module.iter_narration_chunks(narration.text, narration.language or DEFAULT_LANG, narration.voice_preset):
+            emit('narration_chunk', {'index': chunk.index, 'text': chunk.text, 'audio': chunk.audio, 'cached': chunk.cached})
+            chunks += 1
+            cached += chunk.cached
+    except Exception as e:
+        logger.error(_("Narration streaming failed: %s"), e)
+        emit('narration_status', {'status': 'error', 'chunks': chunks, 'message': _('Narration generation failed')})
+        return
+    emit('narration_status', {'status': 'success', 'chunks': chunks, 'cached_chunks': cached})
 
 def main():
-    # Inicializar módulos antes de iniciar la API
-    module_manager.initialize_modules()
+    # Preparar módulos antes de iniciar la API (carga perezosa salvo MODULES_EAGER_INIT)
+    module_manager.initialize_modules(eager=MODULES_EAGER_INIT)
 
-    if API_DEBUG:
-        app.run(debug=True, host=API_HOST, port=API_PORT)
-    else:
-        socketio.run(app, host=API_HOST, port=API_PORT, debug=False, allow_unsafe_werkzeug=True) # allow_unsafe_werkzeug para evitar advertencias en producción
+    try:
+        if API_DEBUG:
+            app.run(debug=True, host=API_HOST, port=API_PORT)
+        else:
+            socketio.run(app, host=API_HOST, port=API_PORT, debug=False, allow_unsafe_werkzeug=True) # allow_unsafe_werkzeug para evitar advertencias en producción
+    finally:
+        # Persistir la configuración pendiente (write-behind) antes de salir
+        module_manager.flush_settings()
+        job_manager.shutdown(wait=False)
 
 if __name__ == '__main__':
     main()
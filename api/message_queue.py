@@ -0,0 +1,174 @@
+import hashlib
+import hmac
+import socket
+import struct
+import threading
+import time
+from typing import List, Tuple
+from urllib.parse import urlparse
+
+from socketio import PubSubManager
+
+from config.config import SECRET_KEY
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+IPC_SCHEME = "ipc"
+# Primer frame de cada conexión: rol + firma HMAC. Los publicadores solo envían, los suscriptores solo reciben
+ROLE_PUBLISHER = b"pub"
+ROLE_SUBSCRIBER = b"sub"
+_FRAME_HEADER = struct.Struct("!I")
+
+
+def parse_ipc_url(url: str) -> Tuple[str, int]:
+    """ipc://host:puerto -> (host, puerto). El puerto 0 elige uno libre al iniciar el broker."""
+    parsed = urlparse(url)
+    if parsed.scheme != IPC_SCHEME or parsed.port is None:
+        raise ValueError(f"Invalid IPC message queue URL: {url}")
+    return parsed.hostname or "127.0.0.1", parsed.port
+
+
+def send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 65536))
+        if not chunk:
+            raise EOFError("IPC connection closed")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _FRAME_HEADER.unpack(_recv_exact(sock, _FRAME_HEADER.size))
+    return _recv_exact(sock, size)
+
+
+def _handshake(role: bytes, authkey: bytes) -> bytes:
+    return role + b":" + hmac.new(authkey, role, hashlib.sha256).hexdigest().encode("ascii")
+
+
+class IPCBroker:
+    """
+    Broker de difusión local para la cola de mensajes de Socket.IO entre workers.
+    Cada mensaje de un publicador se reenvía a todos los suscriptores (incluido el
+    del worker emisor, que lo descarta por su host_id). Sustituye a Redis en un solo host.
+
+    Usa sockets TCP con frames de longitud prefijada (no multiprocessing.connection,
+    que lee el descriptor con os.read y no funciona con los sockets de gevent).
+    """
+
+    def __init__(self, url: str, authkey: bytes = SECRET_KEY):
+        self.address = parse_ipc_url(url)
+        self.authkey = authkey
+        self._server = None
+        self._subscribers: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self.messages_relayed = 0
+
+    @property
+    def url(self) -> str:
+        return f"{IPC_SCHEME}://{self.address[0]}:{self.address[1]}"
+
+    def start(self):
+        self._server = socket.create_server(self.address)
+        self.address = self._server.getsockname()[:2]
+        threading.Thread(target=self._accept_loop, name="ipc-broker", daemon=True).start()
+        logger.info(f"IPC message broker listening on {self.address[0]}:{self.address[1]}")
+        return self
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return # Servidor cerrado
+            threading.Thread(target=self._serve_connection, args=(conn,), name="ipc-relay", daemon=True).start()
+
+    def _serve_connection(self, conn: socket.socket):
+        try:
+            hello = recv_frame(conn)
+            if hmac.compare_digest(hello, _handshake(ROLE_SUBSCRIBER, self.authkey)):
+                with self._lock:
+                    self._subscribers.append(conn)
+                conn.recv(1) # Bloquea hasta que el suscriptor se desconecta
+            elif hmac.compare_digest(hello, _handshake(ROLE_PUBLISHER, self.authkey)):
+                while True:
+                    self._broadcast(recv_frame(conn))
+            else:
+                logger.warning("IPC broker rejected a connection: bad handshake")
+        except (EOFError, OSError, struct.error):
+            pass
+        finally:
+            with self._lock:
+                if conn in self._subscribers:
+                    self._subscribers.remove(conn)
+            conn.close()
+
+    def _broadcast(self, payload: bytes):
+        with self._lock:
+            self.messages_relayed += 1
+            for subscriber in list(self._subscribers):
+                try:
+                    send_frame(subscriber, payload)
+                except OSError:
+                    self._subscribers.remove(subscriber)
+
+    def stop(self):
+        if self._server is not None:
+            self._server.close()
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.close()
+            self._subscribers.clear()
+
+
+class IPCManager(PubSubManager):
+    """Client manager de python-socketio sobre `IPCBroker` (URL ipc://host:puerto)."""
+    name = IPC_SCHEME
+
+    def __init__(self, url: str, channel: str = "socketio", write_only: bool = False, logger=None,
+                 json=None, authkey: bytes = SECRET_KEY):
+        self.address = parse_ipc_url(url)
+        self.authkey = authkey
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+
+    def _connect(self, role: bytes) -> socket.socket:
+        # Con gevent el módulo socket está parcheado y las esperas ceden el control al hub
+        conn = socket.create_connection(self.address)
+        send_frame(conn, _handshake(role, self.authkey))
+        return conn
+
+    def _publish(self, data):
+        payload = self.json.dumps(data).encode("utf-8")
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = self._connect(ROLE_PUBLISHER)
+                    send_frame(self._publisher, payload)
+                    return
+                except OSError as e:
+                    self._publisher = None
+                    if attempt:
+                        self._get_logger().error(f"Cannot publish to IPC message broker: {e}")
+
+    def _listen(self):
+        retry_sleep = 1
+        while True:
+            try:
+                conn = self._connect(ROLE_SUBSCRIBER)
+                retry_sleep = 1
+                while True:
+                    yield recv_frame(conn)
+            except (OSError, EOFError) as e:
+                self._get_logger().error(f"IPC message broker unavailable ({e}), retrying in {retry_sleep}s")
+                time.sleep(retry_sleep)
+                retry_sleep = min(retry_sleep * 2, 30)
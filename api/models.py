@@ -1,11 +1,11 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Union
 
 # --- Modelos Generales ---
 class ApiResponse(BaseModel):
     status: str = Field(..., description="Status of the API response (success/error)")
     message: str = Field(..., description="A human-readable message describing the response")
-    data: Optional[dict] = Field(None, description="Optional data payload")
+    data: Optional[Union[dict, list]] = Field(None, description="Optional data payload (a list for validation errors)")
 
 # --- Modelos de Autenticación ---
 class LoginRequest(BaseModel):
@@ -25,7 +25,7 @@ class VoicePreset(BaseModel):
     settings: dict = Field(..., description="JSON object of voice settings")
 
 class VoiceControlRequest(BaseModel):
-    action: str = Field(..., description="Action to perform (start/stop)", example="start")
+    action: str = Field(..., description="Action to perform (start/stop; switch_preset over WebSocket)", example="start")
     preset: Optional[str] = Field(None, description="Name of the voice preset to use", example="robot")
 
 # Mod-Streaming
@@ -38,6 +38,16 @@ class StreamingControlRequest(BaseModel):
     action: str = Field(..., description="Action to perform (start/stop/activate_overlay)", example="activate_overlay")
     overlay_name: Optional[str] = Field(None, description="Name of the overlay to activate/deactivate", example="alert_donation")
 
+# Mod-Ally
+class AllyDocument(BaseModel):
+    id: str = Field(..., description="Document identifier echoed in the results", example="lesson-1")
+    text: str = Field(..., description="Document text to analyze")
+
+class AllyAnalyzeRequest(BaseModel):
+    documents: Optional[List[AllyDocument]] = Field(None, description="Documents to analyze")
+    directory: Optional[str] = Field(None, description="Directory relative to the microcourse directory to analyze (\"\" for all of it)", example="intro")
+    use_cache: bool = Field(True, description="Reuse results for documents whose content has not changed")
+
 # Mod-Therapy
 class JournalEntryCreate(BaseModel):
     content: str = Field(..., description="Content of the journal entry")
@@ -52,18 +62,23 @@ class JournalEntryResponse(BaseModel):
 class AnonymizeFileRequest(BaseModel):
     file_path: str = Field(..., description="Path to the file to anonymize")
     output_path: Optional[str] = Field(None, description="Optional output path for the anonymized file")
+    background: bool = Field(False, description="Run as a background job: returns 202 with the job id instead of waiting")
 
 # Mod-Educator
 class NarrationRequest(BaseModel):
     text: str = Field(..., description="Text to convert to speech")
     language: Optional[str] = Field(None, description="Language for narration (e.g., en, es)")
+    voice_preset: Optional[str] = Field(None, description="Voice preset (default: <language>_speaker_0)")
+    stream: bool = Field(False, description="Stream the audio sentence by sentence instead of returning when it is complete")
+    background: bool = Field(False, description="Run as a background job: returns 202 with the job id instead of waiting")
 
 class NarrationResponse(BaseModel):
     audio_url: str = Field(..., description="URL to the generated audio file")
 
 # Mod-Devtools
 class RunTestsRequest(BaseModel):
-    module_name: Optional[str] = Field(None, description="Specific module to test, or all if None")
+    module_name: Optional[str] = Field(None, regex=r"^\w+$", description="Specific module to test, or all if None")
+    background: bool = Field(False, description="Run as a background job: returns 202 with the job id instead of waiting")
 
 # Mod-Accessibility
 class ApplyThemeRequest(BaseModel):
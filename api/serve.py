@@ -0,0 +1,119 @@
+import os
+import sys
+from typing import Optional
+
+import gevent
+from gunicorn.app.base import BaseApplication
+from gunicorn.workers.ggevent import GeventWorker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config.config as config
+from config.config import API_HOST, API_PORT, API_WORKERS, API_WORKER_CONNECTIONS, API_DRAIN_TIMEOUT_S
+from core.utils import get_logger
+from api.message_queue import IPCBroker
+
+logger = get_logger(__name__)
+
+
+class DrainingGeventWorker(GeventWorker):
+    """
+    Worker gevent de gunicorn. Al recibir SIGTERM deja de aceptar conexiones (gunicorn)
+    y además cierra los WebSocket abiertos, que de otro modo retendrían el worker
+    hasta agotar `graceful_timeout`; las peticiones HTTP en curso terminan con normalidad.
+    """
+
+    def handle_exit(self, sig, frame):
+        super().handle_exit(sig, frame)
+        gevent.spawn(_disconnect_socket_clients)
+
+
+def _disconnect_socket_clients():
+    from api.app import socketio
+    try:
+        socketio.server.eio.disconnect()
+    except Exception as e:
+        logger.warning(f"Error closing WebSocket clients during drain: {e}")
+
+
+def _post_worker_init(worker):
+    # Cada worker tiene su propio Module Manager (la app se importa tras el fork)
+    from core.database import engine
+    from core.module_manager import module_manager
+    engine.dispose() # No heredar conexiones abiertas por el proceso maestro
+    module_manager.initialize_modules(eager=config.MODULES_EAGER_INIT)
+    logger.info(f"API worker {worker.pid} ready")
+
+
+def _worker_exit(server, worker):
+    from core.event_bus import event_bus
+    from core.login_pool import login_pool
+    from core.module_manager import module_manager
+    event_bus.flush()
+    module_manager.flush_settings()
+    login_pool.shutdown(wait=False)
+    logger.info(f"API worker {worker.pid} drained")
+
+
+class VoxUnityServer(BaseApplication):
+    """Lanza la app Flask/Socket.IO en gunicorn sin fichero de configuración externo."""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Se importa en el worker, después de que gevent haya parcheado la stdlib
+        from api.app import app
+        return app
+
+
+def serve(workers: int = API_WORKERS, host: str = API_HOST, port: int = API_PORT,
+          message_queue: Optional[str] = None, eager: Optional[bool] = None):
+    """
+    Sirve la API con `workers` procesos gevent. Sin cola de mensajes configurada
+    (API_MESSAGE_QUEUE) y con más de un worker, el proceso maestro arranca un broker
+    IPC local para que los eventos de Socket.IO lleguen a los clientes de cualquier worker.
+    """
+    if "api.app" in sys.modules:
+        logger.warning("api.app was imported before forking workers; Socket.IO options may not match serve mode")
+
+    workers = max(1, workers)
+    broker = None
+    message_queue = message_queue or config.API_MESSAGE_QUEUE
+    if message_queue is None and workers > 1:
+        broker = IPCBroker("ipc://127.0.0.1:0").start()
+        message_queue = broker.url
+
+    # Los workers importan api.app después del fork y leen estos valores al construir Socket.IO
+    config.API_SERVER = "gunicorn"
+    config.API_WORKERS = workers
+    config.API_MESSAGE_QUEUE = message_queue
+    if eager is not None:
+        config.MODULES_EAGER_INIT = eager
+
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": DrainingGeventWorker,
+        "worker_connections": API_WORKER_CONNECTIONS,
+        "graceful_timeout": API_DRAIN_TIMEOUT_S,
+        "preload_app": False,
+        "post_worker_init": _post_worker_init,
+        "worker_exit": _worker_exit,
+    }
+    logger.info(f"Starting API with gunicorn: {workers} gevent worker(s) on {host}:{port}, "
+                f"message queue: {message_queue or 'none'}")
+    try:
+        VoxUnityServer(options).run()
+    finally:
+        if broker is not None:
+            broker.stop()
+
+
+if __name__ == '__main__':
+    serve()
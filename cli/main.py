@@ -1,10 +1,11 @@
 import click
 import sys
 import os
+import json
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from config.config import MODULES_ENABLED, DEFAULT_LANG, SUPPORTED_LANGS, APP_VERSION
+from config.config import MODULES_ENABLED, DEFAULT_LANG, SUPPORTED_LANGS, APP_VERSION, ALLY_MICROCOURSE_DIR
 from core.localization import get_translator
 from core.utils import get_logger
 from core.module_manager import module_manager
@@ -118,6 +119,34 @@ if MODULES_ENABLED.get("mod-ally"):
         else:
             logger.error(_("Ally module is not available or enabled."))
 
+    @ally.command()
+    @click.argument('paths', nargs=-1, type=click.Path(exists=True))
+    @click.option('--workers', type=int, default=None, help="Analysis processes (default: automatic).")
+    @click.option('--no-cache', is_flag=True, help="Re-analyze documents even if their content has not changed.")
+    @click.option('--strict', is_flag=True, help="Exit with status 1 if any document has findings.")
+    @click.pass_context
+    def analyze(ctx, paths, workers, no_cache, strict):
+        """Analyze documents or directories for inclusive language (NDJSON output).
+
+        Without PATHS, analyzes the microcourse directory.
+        """
+        _ = get_translator(ctx.parent.params.get('lang', DEFAULT_LANG))
+        module = module_manager.get_module("mod-ally")
+        if not module:
+            logger.error(_("Ally module is not available or enabled."))
+            sys.exit(2)
+        try:
+            records = module.analyze_documents(paths=list(paths) or [ALLY_MICROCOURSE_DIR], workers=workers, use_cache=not no_cache)
+        except FileNotFoundError as e:
+            logger.error(_("Path not found: %s"), e)
+            sys.exit(2)
+        summary = {}
+        for record in records:
+            click.echo(json.dumps(record, ensure_ascii=False))
+            summary = record.get("summary", summary)
+        if summary.get("errors") or (strict and summary.get("flagged")):
+            sys.exit(1)
+
 if MODULES_ENABLED.get("mod-therapy"):
     @cli.group()
     def therapy():
@@ -138,6 +167,51 @@ if MODULES_ENABLED.get("mod-therapy"):
         else:
             logger.error(_("Therapy module is not available or enabled."))
 
+    @therapy.command()
+    @click.option('--user-id', type=int, default=1, help="Owner of the journal.")
+    @click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help="NDJSON output file (default: stdout).")
+    @click.option('--encrypted', is_flag=True, help="Export the encrypted tokens instead of the decrypted content.")
+    @click.pass_context
+    def export(ctx, user_id, output, encrypted):
+        """Export a journal as NDJSON, oldest entry first."""
+        _ = get_translator(ctx.parent.params.get('lang', DEFAULT_LANG))
+        module = module_manager.get_module("mod-therapy")
+        if module:
+            count = 0
+            for entry in module.export_journal_entries(user_id, decrypt=not encrypted):
+                output.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                count += 1
+            logger.info(_("Therapy journal exported: %s entries."), count)
+        else:
+            logger.error(_("Therapy module is not available or enabled."))
+
+    @therapy.command(name="import")
+    @click.argument('source', type=click.File('r', encoding='utf-8'))
+    @click.option('--user-id', type=int, default=1, help="Owner of the journal.")
+    @click.pass_context
+    def import_entries(ctx, source, user_id):
+        """Import journal entries from an NDJSON export."""
+        _ = get_translator(ctx.parent.params.get('lang', DEFAULT_LANG))
+        module = module_manager.get_module("mod-therapy")
+        if module:
+            result = module.import_journal_entries(user_id, (json.loads(line) for line in source if line.strip()))
+            logger.info(_("Therapy journal imported: %s entries, %s skipped."), result["imported"], result["skipped"])
+        else:
+            logger.error(_("Therapy module is not available or enabled."))
+
+    @therapy.command()
+    @click.option('--user-id', type=int, default=None, help="Only this user's journal (default: all users).")
+    @click.pass_context
+    def rescore(ctx, user_id):
+        """Re-run sentiment analysis over stored journal entries."""
+        _ = get_translator(ctx.parent.params.get('lang', DEFAULT_LANG))
+        module = module_manager.get_module("mod-therapy")
+        if module:
+            result = module.rescore_journal(user_id)
+            logger.info(_("Therapy journal rescored: %s entries, %s changed."), result["scored"], result["changed"])
+        else:
+            logger.error(_("Therapy module is not available or enabled."))
+
     @therapy.command()
     @click.pass_context
     def start(ctx):
@@ -1,10 +1,17 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean
+import threading
+from typing import Any, Dict, Optional
+from sqlalchemy import create_engine, event, Column, Integer, Float, String, Text, Date, DateTime, Boolean, Index, UniqueConstraint
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+from datetime import date, datetime, timedelta
 
-from config.config import DATA_DIR, DATABASE_URL
+from config.config import (DATA_DIR, DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT_S, DB_POOL_RECYCLE_S,
+                           DB_POOL_PRE_PING, DB_SQLITE_WAL, DB_SQLITE_STATIC_POOL)
 from core.utils import get_logger, hash_password, verify_password
 
 logger = get_logger(__name__)
@@ -51,16 +58,154 @@ class JournalEntry(Base):
     sentiment_analysis = Column(String) # e.g., positive, negative, neutral
     created_at = Column(DateTime, default=datetime.now)
 
+    # Paginación por cursor (created_at, id) de las entradas de un usuario. En SQLite
+    # el rowid (= id) forma parte de cada índice, así que cubre también el desempate.
+    __table_args__ = (Index("ix_journal_entries_user_created", "user_id", "created_at"),)
+
     def __repr__(self):
         return f"<JournalEntry(user_id={self.user_id}, created_at='{self.created_at}')>"
 
+SENTIMENT_PERIODS = ("day", "week")
+
+class JournalSentimentAggregate(Base):
+    """
+    Recuento de entradas del diario por usuario, periodo (día o semana ISO, empezando
+    en lunes) y sentimiento. Se mantiene en la misma transacción que inserta las
+    entradas, así que las tendencias de ánimo se consultan sin leer el diario.
+    """
+    __tablename__ = 'journal_sentiment_aggregates'
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    period = Column(String, nullable=False) # day, week
+    bucket_start = Column(Date, nullable=False)
+    sentiment = Column(String, nullable=False) # positive, negative, neutral, unknown
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint("user_id", "period", "bucket_start", "sentiment", name="uq_journal_sentiment_bucket"),)
+
+    def __repr__(self):
+        return f"<JournalSentimentAggregate(user_id={self.user_id}, {self.period}={self.bucket_start}, {self.sentiment}={self.count})>"
+
+def sentiment_bucket_start(created_at: datetime, period: str) -> date:
+    """Inicio del periodo que contiene `created_at`: el mismo día o el lunes de su semana."""
+    day = created_at.date()
+    return day - timedelta(days=day.weekday()) if period == "week" else day
+
+def increment_sentiment_aggregates(db: Session, user_id: int, created_at: datetime, sentiment: Optional[str], count: int = 1):
+    """
+    Suma `count` entradas a los agregados de día y semana de `created_at` dentro de la
+    transacción de `db` (no hace commit). Usa un upsert atómico en SQLite y PostgreSQL.
+    """
+    sentiment = sentiment or "unknown"
+    table = JournalSentimentAggregate.__table__
+    dialect = db.get_bind().dialect.name
+    for period in SENTIMENT_PERIODS:
+        key = {"user_id": user_id, "period": period, "bucket_start": sentiment_bucket_start(created_at, period), "sentiment": sentiment}
+        if dialect in ("sqlite", "postgresql"):
+            insert = (sqlite if dialect == "sqlite" else postgresql).insert(table).values(count=count, **key)
+            db.execute(insert.on_conflict_do_update(index_elements=list(key), set_={"count": table.c.count + count}))
+        else:
+            updated = db.query(JournalSentimentAggregate).filter_by(**key).update(
+                {JournalSentimentAggregate.count: JournalSentimentAggregate.count + count}, synchronize_session=False)
+            if not updated:
+                db.add(JournalSentimentAggregate(count=count, **key))
+                db.flush() # Un segundo incremento del mismo periodo en esta transacción debe verlo
+
+class Job(Base):
+    """
+    Trabajo en segundo plano (core/jobs.py). Los parámetros y el resultado se guardan
+    como JSON; `worker_id` (host:pid) identifica el proceso que lo ejecuta, y
+    `cancel_requested` permite cancelarlo desde cualquier worker de la API.
+    """
+    __tablename__ = 'jobs'
+    id = Column(String(32), primary_key=True)
+    kind = Column(String, nullable=False) # p. ej. devtools.run_tests
+    user_id = Column(Integer) # Propietario; None para trabajos internos
+    status = Column(String, nullable=False, default="queued") # queued, running, succeeded, failed, cancelled
+    params_json = Column(Text, nullable=False, default="{}")
+    result_json = Column(Text)
+    error = Column(Text)
+    progress = Column(Float) # 0..1 si el trabajo lo informa
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    worker_id = Column(String)
+    created_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    # Purga por retención de los trabajos terminados
+    __table_args__ = (Index("ix_jobs_status_finished", "status", "finished_at"),)
+
+    def __repr__(self):
+        return f"<Job(id='{self.id}', kind='{self.kind}', status='{self.status}')>"
+
+# Contadores del pool (checkouts totales, conexiones abiertas, invalidadas)
+_pool_counters: Dict[str, int] = {"checkouts": 0, "checkins": 0, "connects": 0, "invalidated": 0}
+_pool_counters_lock = threading.Lock()
+
+def _count(name: str):
+    with _pool_counters_lock:
+        _pool_counters[name] += 1
+
+def create_db_engine(url: str = DATABASE_URL, static_pool: Optional[bool] = None) -> Engine:
+    """
+    Crea el engine con el pool configurado (DB_POOL_*). Para SQLite desactiva
+    `check_same_thread`, activa WAL en bases de datos en fichero y usa StaticPool
+    (una única conexión compartida) para `:memory:` o con DB_SQLITE_STATIC_POOL.
+    """
+    url_obj = make_url(url)
+    is_sqlite = url_obj.get_backend_name() == "sqlite"
+    in_memory = is_sqlite and url_obj.database in (None, "", ":memory:")
+    if static_pool is None:
+        static_pool = DB_SQLITE_STATIC_POOL or in_memory
+
+    kwargs: Dict[str, Any] = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if is_sqlite:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if static_pool:
+        kwargs["poolclass"] = StaticPool
+    else:
+        kwargs.update(poolclass=QueuePool, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                      pool_timeout=DB_POOL_TIMEOUT_S, pool_recycle=DB_POOL_RECYCLE_S)
+    new_engine = create_engine(url, **kwargs)
+
+    if is_sqlite and DB_SQLITE_WAL and not in_memory:
+        @event.listens_for(new_engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL") # Seguro con WAL y evita un fsync por commit
+            cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+
+    event.listen(new_engine, "connect", lambda *args: _count("connects"))
+    event.listen(new_engine, "checkout", lambda *args: _count("checkouts"))
+    event.listen(new_engine, "checkin", lambda *args: _count("checkins"))
+    event.listen(new_engine, "invalidate", lambda *args: _count("invalidated"))
+    return new_engine
+
 # Configuración de la base de datos
-engine = create_engine(DATABASE_URL)
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_pool_status() -> Dict[str, Any]:
+    """Métricas del pool de conexiones del engine global."""
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_in=pool.checkedin(), checked_out=pool.checkedout(),
+                      overflow=pool.overflow(), max_overflow=DB_MAX_OVERFLOW)
+    with _pool_counters_lock:
+        status.update(_pool_counters)
+    status["in_use"] = status["checkouts"] - status["checkins"]
+    return status
+
 def init_db():
     """Inicializa la base de datos y crea las tablas si no existen."""
     Base.metadata.create_all(bind=engine)
+    # create_all no añade índices nuevos a tablas que ya existían
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     logger.info(f"Database initialized at {DATABASE_URL}")
 
 def get_db():
@@ -0,0 +1,120 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from config.config import EVENT_BUS_COALESCE_MS
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Tipos de evento emitidos a los clientes
+EVENT_STATE_CHANGED = "state_changed" # Delta del estado de un módulo (mismas claves que get_status)
+EVENT_SNAPSHOT = "snapshot" # Estado completo, enviado al suscribirse
+
+
+class ModuleEvent(NamedTuple):
+    type: str
+    module: str
+    data: Dict[str, Any]
+    seq: int
+    ts: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "module": self.module, "data": self.data, "seq": self.seq, "ts": round(self.ts, 3)}
+
+
+class ModuleEventBus:
+    """
+    Bus de eventos de estado de los módulos.
+
+    `publish()` acumula los deltas por (tipo, módulo) y los fusiona; cada
+    `window_s` se entrega a los suscriptores un único lote con un evento por
+    módulo que haya cambiado. Con `window_s=0` se entrega en cada publicación.
+    """
+
+    def __init__(self, window_s: float = EVENT_BUS_COALESCE_MS / 1000.0, clock: Callable[[], float] = time.time):
+        self.window_s = window_s
+        self.clock = clock
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._subscribers: List[Callable[[List[ModuleEvent]], None]] = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._seq = 0
+        self.published = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.events_delivered = 0
+
+    def subscribe(self, callback: Callable[[List[ModuleEvent]], None]):
+        """Registra un receptor de lotes de eventos."""
+        with self._cond:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[List[ModuleEvent]], None]):
+        with self._cond:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, module_name: str, data: Dict[str, Any], event_type: str = EVENT_STATE_CHANGED):
+        """Encola un delta; los deltas del mismo módulo dentro de la ventana se fusionan."""
+        with self._cond:
+            if not self._subscribers:
+                return
+            key = (event_type, module_name)
+            self.published += 1
+            if key in self._pending:
+                self.coalesced += 1
+                self._pending[key].update(data)
+            else:
+                self._pending[key] = dict(data)
+            if self.window_s > 0:
+                self._ensure_worker()
+                self._cond.notify()
+        if self.window_s <= 0:
+            self.flush()
+
+    def flush(self) -> int:
+        """Entrega inmediatamente lo pendiente. Retorna el número de eventos entregados."""
+        with self._flush_lock:
+            with self._cond:
+                pending, self._pending = self._pending, {}
+                subscribers = list(self._subscribers)
+                now = self.clock()
+                events = []
+                for (event_type, module_name), data in pending.items():
+                    self._seq += 1
+                    events.append(ModuleEvent(event_type, module_name, data, self._seq, now))
+            if not events:
+                return 0
+            for callback in subscribers:
+                try:
+                    callback(events)
+                except Exception as e:
+                    logger.error(f"Event bus subscriber {callback!r} failed: {e}")
+            self.batches += 1
+            self.events_delivered += len(events)
+            return len(events)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="event-bus", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # Ventana de agrupación
+            time.sleep(self.window_s)
+            self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"window_ms": round(self.window_s * 1000, 1), "subscribers": len(self._subscribers),
+                "published": self.published, "coalesced": self.coalesced, "batches": self.batches,
+                "events_delivered": self.events_delivered}
+
+
+event_bus = ModuleEventBus()
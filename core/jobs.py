@@ -0,0 +1,382 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config.config import JOBS_WORKERS, JOBS_KIND_LIMITS, JOBS_MAX_PENDING, JOBS_RETENTION_S
+from core.database import get_db, Job
+from core.utils import get_logger, is_gevent_patched
+
+logger = get_logger(__name__)
+
+JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+TERMINAL_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueueFull(Exception):
+    """Hay `max_pending` trabajos en cola en este proceso: el cliente debe reintentar más tarde."""
+
+
+class JobCancelled(Exception):
+    """La lanza un trabajo (p. ej. con `JobContext.check_cancelled`) al detectar que se canceló."""
+
+
+class UnknownJobKind(ValueError):
+    pass
+
+
+class JobContext:
+    """
+    Lo que recibe el manejador de un trabajo: sus parámetros, si se pidió cancelarlo
+    (en este proceso o, vía la DB, desde otro worker de la API) y cómo informar del
+    progreso. La cancelación es cooperativa: el manejador consulta `cancelled` entre
+    pasos o llama a `check_cancelled()`.
+    """
+
+    def __init__(self, manager: "JobManager", job_id: str, params: Dict[str, Any], poll_interval_s: float = 1.0):
+        self.manager = manager
+        self.job_id = job_id
+        self.params = params
+        self.poll_interval_s = poll_interval_s
+        self._cancel = threading.Event()
+        self._checked_at = time.monotonic()
+        self._progress_at = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        if self._cancel.is_set():
+            return True
+        now = time.monotonic()
+        if now - self._checked_at >= self.poll_interval_s:
+            self._checked_at = now
+            if self.manager._cancel_requested(self.job_id):
+                self._cancel.set()
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def set_progress(self, fraction: float):
+        """Progreso 0..1; se persiste como mucho cada `poll_interval_s` (y siempre al llegar a 1)."""
+        now = time.monotonic()
+        if fraction >= 1.0 or now - self._progress_at >= self.poll_interval_s:
+            self._progress_at = now
+            self.manager._update(self.job_id, progress=round(min(max(fraction, 0.0), 1.0), 4))
+
+
+class LocalJobBackend:
+    """
+    Backend en proceso: una cola por tipo de trabajo y un pool de `workers` hilos.
+    Un trabajo empieza cuando hay un hilo libre y su tipo no ha alcanzado su límite
+    (`kind_limits`, por defecto sin más límite que el pool); los tipos se recorren
+    por turnos para que uno con mucha cola no acapare el pool. Bajo gevent se usa el
+    threadpool de gevent (hilos reales: los trabajos pueden usar CPU).
+    """
+
+    def __init__(self, workers: int, kind_limits: Dict[str, int], max_pending: int):
+        self.workers = max(1, workers)
+        self.kind_limits = dict(kind_limits)
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[str, Deque[Any]]" = OrderedDict() # tipo -> cola de (job_id, run)
+        self._running: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.submitted = 0
+        self.rejected = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            if is_gevent_patched():
+                from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+                self._executor = GeventThreadPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        return self._executor
+
+    def set_limit(self, kind: str, limit: Optional[int]):
+        with self._lock:
+            if limit is not None:
+                self.kind_limits[kind] = max(1, limit)
+
+    def submit(self, kind: str, job_id: str, run: Callable[[], None]):
+        with self._lock:
+            if sum(len(queue) for queue in self._pending.values()) >= self.max_pending:
+                self.rejected += 1
+                raise JobQueueFull()
+            self._pending.setdefault(kind, deque()).append((job_id, run))
+            self.submitted += 1
+            self._dispatch()
+
+    def remove(self, job_id: str) -> bool:
+        """Quita un trabajo que aún no ha empezado. Retorna False si no estaba en cola."""
+        with self._lock:
+            for queue in self._pending.values():
+                for item in queue:
+                    if item[0] == job_id:
+                        queue.remove(item)
+                        return True
+        return False
+
+    def _dispatch(self):
+        # Con el lock tomado
+        while sum(self._running.values()) < self.workers:
+            for kind, queue in self._pending.items():
+                if queue and self._running.get(kind, 0) < self.kind_limits.get(kind, self.workers):
+                    break
+            else:
+                return
+            self._pending.move_to_end(kind) # Turno rotatorio entre tipos
+            job_id, run = queue.popleft()
+            self._running[kind] = self._running.get(kind, 0) + 1
+            self._get_executor().submit(self._run, kind, run)
+
+    def _run(self, kind: str, run: Callable[[], None]):
+        try:
+            run()
+        finally:
+            with self._lock:
+                self._running[kind] -= 1
+                self._dispatch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "running": dict(self._running),
+                    "pending": {kind: len(queue) for kind, queue in self._pending.items()},
+                    "submitted": self.submitted, "rejected": self.rejected}
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            self._pending.clear()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+class JobManager:
+    """
+    Trabajos en segundo plano para las operaciones largas de los módulos: `submit()`
+    guarda el trabajo en la tabla `jobs` y retorna su id; el cliente consulta el
+    estado (`get`, o `watch` para recibir los cambios), lo cancela (`cancel`) y
+    recoge el resultado, que se conserva `retention_s` tras terminar.
+
+    Los trabajos se ejecutan en el proceso que los recibió (`LocalJobBackend`); el
+    estado vive en la DB, así que cualquier worker de la API puede consultarlos o
+    cancelarlos. Los trabajos de un proceso que ya no existe (reinicio) se marcan
+    como fallidos al arrancar.
+    """
+
+    def __init__(self, workers: int = JOBS_WORKERS, kind_limits: Optional[Dict[str, int]] = None,
+                 max_pending: int = JOBS_MAX_PENDING, retention_s: float = JOBS_RETENTION_S,
+                 purge_interval_s: float = 300.0):
+        self.backend = LocalJobBackend(workers, JOBS_KIND_LIMITS if kind_limits is None else kind_limits, max_pending)
+        self.retention_s = retention_s
+        self.purge_interval_s = purge_interval_s
+        self._handlers: Dict[str, Callable[[JobContext, Dict[str, Any]], Any]] = {}
+        self._contexts: Dict[str, JobContext] = {}
+        self._changed = threading.Condition()
+        self._recovered = False
+        self._purged_at = 0.0
+
+    def register(self, kind: str, handler: Callable[[JobContext, Dict[str, Any]], Any], concurrency: Optional[int] = None):
+        """`handler(ctx, params)` retorna un resultado serializable a JSON. `concurrency` solo se aplica si JOBS_KIND_LIMITS no fija ese tipo."""
+        self._handlers[kind] = handler
+        if kind not in self.backend.kind_limits:
+            self.backend.set_limit(kind, concurrency)
+
+    # --- Persistencia ---
+
+    def _update(self, job_id: str, only_if_status: Optional[str] = None, **fields) -> bool:
+        db: Session
+        for db in get_db():
+            query = db.query(Job).filter(Job.id == job_id)
+            if only_if_status is not None:
+                query = query.filter(Job.status == only_if_status)
+            updated = query.update(fields, synchronize_session=False)
+            db.commit()
+        with self._changed:
+            self._changed.notify_all()
+        return bool(updated)
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        try:
+            db: Session
+            for db in get_db():
+                return bool(db.query(Job.cancel_requested).filter(Job.id == job_id).scalar())
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not check cancellation of job {job_id}: {e}")
+            return False
+
+    @staticmethod
+    def _to_dict(job: Job) -> Dict[str, Any]:
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "progress": job.progress,
+            "result": json.loads(job.result_json) if job.result_json is not None else None,
+            "error": job.error,
+            "cancel_requested": job.cancel_requested,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
+
+    def recover_interrupted(self) -> int:
+        """Marca como fallidos los trabajos en cola o en curso de procesos de este host que ya no existen."""
+        self._recovered = True
+        host = WORKER_ID.rsplit(":", 1)[0]
+        orphaned = []
+        db: Session
+        for db in get_db():
+            for job_id, worker_id in db.query(Job.id, Job.worker_id).filter(Job.status.in_([JOB_QUEUED, JOB_RUNNING])):
+                worker_host, _, pid = (worker_id or "").rpartition(":")
+                if worker_host == host and worker_id != WORKER_ID and not _pid_alive(pid):
+                    orphaned.append(job_id)
+            if orphaned:
+                db.query(Job).filter(Job.id.in_(orphaned)).update(
+                    {"status": JOB_FAILED, "error": "interrupted: the worker process exited", "finished_at": datetime.now()},
+                    synchronize_session=False)
+                db.commit()
+        if orphaned:
+            logger.warning(f"Marked {len(orphaned)} interrupted job(s) as failed")
+        return len(orphaned)
+
+    def purge_expired(self) -> int:
+        """Borra los trabajos terminados hace más de `retention_s` (con sus resultados)."""
+        self._purged_at = time.monotonic()
+        cutoff = datetime.now() - timedelta(seconds=self.retention_s)
+        db: Session
+        for db in get_db():
+            deleted = db.query(Job).filter(Job.status.in_(TERMINAL_STATUSES), Job.finished_at < cutoff).delete(synchronize_session=False)
+            db.commit()
+        if deleted:
+            logger.info(f"Purged {deleted} expired job(s)")
+        return deleted
+
+    # --- API ---
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None, user_id: Optional[int] = None) -> str:
+        """Encola un trabajo y retorna su id. Lanza UnknownJobKind o JobQueueFull."""
+        if kind not in self._handlers:
+            raise UnknownJobKind(kind)
+        if not self._recovered:
+            self.recover_interrupted()
+        if time.monotonic() - self._purged_at >= self.purge_interval_s:
+            self.purge_expired()
+        params = params or {}
+        job_id = uuid.uuid4().hex
+        db: Session
+        for db in get_db():
+            db.add(Job(id=job_id, kind=kind, user_id=user_id, status=JOB_QUEUED, params_json=json.dumps(params),
+                       worker_id=WORKER_ID, created_at=datetime.now()))
+            db.commit()
+        try:
+            self.backend.submit(kind, job_id, lambda: self._run(job_id, kind, params))
+        except JobQueueFull:
+            self._update(job_id, status=JOB_FAILED, error="rejected: job queue is full", finished_at=datetime.now())
+            raise
+        logger.info(f"Job {job_id} ({kind}) queued")
+        return job_id
+
+    def _run(self, job_id: str, kind: str, params: Dict[str, Any]):
+        if not self._update(job_id, only_if_status=JOB_QUEUED, status=JOB_RUNNING, started_at=datetime.now()):
+            return # Cancelado mientras esperaba
+        context = self._contexts[job_id] = JobContext(self, job_id, params)
+        try:
+            result = self._handlers[kind](context, params)
+            fields = {"status": JOB_SUCCEEDED, "result_json": json.dumps(result, default=str), "progress": 1.0}
+        except JobCancelled:
+            fields = {"status": JOB_CANCELLED}
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {e}")
+            fields = {"status": JOB_FAILED, "error": str(e) or type(e).__name__}
+        finally:
+            self._contexts.pop(job_id, None)
+        self._update(job_id, finished_at=datetime.now(), **fields)
+        logger.info(f"Job {job_id} ({kind}) {fields['status']}")
+
+    def get(self, job_id: str, user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Estado del trabajo, o None si no existe (o, con `user_id`, no es suyo)."""
+        db: Session
+        for db in get_db():
+            query = db.query(Job).filter(Job.id == job_id)
+            if user_id is not None:
+                query = query.filter(Job.user_id == user_id)
+            job = query.first()
+            return self._to_dict(job) if job is not None else None
+
+    def cancel(self, job_id: str, user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Cancela un trabajo: si aún está en cola no llega a ejecutarse; si está en curso
+        se le avisa (cancelación cooperativa) y termina como `cancelled` cuando lo
+        detecta. Un trabajo terminado no cambia. Retorna su estado, o None si no existe.
+        """
+        job = self.get(job_id, user_id)
+        if job is None or job["status"] in TERMINAL_STATUSES:
+            return job
+        if self._update(job_id, only_if_status=JOB_QUEUED, status=JOB_CANCELLED, cancel_requested=True, finished_at=datetime.now()):
+            self.backend.remove(job_id) # Si está en otro proceso, su _run verá que ya no está en cola
+        else:
+            self._update(job_id, cancel_requested=True)
+            context = self._contexts.get(job_id)
+            if context is not None:
+                context._cancel.set()
+        return self.get(job_id, user_id)
+
+    def watch(self, job_id: str, user_id: Optional[int] = None, timeout_s: float = 300.0,
+              poll_interval_s: float = 1.0) -> Iterator[Dict[str, Any]]:
+        """
+        Emite el estado del trabajo al empezar y en cada cambio (estado o progreso)
+        hasta que termina o pasan `timeout_s`. Los cambios hechos en este proceso se
+        notifican al momento; los de otros workers se ven al consultar cada
+        `poll_interval_s`.
+        """
+        deadline = time.monotonic() + timeout_s
+        last = None
+        while True:
+            job = self.get(job_id, user_id)
+            if job is None:
+                return
+            if last is None or (job["status"], job["progress"]) != (last["status"], last["progress"]):
+                yield job
+                last = job
+            remaining = deadline - time.monotonic()
+            if job["status"] in TERMINAL_STATUSES or remaining <= 0:
+                return
+            with self._changed:
+                self._changed.wait(min(poll_interval_s, remaining))
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.backend.get_stats()
+        stats["kinds"] = sorted(self._handlers)
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        for context in list(self._contexts.values()):
+            context._cancel.set()
+        self.backend.shutdown(wait=wait)
+
+
+def _pid_alive(pid: str) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True # Existe, pero es de otro usuario
+    return True
+
+
+job_manager = JobManager()
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict
+
+from config.config import AUTH_LOGIN_WORKERS, AUTH_LOGIN_QUEUE_SIZE
+from core.utils import get_logger, is_gevent_patched, verify_and_update_password
+
+logger = get_logger(__name__)
+
+
+class LoginPoolSaturated(Exception):
+    """El pool de verificación tiene todos los hilos ocupados y la cola llena."""
+
+
+class LoginVerifierPool:
+    """
+    Pool acotado para la verificación de contraseñas (trabajo de CPU con coste
+    configurable). Como mucho `workers` verificaciones corren a la vez y
+    `queue_size` esperan; por encima de eso `submit()` falla de inmediato con
+    `LoginPoolSaturated` en lugar de acumular hilos de Flask bloqueados.
+    """
+
+    def __init__(self, workers: int = AUTH_LOGIN_WORKERS, queue_size: int = AUTH_LOGIN_QUEUE_SIZE):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self._executor = self._create_executor()
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.rejected = 0
+        self._durations_ms: Deque[float] = deque(maxlen=256) # Solo las últimas verificaciones
+
+    def _create_executor(self):
+        if is_gevent_patched():
+            # Con gevent los hilos parcheados son greenlets: bcrypt bloquearía el bucle del
+            # worker. El threadpool de gevent usa hilos reales del sistema.
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="login-verify")
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        """Encola una verificación. Lanza LoginPoolSaturated si no hay hueco."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise LoginPoolSaturated()
+        with self._lock:
+            self.in_flight += 1
+            self.submitted += 1
+        try:
+            future = self._executor.submit(self._run, fn, *args)
+        except Exception:
+            self._release()
+            raise
+        # La contabilidad se hace en el callback: con gevent corre en el hub y no en el hilo nativo
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def verify(self, plain_password: str, hashed_password: str) -> Future:
+        """Verifica en el pool; el Future resuelve a (válida, hash nuevo o None)."""
+        return self.submit(verify_and_update_password, plain_password, hashed_password)
+
+    def _run(self, fn: Callable[..., Any], *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._durations_ms.append((time.perf_counter() - started) * 1000)
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            durations = sorted(self._durations_ms)
+            stats = {"workers": self.workers, "queue_size": self.queue_size, "in_flight": self.in_flight,
+                     "submitted": self.submitted, "rejected": self.rejected}
+        stats["verify_p50_ms"] = round(durations[len(durations) // 2], 2) if durations else None
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+login_pool = LoginVerifierPool()
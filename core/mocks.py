@@ -1,4 +1,11 @@
+import asyncio
+import json
 import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
 from core.utils import get_logger
 
 logger = get_logger(__name__)
@@ -51,12 +58,44 @@ class AudioRelayClientMock:
         self.is_connected = False
         logger.info("[AudioRelayClientMock] Disconnected.")
 
-    def send_audio(self, audio_data: bytes):
+    def send_audio(self, audio_data):
+        # Acepta cualquier objeto con protocolo buffer (bytes, memoryview, array NumPy) sin copiarlo.
         if self.is_connected:
-            logger.info(f"[AudioRelayClientMock] Sending {len(audio_data)} bytes of audio data.")
+            logger.info(f"[AudioRelayClientMock] Sending {memoryview(audio_data).nbytes} bytes of audio data.")
         else:
             logger.warning("[AudioRelayClientMock] Not connected to AudioRelay. Audio data not sent.")
 
+class AudioLoopbackMock:
+    """Mock de dispositivo de audio en loopback: lo que se escribe se puede volver a leer por bloques."""
+    def __init__(self, block_size: int = 256, sample_rate: int = 48000):
+        self.block_size = block_size
+        self.sample_rate = sample_rate
+        self.is_open = False
+        self._blocks = deque()
+        logger.info(f"[AudioLoopbackMock] Initialized ({sample_rate} Hz, {block_size} samples/block)")
+
+    def open(self):
+        self.is_open = True
+        logger.info("[AudioLoopbackMock] Loopback stream opened.")
+
+    def close(self):
+        self.is_open = False
+        self._blocks.clear()
+        logger.info("[AudioLoopbackMock] Loopback stream closed.")
+
+    def write(self, block):
+        if self.is_open:
+            self._blocks.append(block)
+        else:
+            logger.warning("[AudioLoopbackMock] Stream not open. Block dropped.")
+
+    def read(self):
+        return self._blocks.popleft() if self._blocks else None
+
+    def __iter__(self):
+        while self._blocks:
+            yield self._blocks.popleft()
+
 class TesseractOCRMock:
     """Mock para simular el reconocimiento OCR con Tesseract."""
     def __init__(self):
@@ -153,3 +192,108 @@ class TorProxyMock:
         self.is_active = False
         logger.info("[TorProxyMock] Tor proxy inactive.")
 
+class ChatServerMock:
+    """
+    Servidor de chat local para pruebas: emite mensajes NDJSON ({"id", "user", "text"})
+    por TCP a cada cliente conectado y registra las acciones de moderación que recibe
+    de vuelta (una por línea). Corre en su propio hilo con su propio bucle asyncio.
+
+    `rate` mensajes/s (0 = solo los que se envían con `send()`), generados por
+    `generator(n)` hasta `total` mensajes por cliente (None = sin límite).
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, rate: float = 0,
+                 generator: Optional[Callable[[int], str]] = None, total: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.generator = generator or (lambda n: f"mensaje de prueba {n}")
+        self.total = total
+        self.actions: List[dict] = []
+        self.messages_sent = 0
+        self._writers = set()
+        self._loop = None
+        self._server = None
+        self._ready = threading.Event()
+        self._thread = None
+        logger.info(f"[ChatServerMock] Initialized (rate={rate} msg/s)")
+
+    def start(self) -> "ChatServerMock":
+        self._thread = threading.Thread(target=self._run, name="chat-server-mock", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        logger.info(f"[ChatServerMock] Listening on {self.host}:{self.port}")
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"tcp://{self.host}:{self.port}"
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self._serve())
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _serve(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+
+    async def _handle_client(self, reader, writer):
+        self._writers.add(writer)
+        producer = asyncio.ensure_future(self._produce(writer)) if self.rate > 0 else None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.actions.append(json.loads(line))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if producer is not None:
+                producer.cancel()
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _produce(self, writer):
+        # Ráfagas cada 10 ms para mantener `rate` mensajes/s de media
+        n, started = 0, time.perf_counter()
+        while self.total is None or n < self.total:
+            due = int((time.perf_counter() - started) * self.rate) + 1
+            if self.total is not None:
+                due = min(due, self.total)
+            lines = []
+            while n < due:
+                lines.append(json.dumps({"id": str(n), "user": f"user{n % 97}", "text": self.generator(n)}) + "\n")
+                n += 1
+            if lines:
+                writer.write("".join(lines).encode("utf-8"))
+                self.messages_sent += len(lines)
+                await writer.drain()
+            await asyncio.sleep(0.01)
+
+    def send(self, text: str, user: str = "viewer", message_id: Optional[str] = None):
+        """Envía un mensaje concreto a todos los clientes conectados."""
+        line = json.dumps({"id": message_id or f"manual-{self.messages_sent}", "user": user, "text": text}) + "\n"
+        def write():
+            for writer in list(self._writers):
+                writer.write(line.encode("utf-8"))
+            self.messages_sent += 1
+        self._loop.call_soon_threadsafe(write)
+
+    @property
+    def client_count(self) -> int:
+        return len(self._writers)
+
+    def stop(self):
+        if self._loop is None:
+            return
+        def shutdown():
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            self._loop.stop()
+        self._loop.call_soon_threadsafe(shutdown)
+        self._thread.join(5)
+        logger.info("[ChatServerMock] Stopped.")
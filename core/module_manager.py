@@ -1,26 +1,79 @@
 import logging
-from typing import Dict, Any, Optional
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Iterable, List, Tuple
 
-from config.config import MODULES_ENABLED
+from config.config import MODULES_ENABLED, MODULES_WARMUP, MODULES_INIT_WORKERS, MODULES_INIT_TIMEOUT_S, PLUGINS_DIR
 from core.utils import get_logger
 from core.database import get_db, ModuleSetting
+from core.settings_store import settings_store
+from core.status_service import status_service, StatusSnapshot
 from sqlalchemy.orm import Session
 import json
 
-# Importar todas las clases de módulos
-from plugins.mod_voice.main import VoiceModule
-from plugins.mod_streaming.main import StreamingModule
-from plugins.mod_ally.main import AllyModule
-from plugins.mod_therapy.main import TherapyModule
-from plugins.mod_vtuber.main import VTuberModule
-from plugins.mod_activism.main import ActivismModule
-from plugins.mod_educator.main import EducatorModule
-from plugins.mod_mobile.main import MobileModule
-from plugins.mod_devtools.main import DevtoolsModule
-from plugins.mod_accessibility.main import AccessibilityModule
+# Registro de puntos de entrada de los módulos ("paquete.modulo:Clase").
+# Los plugins solo se importan cuando se usan por primera vez.
+MODULE_ENTRY_POINTS = {
+    "mod-voice": "plugins.mod_voice.main:VoiceModule",
+    "mod-streaming": "plugins.mod_streaming.main:StreamingModule",
+    "mod-ally": "plugins.mod_ally.main:AllyModule",
+    "mod-therapy": "plugins.mod_therapy.main:TherapyModule",
+    "mod-vtuber": "plugins.mod_vtuber.main:VTuberModule",
+    "mod-activism": "plugins.mod_activism.main:ActivismModule",
+    "mod-educator": "plugins.mod_educator.main:EducatorModule",
+    "mod-mobile": "plugins.mod_mobile.main:MobileModule",
+    "mod-devtools": "plugins.mod_devtools.main:DevtoolsModule",
+    "mod-accessibility": "plugins.mod_accessibility.main:AccessibilityModule",
+}
+
+# Dependencias declaradas entre módulos: un módulo se inicializa después de sus dependencias.
+# mod-vtuber y mod-mobile consumen el audio que captura y publica mod-voice.
+MODULE_DEPENDENCIES = {
+    "mod-vtuber": ["mod-voice"],
+    "mod-mobile": ["mod-voice"],
+}
+
+_plugin_import_lock = threading.RLock()
 
 logger = get_logger(__name__)
 
+def _ensure_plugin_package(module_path: str):
+    """
+    Registra el paquete de un plugin bajo un nombre importable.
+    Los directorios de plugins usan guiones (plugins/mod-voice), así que
+    `plugins.mod_voice` se resuelve aquí a partir de PLUGINS_DIR.
+    """
+    parts = module_path.split(".")
+    if len(parts) < 2 or parts[0] != "plugins":
+        return
+    package_name = ".".join(parts[:2])
+    with _plugin_import_lock:
+        if package_name in sys.modules:
+            return
+        plugin_dir = os.path.join(PLUGINS_DIR, parts[1].replace("_", "-"))
+        init_file = os.path.join(plugin_dir, "__init__.py")
+        if not os.path.exists(init_file):
+            return # Dejar que importlib falle con el error habitual
+        spec = importlib.util.spec_from_file_location(package_name, init_file, submodule_search_locations=[plugin_dir])
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[package_name] = package
+        try:
+            spec.loader.exec_module(package)
+        except Exception:
+            sys.modules.pop(package_name, None)
+            raise
+
+def load_entry_point(entry_point: str):
+    """Importa y retorna la clase referenciada por un punto de entrada "paquete.modulo:Clase"."""
+    module_path, class_name = entry_point.split(":")
+    _ensure_plugin_package(module_path)
+    return getattr(importlib.import_module(module_path), class_name)
+
 class ModuleManager:
     _instance = None
     _modules: Dict[str, Any] = {}
@@ -29,92 +82,252 @@ class ModuleManager:
         if cls._instance is None:
             cls._instance = super(ModuleManager, cls).__new__(cls)
             cls._instance._initialized = False
+            cls._instance._locks_guard = threading.Lock()
+            cls._instance._module_locks = {}
+            cls._instance._startup_t0 = time.perf_counter()
+            cls._instance.startup_timeline = {}
+            cls._instance._settings_snapshot = None
         return cls._instance
 
-    def initialize_modules(self):
+    def initialize_modules(self, eager: bool = False, warmup: Optional[Iterable[str]] = None):
+        """
+        Prepara el Module Manager. Por defecto los módulos se cargan de forma perezosa
+        en el primer `get_module()`; `warmup` (o MODULES_WARMUP) lista los que se cargan
+        ya, y `eager=True` carga todos los habilitados como antes. La carga al arrancar
+        se hace en paralelo respetando MODULE_DEPENDENCIES.
+        """
         if self._initialized:
             logger.info("Module Manager already initialized.")
             return
 
-        logger.info("Initializing Module Manager and enabled modules...")
-        module_classes = {
-            "mod-voice": VoiceModule,
-            "mod-streaming": StreamingModule,
-            "mod-ally": AllyModule,
-            "mod-therapy": TherapyModule,
-            "mod-vtuber": VTuberModule,
-            "mod-activism": ActivismModule,
-            "mod-educator": EducatorModule,
-            "mod-mobile": MobileModule,
-            "mod-devtools": DevtoolsModule,
-            "mod-accessibility": AccessibilityModule,
-        }
-
-        for module_name, module_class in module_classes.items():
-            if MODULES_ENABLED.get(module_name, False):
-                try:
-                    instance = module_class()
-                    self._modules[module_name] = instance
-                    logger.info(f"Module '{module_name}' instance created.")
-                    
-                    # Cargar configuración persistente del módulo
-                    db: Session
-                    for db in get_db():
-                        settings_record = db.query(ModuleSetting).filter_by(module_name=module_name).first()
-                        if settings_record:
-                            settings = json.loads(settings_record.settings_json)
-                            instance.load_settings(settings) # Asume que cada módulo tiene un método load_settings
-                            logger.info(f"Loaded persistent settings for module '{module_name}'.")
-                        break
-
-                    instance.initialize() # Llamar al método initialize de cada módulo
-                    logger.info(f"Module '{module_name}' initialized successfully.")
-                except Exception as e:
-                    logger.error(f"Failed to initialize module '{module_name}': {e}")
-                    # Considerar deshabilitar el módulo si falla la inicialización crítica
-                    MODULES_ENABLED[module_name] = False
+        logger.info("Initializing Module Manager...")
+        self._initialized = True
+        self._startup_t0 = time.perf_counter()
+        if eager:
+            to_load = list(MODULE_ENTRY_POINTS)
+        else:
+            to_load = list(warmup) if warmup is not None else MODULES_WARMUP
+
+        enabled = []
+        for module_name in to_load:
+            if module_name not in MODULE_ENTRY_POINTS:
+                logger.warning(f"Unknown module in warm-up list: {module_name}")
+            elif MODULES_ENABLED.get(module_name, False):
+                enabled.append(module_name)
             else:
                 logger.info(f"Module '{module_name}' is disabled by configuration.")
-        
-        self._initialized = True
-        logger.info("All enabled modules initialized.")
+
+        if enabled:
+            # Una sola consulta para la configuración de todos los módulos
+            self.load_settings_snapshot()
+            self._load_modules_parallel(enabled)
+            logger.info("Module startup timeline:\n" + self.format_startup_timeline())
+        logger.info(f"Module Manager initialized ({len(self._modules)} modules loaded, eager={eager}).")
+
+    def _with_dependencies(self, module_names: Iterable[str]) -> List[str]:
+        """Añade las dependencias habilitadas (transitivas) de los módulos pedidos."""
+        result: List[str] = []
+        def visit(name: str, path: tuple):
+            if name in path:
+                raise ValueError(f"Circular module dependency: {' -> '.join(path + (name,))}")
+            if name in result or not MODULES_ENABLED.get(name, False):
+                return
+            for dep in MODULE_DEPENDENCIES.get(name, []):
+                visit(dep, path + (name,))
+            result.append(name)
+        for name in module_names:
+            visit(name, ())
+        return result
+
+    def _load_modules_parallel(self, module_names: Iterable[str], max_workers: int = MODULES_INIT_WORKERS,
+                               timeout_s: float = MODULES_INIT_TIMEOUT_S):
+        """
+        Inicializa módulos en un pool de hilos. Cada módulo se lanza cuando sus dependencias
+        terminan; si uno supera `timeout_s` se deja terminando en segundo plano y sus
+        dependientes quedan para carga perezosa, sin retrasar el arranque.
+        """
+        pending = [name for name in self._with_dependencies(module_names) if name not in self._modules]
+        finished, unavailable = set(self._modules), set()
+        running: Dict[Any, tuple] = {}
+        pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="module-init")
+        try:
+            while pending or running:
+                for name in list(pending):
+                    deps = [dep for dep in MODULE_DEPENDENCIES.get(name, []) if MODULES_ENABLED.get(dep, False)]
+                    if any(dep in unavailable for dep in deps):
+                        pending.remove(name)
+                        unavailable.add(name)
+                        self._record_timeline(name, status="skipped")
+                        logger.warning(f"Module '{name}' deferred: a dependency is unavailable.")
+                    elif all(dep in finished for dep in deps):
+                        pending.remove(name)
+                        running[pool.submit(self._load_module, name)] = (name, time.perf_counter() + timeout_s)
+                if not running:
+                    if pending:
+                        logger.error(f"Unresolvable module dependencies: {pending}")
+                    break
+
+                next_deadline = min(deadline for _, deadline in running.values())
+                done, _ = wait(list(running), timeout=max(0.0, next_deadline - time.perf_counter()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, _ = running.pop(future)
+                    (finished if future.result() is not None else unavailable).add(name)
+                now = time.perf_counter()
+                for future, (name, deadline) in list(running.items()):
+                    if now >= deadline:
+                        running.pop(future)
+                        unavailable.add(name)
+                        self._record_timeline(name, status="timeout")
+                        logger.error(f"Module '{name}' did not initialize within {timeout_s}s; continuing in background.")
+        finally:
+            pool.shutdown(wait=False)
+
+    def _module_lock(self, module_name: str) -> threading.RLock:
+        with self._locks_guard:
+            return self._module_locks.setdefault(module_name, threading.RLock())
+
+    def _record_timeline(self, module_name: str, **fields):
+        entry = self.startup_timeline.setdefault(module_name, {})
+        entry.update(fields)
+
+    def _load_module(self, module_name: str) -> Optional[Any]:
+        """Importa, construye e inicializa un módulo (una sola vez)."""
+        for dep in MODULE_DEPENDENCIES.get(module_name, []):
+            if dep not in self._modules and MODULES_ENABLED.get(dep, False):
+                self._load_module(dep)
+
+        with self._module_lock(module_name):
+            if module_name in self._modules:
+                return self._modules[module_name]
+            started = time.perf_counter()
+            self._record_timeline(module_name, start_s=round(started - self._startup_t0, 4),
+                                  thread=threading.current_thread().name, status="loading")
+            try:
+                module_class = load_entry_point(MODULE_ENTRY_POINTS[module_name])
+                instance = module_class()
+                logger.info(f"Module '{module_name}' instance created.")
+
+                # Cargar configuración persistente del módulo
+                settings = self._get_persisted_settings(module_name)
+                if settings is not None:
+                    instance.load_settings(settings) # Asume que cada módulo tiene un método load_settings
+                    logger.info(f"Loaded persistent settings for module '{module_name}'.")
+
+                instance.initialize() # Llamar al método initialize de cada módulo
+                self._modules[module_name] = instance
+                status_service.register(module_name, instance.get_status)
+                late = self.startup_timeline[module_name].get("status") == "timeout"
+                self._record_timeline(module_name, duration_s=round(time.perf_counter() - started, 4),
+                                      status="late" if late else "ok")
+                logger.info(f"Module '{module_name}' initialized successfully.")
+                return instance
+            except Exception as e:
+                self._record_timeline(module_name, duration_s=round(time.perf_counter() - started, 4),
+                                      status="failed", error=str(e))
+                logger.error(f"Failed to initialize module '{module_name}': {e}")
+                # Considerar deshabilitar el módulo si falla la inicialización crítica
+                MODULES_ENABLED[module_name] = False
+                return None
+
+    def load_settings_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Carga en memoria la configuración de todos los módulos con una única consulta."""
+        snapshot: Dict[str, Dict[str, Any]] = {}
+        db: Session
+        for db in get_db():
+            rows = db.query(ModuleSetting.module_name, ModuleSetting.settings_json).all()
+            for module_name, settings_json in rows:
+                try:
+                    snapshot[module_name] = json.loads(settings_json)
+                except json.JSONDecodeError as e:
+                    logger.error(f"Invalid settings JSON for module '{module_name}': {e}")
+            break
+        self._settings_snapshot = snapshot
+        logger.info(f"Loaded settings snapshot for {len(snapshot)} modules.")
+        return snapshot
+
+    def invalidate_settings_snapshot(self):
+        """Descarta la instantánea; las siguientes cargas vuelven a consultar la DB."""
+        self._settings_snapshot = None
+
+    def _get_persisted_settings(self, module_name: str) -> Optional[Dict[str, Any]]:
+        """Configuración persistida de un módulo, desde la instantánea si existe."""
+        snapshot = self._settings_snapshot
+        if snapshot is not None:
+            settings = snapshot.get(module_name)
+            return dict(settings) if settings is not None else None
+        pending = settings_store.get_pending(module_name)
+        if pending is not None:
+            return pending
+        db: Session
+        for db in get_db():
+            settings_record = db.query(ModuleSetting).filter_by(module_name=module_name).first()
+            return json.loads(settings_record.settings_json) if settings_record else None
+        return None
+
+    def get_startup_report(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna la línea de tiempo de inicialización, ordenada por inicio."""
+        return dict(sorted(self.startup_timeline.items(), key=lambda item: item[1].get("start_s", float("inf"))))
+
+    def format_startup_timeline(self) -> str:
+        """Línea de tiempo legible: inicio, duración y estado de cada módulo."""
+        lines = []
+        for name, entry in self.get_startup_report().items():
+            start = entry.get("start_s")
+            duration = entry.get("duration_s")
+            lines.append("  {:<18} start={:>8} duration={:>8} {:<8} {}".format(
+                name,
+                f"{start:.3f}s" if start is not None else "-",
+                f"{duration:.3f}s" if duration is not None else "-",
+                entry.get("status", ""),
+                entry.get("thread", ""),
+            ))
+        return "\n".join(lines)
 
     def get_module(self, module_name: str) -> Optional[Any]:
-        """Retorna una instancia de un módulo si está habilitado e inicializado."""
+        """Retorna una instancia de un módulo si está habilitado, cargándolo en el primer acceso."""
         if not self._initialized:
             self.initialize_modules()
         
-        if MODULES_ENABLED.get(module_name, False):
-            return self._modules.get(module_name)
+        if MODULES_ENABLED.get(module_name, False) and module_name in MODULE_ENTRY_POINTS:
+            return self._modules.get(module_name) or self._load_module(module_name)
         else:
             logger.warning(f"Attempted to access disabled or uninitialized module: {module_name}")
             return None
 
+    def is_loaded(self, module_name: str) -> bool:
+        return module_name in self._modules
+
     def save_module_settings(self, module_name: str, settings: Dict[str, Any]):
-        """Guarda la configuración de un módulo de forma persistente en la DB."""
-        db: Session
-        for db in get_db():
-            settings_record = db.query(ModuleSetting).filter_by(module_name=module_name).first()
-            if settings_record:
-                settings_record.settings_json = json.dumps(settings)
-                logger.info(f"Updated settings for module '{module_name}'.")
-            else:
-                new_settings = ModuleSetting(module_name=module_name, settings_json=json.dumps(settings))
-                db.add(new_settings)
-                logger.info(f"Created new settings for module '{module_name}'.")
-            db.commit()
-            break
+        """
+        Guarda la configuración de un módulo de forma persistente en la DB.
+        Con MODULES_SETTINGS_DURABILITY="async" la escritura se agrupa y se confirma
+        en segundo plano; `flush_settings()` fuerza la persistencia.
+        """
+        settings_store.put(module_name, settings)
+        # Mantener la instantánea coherente con lo guardado (copia, no el dict vivo del módulo)
+        if self._settings_snapshot is not None:
+            self._settings_snapshot[module_name] = json.loads(json.dumps(settings))
+
+    def flush_settings(self) -> int:
+        """Persiste inmediatamente las configuraciones pendientes de escritura."""
+        return settings_store.flush()
+
+    def _status_module_names(self) -> Tuple[List[str], List[str]]:
+        # Módulos cargados más los habilitados que aún no se han cargado (estos sin llamar a get_status)
+        names = [name for name in MODULE_ENTRY_POINTS if name in self._modules or MODULES_ENABLED.get(name, False)]
+        return names, [name for name in names if name not in self._modules]
 
     def get_all_module_statuses(self) -> Dict[str, Any]:
-        """Retorna el estado de todos los módulos inicializados."""
-        statuses = {}
-        for module_name, instance in self._modules.items():
-            try:
-                statuses[module_name] = instance.get_status()
-            except Exception as e:
-                logger.error(f"Error getting status for module '{module_name}': {e}")
-                statuses[module_name] = {"error": str(e), "is_active": False}
-        return statuses
+        """
+        Retorna el estado de todos los módulos habilitados (sin forzar la carga de los perezosos).
+        Se sirve desde `status_service`: solo se llama a `get_status()` de un módulo cuando
+        está marcado como sucio o su estado cacheado es más antiguo que STATUS_SNAPSHOT_MAX_AGE_S.
+        """
+        return status_service.get_statuses(*self._status_module_names())
+
+    def get_status_snapshot(self) -> StatusSnapshot:
+        """Estado de todos los módulos pre-serializado en JSON, con su ETag."""
+        return status_service.get_snapshot(*self._status_module_names())
 
 # Instancia global del ModuleManager
 module_manager = ModuleManager()
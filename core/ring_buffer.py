@@ -0,0 +1,155 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.config import AUDIO_BUS_CAPACITY_BLOCKS, VOICE_BLOCK_SIZE
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Políticas para consumidores lentos. Ninguna bloquea al productor.
+POLICY_DROP_OLDEST = "drop_oldest" # Saltar al bloque más antiguo que sigue disponible
+POLICY_LATEST = "latest" # Descartar todo lo pendiente y seguir desde el bloque más reciente
+READER_POLICIES = (POLICY_DROP_OLDEST, POLICY_LATEST)
+
+
+class AudioRingBuffer:
+    """
+    Buffer circular de un productor y múltiples consumidores sobre un array NumPy.
+
+    El productor copia cada bloque capturado una sola vez en un slot preasignado y
+    publica el número de secuencia; cada consumidor tiene su propio cursor y recibe
+    vistas de solo lectura del slot, sin copias por consumidor. El productor nunca
+    espera: si un consumidor se queda atrás más de `capacity - 1` bloques, pierde
+    bloques según su política y se contabiliza un overrun.
+
+    Una vista es válida hasta que el productor escribe `capacity - 1` bloques más;
+    los consumidores que necesiten retener datos más tiempo deben copiarlos.
+    """
+
+    def __init__(self, block_size: int = VOICE_BLOCK_SIZE, capacity: int = AUDIO_BUS_CAPACITY_BLOCKS, dtype=np.float32):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2 blocks")
+        self.block_size = block_size
+        self.capacity = capacity
+        self._slots = np.zeros((capacity, block_size), dtype=dtype)
+        self._write_seq = 0
+        self._readers: Dict[str, "RingReader"] = {}
+        self._readers_lock = threading.Lock() # Solo para registrar/eliminar consumidores
+
+    @property
+    def write_seq(self) -> int:
+        return self._write_seq
+
+    def write(self, block) -> int:
+        """Publica un bloque (array float o PCM int16 en bytes). Retorna su número de secuencia."""
+        seq = self._write_seq
+        slot = self._slots[seq % self.capacity]
+        if isinstance(block, (bytes, bytearray, memoryview)):
+            np.divide(np.frombuffer(block, dtype=np.int16), 32768.0, out=slot, casting="unsafe")
+        else:
+            np.copyto(slot, block, casting="same_kind")
+        # Publicar después de escribir: los lectores nunca ven un slot a medio escribir.
+        self._write_seq = seq + 1
+        return seq
+
+    def reader(self, name: str, policy: str = POLICY_DROP_OLDEST, from_latest: bool = True) -> "RingReader":
+        """Registra (o retorna) un consumidor con su propio cursor."""
+        if policy not in READER_POLICIES:
+            raise ValueError(f"Unknown reader policy: {policy}")
+        with self._readers_lock:
+            existing = self._readers.get(name)
+            if existing is not None:
+                return existing
+            reader = RingReader(self, name, policy, self._write_seq if from_latest else 0)
+            self._readers[name] = reader
+            logger.info(f"[AudioRingBuffer] Reader '{name}' registered (policy={policy}).")
+            return reader
+
+    def remove_reader(self, name: str):
+        with self._readers_lock:
+            self._readers.pop(name, None)
+
+    def _view(self, seq: int) -> np.ndarray:
+        view = self._slots[seq % self.capacity]
+        view = view.view()
+        view.flags.writeable = False
+        return view
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna los contadores del productor y de cada consumidor."""
+        return {
+            "block_size": self.block_size,
+            "capacity": self.capacity,
+            "blocks_written": self._write_seq,
+            "readers": {name: reader.get_stats() for name, reader in list(self._readers.items())},
+        }
+
+
+class RingReader:
+    """Cursor de un consumidor sobre un `AudioRingBuffer`."""
+
+    def __init__(self, ring: AudioRingBuffer, name: str, policy: str, start_seq: int):
+        self.ring = ring
+        self.name = name
+        self.policy = policy
+        self._read_seq = start_seq
+        self.blocks_read = 0
+        self.overruns = 0
+        self.dropped_blocks = 0
+
+    @property
+    def pending(self) -> int:
+        return self.ring.write_seq - self._read_seq
+
+    def _catch_up(self, write_seq: int):
+        # El slot de `write_seq - capacity` puede estar reescribiéndose: ventana legible de capacity - 1.
+        oldest = write_seq - (self.ring.capacity - 1)
+        if self._read_seq < oldest:
+            target = write_seq - 1 if self.policy == POLICY_LATEST else oldest
+            self.overruns += 1
+            self.dropped_blocks += target - self._read_seq
+            self._read_seq = target
+
+    def read(self) -> Optional[np.ndarray]:
+        """Retorna una vista de solo lectura del siguiente bloque, o None si no hay datos nuevos."""
+        write_seq = self.ring.write_seq
+        if self._read_seq >= write_seq:
+            return None
+        self._catch_up(write_seq)
+        view = self.ring._view(self._read_seq)
+        self._read_seq += 1
+        self.blocks_read += 1
+        return view
+
+    def read_available(self, max_blocks: Optional[int] = None) -> List[np.ndarray]:
+        """Retorna vistas de todos los bloques pendientes (hasta `max_blocks`)."""
+        write_seq = self.ring.write_seq
+        self._catch_up(write_seq)
+        end = write_seq if max_blocks is None else min(write_seq, self._read_seq + max_blocks)
+        views = [self.ring._view(seq) for seq in range(self._read_seq, end)]
+        self.blocks_read += len(views)
+        self._read_seq = max(self._read_seq, end)
+        return views
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "pending": self.pending,
+            "blocks_read": self.blocks_read,
+            "overruns": self.overruns,
+            "dropped_blocks": self.dropped_blocks,
+        }
+
+
+# Bus de captura compartido entre mod-voice, mod-vtuber y AudioRelay
+_audio_buses: Dict[str, AudioRingBuffer] = {}
+_audio_buses_lock = threading.Lock()
+
+def get_audio_bus(name: str = "capture") -> AudioRingBuffer:
+    """Retorna el buffer compartido con ese nombre, creándolo si no existe."""
+    with _audio_buses_lock:
+        if name not in _audio_buses:
+            _audio_buses[name] = AudioRingBuffer()
+        return _audio_buses[name]
@@ -0,0 +1,153 @@
+import atexit
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config.config import MODULES_SETTINGS_DURABILITY, MODULES_SETTINGS_FLUSH_INTERVAL_S
+from core.database import get_db, ModuleSetting
+from core.utils import get_logger
+from sqlalchemy.orm import Session
+
+logger = get_logger(__name__)
+
+DURABILITY_SYNC = "sync" # Cada escritura se confirma en la DB antes de retornar
+DURABILITY_ASYNC = "async" # Las escrituras se agrupan y se confirman en segundo plano
+DURABILITY_MODES = (DURABILITY_SYNC, DURABILITY_ASYNC)
+
+
+class SettingsStore:
+    """
+    Persistencia write-behind de la configuración de los módulos.
+
+    `put()` serializa la configuración en el hilo del llamador (para capturar su
+    estado en ese instante) y la deja pendiente; escrituras repetidas del mismo
+    módulo dentro de la ventana de flush se fusionan en una sola. `flush()` hace
+    el upsert de todo lo pendiente en una única transacción. En modo "sync" cada
+    `put()` hace flush antes de retornar.
+    """
+
+    def __init__(self, durability: str = MODULES_SETTINGS_DURABILITY,
+                 flush_interval_s: float = MODULES_SETTINGS_FLUSH_INTERVAL_S):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown settings durability mode: {durability}")
+        self.durability = durability
+        self.flush_interval_s = flush_interval_s
+        self._pending: Dict[str, str] = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock() # Serializa las transacciones de flush
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._worker: Optional[threading.Thread] = None
+        self.writes_requested = 0
+        self.writes_coalesced = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+
+    def put(self, module_name: str, settings: Dict[str, Any]):
+        """Registra la configuración de un módulo para persistirla."""
+        settings_json = json.dumps(settings)
+        with self._cond:
+            self.writes_requested += 1
+            if module_name in self._pending:
+                self.writes_coalesced += 1
+            self._pending[module_name] = settings_json
+            if self.durability == DURABILITY_ASYNC and not self._closed:
+                self._ensure_worker()
+                self._cond.notify()
+        if self.durability == DURABILITY_SYNC or self._closed:
+            self.flush()
+
+    def get_pending(self, module_name: str) -> Optional[Dict[str, Any]]:
+        """Configuración aún no persistida de un módulo, si la hay."""
+        with self._cond:
+            settings_json = self._pending.get(module_name)
+        return json.loads(settings_json) if settings_json is not None else None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Persiste todas las escrituras pendientes en una transacción. Retorna las filas escritas."""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                db: Session
+                for db in get_db():
+                    existing = {
+                        record.module_name: record
+                        for record in db.query(ModuleSetting).filter(ModuleSetting.module_name.in_(list(batch)))
+                    }
+                    for module_name, settings_json in batch.items():
+                        if module_name in existing:
+                            existing[module_name].settings_json = settings_json
+                        else:
+                            db.add(ModuleSetting(module_name=module_name, settings_json=settings_json))
+                    db.commit()
+                    break
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(f"Failed to flush settings for {sorted(batch)}: {e}")
+                # Reencolar lo que no haya sido reemplazado por una escritura más reciente
+                with self._cond:
+                    for module_name, settings_json in batch.items():
+                        self._pending.setdefault(module_name, settings_json)
+                raise
+            self.flushes += 1
+            self.rows_written += len(batch)
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+            logger.debug(f"Flushed settings for {len(batch)} modules in {self.last_flush_ms} ms.")
+            return len(batch)
+
+    def close(self):
+        """Detiene el hilo de flush y persiste lo pendiente (llamar al apagar)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._wakeup.set()
+        if self._worker is not None and self._worker is not threading.current_thread():
+            self._worker.join(timeout=max(1.0, 2 * self.flush_interval_s))
+        self.flush()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="settings-flush", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            # Ventana de agrupación: las escrituras que lleguen mientras tanto van en el mismo flush
+            self._wakeup.wait(self.flush_interval_s)
+            try:
+                self.flush()
+            except Exception:
+                pass # Ya registrado; se reintenta en la siguiente ventana
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "durability": self.durability,
+            "flush_interval_s": self.flush_interval_s,
+            "pending": self.pending_count,
+            "writes_requested": self.writes_requested,
+            "writes_coalesced": self.writes_coalesced,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+settings_store = SettingsStore()
+atexit.register(settings_store.close)
@@ -0,0 +1,164 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from config.config import STATUS_SNAPSHOT_MAX_AGE_S
+from core.event_bus import event_bus
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Estado de un módulo habilitado que aún no se ha cargado (carga perezosa)
+UNLOADED_STATUS = {"is_active": False, "loaded": False}
+_MISSING = object()
+
+
+class StatusSnapshot(NamedTuple):
+    version: int
+    etag: str
+    statuses_json: str # JSON ya serializado de {módulo: estado}
+
+
+class StatusSnapshotService:
+    """
+    Estado agregado de los módulos, cacheado y pre-serializado.
+
+    Los módulos publican deltas con `publish()` cuando cambia su estado (las claves
+    que cambian se reenvían a `event_bus` para los clientes WebSocket); el
+    `get_status()` registrado como proveedor solo se consulta cuando una entrada
+    se marca como sucia o supera `max_age_s` (para contadores en vivo). El JSON
+    y el ETag se recalculan únicamente cuando cambia la versión o el conjunto
+    de módulos visibles.
+    """
+
+    def __init__(self, max_age_s: float = STATUS_SNAPSHOT_MAX_AGE_S, clock: Callable[[], float] = time.monotonic):
+        self.max_age_s = max_age_s
+        self.clock = clock
+        self._statuses: Dict[str, Dict[str, Any]] = {}
+        self._refreshed_at: Dict[str, float] = {}
+        self._providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._dirty = set()
+        self._publishes: Dict[str, int] = {} # Publicaciones por módulo, para detectar deltas durante una consulta
+        self._version = 0
+        self._snapshot: Optional[Tuple[Any, StatusSnapshot]] = None
+        self._lock = threading.RLock()
+        self.provider_calls = 0
+        self.serializations = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def register(self, module_name: str, provider: Callable[[], Dict[str, Any]]):
+        """Registra el `get_status()` de un módulo cargado y toma su estado inicial."""
+        with self._lock:
+            self._providers[module_name] = provider
+            self._dirty.add(module_name)
+
+    def unregister(self, module_name: str):
+        with self._lock:
+            self._providers.pop(module_name, None)
+            self._dirty.discard(module_name)
+            if self._statuses.pop(module_name, None) is not None:
+                self._version += 1
+
+    def publish(self, module_name: str, delta: Dict[str, Any], replace: bool = False):
+        """Aplica un delta (o reemplaza) el estado publicado de un módulo."""
+        delta = copy.deepcopy(delta) # Los módulos publican sus listas/dicts vivos
+        with self._lock:
+            self._publishes[module_name] = self._publishes.get(module_name, 0) + 1
+            current = self._statuses.get(module_name, {})
+            updated = delta if replace else {**current, **delta}
+            self._refreshed_at.setdefault(module_name, self.clock())
+            if updated != current:
+                self._statuses[module_name] = updated
+                self._version += 1
+                changes = {key: value for key, value in updated.items() if current.get(key, _MISSING) != value}
+                if changes:
+                    event_bus.publish(module_name, changes)
+
+    def mark_dirty(self, module_name: str):
+        """Fuerza una consulta al proveedor del módulo en la próxima lectura."""
+        with self._lock:
+            self._dirty.add(module_name)
+
+    def _refresh(self, module_names: Iterable[str]):
+        """
+        Consulta los proveedores caducados o sucios. Los proveedores (que pueden ir a la
+        DB) se llaman fuera del lock para no bloquear los `publish()` de los módulos;
+        solo la selección y la aplicación de resultados lo toman.
+        """
+        now = self.clock()
+        due = []
+        with self._lock:
+            for name in module_names:
+                provider = self._providers.get(name)
+                if provider is None:
+                    continue
+                if name not in self._dirty and now - self._refreshed_at.get(name, float("-inf")) < self.max_age_s:
+                    continue
+                # Se reclama la consulta: otra lectura concurrente usa el estado actual
+                self._dirty.discard(name)
+                self._refreshed_at[name] = now
+                due.append((name, provider, self._publishes.get(name, 0)))
+            self.provider_calls += len(due)
+
+        results = []
+        for name, provider, publishes in due:
+            try:
+                status = provider()
+            except Exception as e:
+                logger.error(f"Error getting status for module '{name}': {e}")
+                status = {"error": str(e), "is_active": False}
+            results.append((name, status, publishes))
+
+        with self._lock:
+            for name, status, publishes in results:
+                if name not in self._providers:
+                    continue # Descargado mientras tanto
+                if self._publishes.get(name, 0) != publishes:
+                    # El módulo publicó un delta durante la consulta: no se pisa, se vuelve a consultar
+                    self._dirty.add(name)
+                    continue
+                self.publish(name, status, replace=True)
+
+    def _collect(self, module_names, unloaded) -> Dict[str, Dict[str, Any]]:
+        # Con el lock tomado
+        return {name: UNLOADED_STATUS if name in unloaded else self._statuses.get(name, UNLOADED_STATUS)
+                for name in module_names}
+
+    def get_statuses(self, module_names: Iterable[str], unloaded: Iterable[str] = ()) -> Dict[str, Dict[str, Any]]:
+        """Estado de los módulos pedidos; los de `unloaded` aparecen como no cargados."""
+        module_names, unloaded = list(module_names), set(unloaded)
+        self._refresh(name for name in module_names if name not in unloaded)
+        with self._lock:
+            return self._collect(module_names, unloaded)
+
+    def get_snapshot(self, module_names: Iterable[str], unloaded: Iterable[str] = ()) -> StatusSnapshot:
+        """Instantánea serializada; se reutiliza mientras no cambie nada."""
+        key = (tuple(module_names), frozenset(unloaded))
+        self._refresh(name for name in key[0] if name not in key[1])
+        with self._lock:
+            cached = self._snapshot
+            if cached is not None and cached[0] == key and cached[1].version == self._version:
+                return cached[1]
+            statuses_json = json.dumps(self._collect(*key), separators=(",", ":"), default=str)
+            etag = hashlib.sha1(statuses_json.encode("utf-8"), usedforsecurity=False).hexdigest()[:20]
+            snapshot = StatusSnapshot(version=self._version, etag=etag, statuses_json=statuses_json)
+            self._snapshot = (key, snapshot)
+            self.serializations += 1
+            return snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"version": self._version, "modules": len(self._statuses), "max_age_s": self.max_age_s,
+                "provider_calls": self.provider_calls, "serializations": self.serializations}
+
+
+status_service = StatusSnapshotService()
+
+def publish_status(module_name: str, **delta):
+    """Atajo para que los módulos publiquen cambios de estado: publish_status("mod-x", is_active=True)."""
+    status_service.publish(module_name, delta)
@@ -0,0 +1,137 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from config.config import AUTH_TOKEN_CACHE_SIZE, AUTH_TOKEN_CACHE_TTL_S
+from core.database import User
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class UserSnapshot(NamedTuple):
+    """Datos del usuario que necesitan los endpoints, sin sesión de DB asociada."""
+    id: int
+    username: str
+    role: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(id=user.id, username=user.username, role=user.role)
+
+
+def token_digest(token: str) -> str:
+    """Clave de caché de un token (no se guarda el token en claro)."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """
+    Caché LRU acotada de tokens ya verificados: claims decodificados y un
+    `UserSnapshot`, indexada por el digest del token. Cada entrada caduca en el
+    `exp` del token o tras `ttl_s`, lo que ocurra antes, y se invalida cuando el
+    usuario cambia de rol o se elimina.
+    """
+
+    def __init__(self, maxsize: int = AUTH_TOKEN_CACHE_SIZE, ttl_s: float = AUTH_TOKEN_CACHE_TTL_S,
+                 clock: Callable[[], float] = time.time):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], UserSnapshot]]" = OrderedDict()
+        self._by_username: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[Tuple[Dict[str, Any], UserSnapshot]]:
+        """Retorna (claims, usuario) si el token está en caché y no ha caducado."""
+        digest = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, claims, user = entry
+            if self.clock() >= expires_at:
+                self._remove(digest)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims, user
+
+    def put(self, token: str, claims: Dict[str, Any], user: UserSnapshot):
+        """Guarda un token verificado hasta su `exp` (acotado por `ttl_s`)."""
+        expires_at = self.clock() + self.ttl_s
+        if claims.get("exp") is not None:
+            expires_at = min(expires_at, float(claims["exp"]))
+        digest = token_digest(token)
+        with self._lock:
+            self._remove(digest)
+            self._entries[digest] = (expires_at, claims, user)
+            self._by_username.setdefault(user.username, set()).add(digest)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, username: str) -> int:
+        """Elimina todas las entradas de un usuario (cambio de rol, borrado)."""
+        with self._lock:
+            digests = list(self._by_username.get(username, ()))
+            for digest in digests:
+                self._remove(digest)
+            if digests:
+                self.invalidations += 1
+        return len(digests)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_username.clear()
+
+    def _remove(self, digest: str):
+        entry = self._entries.pop(digest, None)
+        if entry is not None:
+            digests = self._by_username.get(entry[2].username)
+            if digests is not None:
+                digests.discard(digest)
+                if not digests:
+                    del self._by_username[entry[2].username]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), "maxsize": self.maxsize, "ttl_s": self.ttl_s,
+                "hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
+
+
+token_cache = TokenCache()
+
+# Invalidación: cambios de rol/nombre y borrados hechos a través del ORM en este proceso.
+# Los cambios hechos por otros procesos quedan acotados por AUTH_TOKEN_CACHE_TTL_S.
+@event.listens_for(User, "after_update")
+def _invalidate_updated_user(mapper, connection, target):
+    state = inspect(target)
+    role_history = state.attrs.role.history
+    username_history = state.attrs.username.history
+    if role_history.has_changes() or username_history.has_changes():
+        for username in list(username_history.deleted or ()) + [target.username]:
+            token_cache.invalidate_user(username)
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    token_cache.invalidate_user(target.username)
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_user_change(orm_execute_state):
+    # `query(User).delete()` / `.update()` no disparan los eventos por instancia
+    if (orm_execute_state.is_delete or orm_execute_state.is_update) and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ is User:
+        token_cache.clear()
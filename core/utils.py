@@ -2,11 +2,14 @@ import logging
 import os
 import json
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from passlib.context import CryptContext
+from passlib.registry import get_crypt_handler
 import jwt
 
+from config.config import AUTH_PASSWORD_SCHEMES, AUTH_PASSWORD_ROUNDS
+
 # Configuración de logging (ya definida en config.py y cargada en main.py)
 def get_logger(name: str) -> logging.Logger:
     """Obtiene una instancia de logger configurada."""
@@ -42,17 +45,47 @@ def get_timestamp() -> str:
     """Retorna un timestamp formateado."""
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+def is_gevent_patched() -> bool:
+    """True si el proceso corre en un worker gevent (stdlib parcheada por gevent.monkey)."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("socket")
+
 # --- Utilidades de Seguridad ---
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def build_password_context(schemes=AUTH_PASSWORD_SCHEMES, rounds: Optional[int] = AUTH_PASSWORD_ROUNDS) -> CryptContext:
+    """
+    Contexto de passlib: el primer esquema se usa para hashes nuevos y el coste se fija
+    (mínimo = máximo), así que cualquier hash con otro esquema o coste necesita actualizarse.
+    `rounds` es el coste de ese esquema en sus propias unidades; None usa el valor por
+    defecto de passlib para el esquema. Lanza ValueError si está por debajo de su mínimo.
+    """
+    scheme = schemes[0]
+    handler = get_crypt_handler(scheme)
+    options = {}
+    if "rounds" in handler.setting_kwds:
+        if rounds is None:
+            rounds = handler.default_rounds
+        elif rounds < handler.min_rounds:
+            raise ValueError(f"{scheme} needs at least {handler.min_rounds} rounds, got {rounds}")
+        options = {f"{scheme}__rounds": rounds, f"{scheme}__min_rounds": rounds, f"{scheme}__max_rounds": rounds}
+    return CryptContext(schemes=list(schemes), deprecated="auto", **options)
+
+pwd_context = build_password_context()
 
 def hash_password(password: str) -> str:
-    """Hashea una contraseña usando bcrypt."""
+    """Hashea una contraseña con el esquema y coste configurados."""
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica una contraseña hasheada."""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verifica una contraseña y, si su hash usa otro esquema o coste, retorna el hash nuevo."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def create_access_token(data: dict, secret_key: str, expires_delta: Optional[timedelta] = None) -> str:
     """Crea un token de acceso JWT."""
     to_encode = data.copy()
@@ -2,11 +2,12 @@ import argparse
 import sys
 import os
 import logging
+import logging.config
 
 # Añadir el directorio raíz del proyecto al PATH para importaciones relativas
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-from config.config import LOGGING_CONFIG
+from config.config import LOGGING_CONFIG, MODULES_EAGER_INIT, API_SERVER, API_WORKERS
 from core.utils import get_logger
 from core.module_manager import module_manager
 
@@ -22,30 +23,49 @@ def run_gui():
     from gui.main import main as gui_main
     gui_main()
 
-def run_api():
+def run_api(server: str = API_SERVER, workers: int = API_WORKERS, eager: bool = MODULES_EAGER_INIT):
+    if server == "gunicorn":
+        # Producción: los workers cargan la app y los módulos tras el fork
+        from api.serve import serve
+        serve(workers=workers, eager=eager)
+        return
     from api.app import main as api_main
     api_main()
 
 def main():
     parser = argparse.ArgumentParser(description="VoxUnity AI+ Unified Launcher")
     parser.add_argument("component", choices=["cli", "gui", "api"], help="Component to run (cli, gui, api)")
+    parser.add_argument("--eager", action="store_true", default=MODULES_EAGER_INIT,
+                        help="Load and initialize all enabled modules at startup instead of on first use")
+    parser.add_argument("--server", choices=["werkzeug", "gunicorn"], default=API_SERVER,
+                        help="API server: Werkzeug development server or gunicorn with gevent workers")
+    parser.add_argument("--workers", type=int, default=API_WORKERS,
+                        help="Number of gunicorn workers (only with --server gunicorn)")
 
-    args = parser.parse_args()
-
-    # Inicializar módulos antes de lanzar el componente principal
-    module_manager.initialize_modules()
-
-    if args.component == "cli":
-        logger.info("Launching VoxUnity AI+ CLI...")
-        run_cli()
-    elif args.component == "gui":
-        logger.info("Launching VoxUnity AI+ GUI...")
-        run_gui()
-    elif args.component == "api":
-        logger.info("Launching VoxUnity AI+ API...")
-        run_api()
-    else:
-        parser.print_help()
+    # Los argumentos restantes (ej. `cli version`) se pasan al componente
+    args, component_args = parser.parse_known_args()
+    sys.argv = [sys.argv[0]] + component_args
+
+    # Preparar el Module Manager (los módulos se cargan en su primer uso salvo con --eager).
+    # Con gunicorn lo hace cada worker, no el proceso maestro.
+    if not (args.component == "api" and args.server == "gunicorn"):
+        module_manager.initialize_modules(eager=args.eager)
+
+    try:
+        if args.component == "cli":
+            logger.info("Launching VoxUnity AI+ CLI...")
+            run_cli()
+        elif args.component == "gui":
+            logger.info("Launching VoxUnity AI+ GUI...")
+            run_gui()
+        elif args.component == "api":
+            logger.info("Launching VoxUnity AI+ API...")
+            run_api(server=args.server, workers=args.workers, eager=args.eager)
+        else:
+            parser.print_help()
+    finally:
+        # Persistir la configuración de módulos pendiente antes de salir
+        module_manager.flush_settings()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
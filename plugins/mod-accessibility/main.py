@@ -7,6 +7,7 @@ from config.config import DEFAULT_LANG, ACCESSIBILITY_THEMES_DIR, ACCESSIBILITY_
 from core.localization import get_translator
 from core.utils import get_logger, save_json_file
 from core.module_manager import module_manager
+from core.status_service import publish_status
 
 logger = get_logger(__name__)
 
@@ -55,6 +56,7 @@ class AccessibilityModule:
         logger.info(self._("[mod-accessibility] Mejorando navegación por teclado (simulado)..."))
 
         self.is_active = True
+        publish_status(self.module_name, is_active=True)
         logger.info(self._("[mod-accessibility] Módulo de accesibilidad iniciado."))
 
     def stop(self):
@@ -64,6 +66,7 @@ class AccessibilityModule:
             return
         logger.info(self._("[mod-accessibility] Deteniendo módulo de accesibilidad."))
         self.is_active = False
+        publish_status(self.module_name, is_active=False)
         logger.info(self._("[mod-accessibility] Módulo de accesibilidad detenido."))
 
     def apply_theme(self, theme_name: str) -> bool:
@@ -82,6 +85,7 @@ class AccessibilityModule:
         #     return False
         self.current_theme = theme_name # Simulación
         self.save_settings()
+        publish_status(self.module_name, current_theme=self.current_theme)
         logger.info(self._("[mod-accessibility] Tema '%s' aplicado (simulado)."), theme_name)
         return True
 
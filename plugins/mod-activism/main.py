@@ -7,6 +7,7 @@ from config.config import DEFAULT_LANG, ACTIVISM_OCR_TEMP_DIR, ACTIVISM_TOR_PROX
 from core.localization import get_translator
 from core.utils import get_logger, save_json_file
 from core.module_manager import module_manager
+from core.status_service import publish_status
 from core.mocks import TesseractOCRMock, MatrixClientMock, TorProxyMock
 
 logger = get_logger(__name__)
@@ -29,8 +30,8 @@ class ActivismModule:
         logger.info(self._("[mod-activism] Directorio temporal para OCR: %s"), ACTIVISM_OCR_TEMP_DIR)
         
         self.ocr_engine = TesseractOCRMock() # Usar mock
-        self.matrix_client = MatrixClientMock(self.matrix_server) # Usar mock
-        self.tor_proxy = TorProxyMock(self.tor_proxy_address) # Usar mock
+        self.matrix_client = MatrixClientMock(ACTIVISM_MATRIX_SERVER) # Usar mock
+        self.tor_proxy = TorProxyMock(ACTIVISM_TOR_PROXY) # Usar mock
 
         logger.info(self._("[mod-activism] Módulo de activismo inicializado."))
 
@@ -80,6 +81,7 @@ class ActivismModule:
 
         self.is_active = True
         self.save_settings()
+        publish_status(self.module_name, is_active=True, tor_active=self.tor_active, matrix_connected=self.matrix_connected)
         logger.info(self._("[mod-activism] Módulo de activismo iniciado."))
 
     def stop(self):
@@ -96,6 +98,7 @@ class ActivismModule:
         self.matrix_connected = False
         self.is_active = False
         self.save_settings()
+        publish_status(self.module_name, is_active=False, tor_active=False, matrix_connected=False)
         logger.info(self._("[mod-activism] Módulo de activismo detenido."))
 
     def anonymize_file(self, file_path: str, output_path: Optional[str] = None) -> Optional[str]:
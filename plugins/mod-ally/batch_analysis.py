@@ -0,0 +1,294 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from core.utils import get_logger
+from .inclusive_index import InclusiveLanguageIndex
+
+logger = get_logger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+# Un documento es (identificador, contenido) o (identificador, Path del archivo a leer)
+DocumentSource = Union[str, bytes, Path]
+
+
+def rules_fingerprint(rules: Dict[str, Any]) -> str:
+    """Huella de las reglas: forma parte de la clave de caché, así que cambiar las reglas invalida los resultados."""
+    return hashlib.sha256(json.dumps(rules, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def content_key(data: bytes, fingerprint: str) -> str:
+    return hashlib.sha256(fingerprint.encode("ascii") + b"\0" + data).hexdigest()
+
+
+def collect_documents(paths: Iterable[str], extensions: Iterable[str]) -> List[Tuple[str, Path]]:
+    """
+    Lista los documentos a analizar como (identificador, Path). Los directorios se
+    recorren de forma recursiva filtrando por extensión; los archivos indicados
+    explícitamente se incluyen siempre. El identificador es la ruta relativa al
+    directorio de origen, en orden estable.
+    """
+    extensions = tuple(ext.lower() for ext in extensions)
+    documents = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [d for d in dirs if not d.startswith(".")]
+                for name in files:
+                    if name.lower().endswith(extensions) and not name.startswith("."):
+                        full_path = os.path.join(root, name)
+                        found.append((os.path.relpath(full_path, path).replace(os.sep, "/"), Path(full_path)))
+            documents.extend(sorted(found))
+        elif os.path.isfile(path):
+            documents.append((os.path.basename(path), Path(path)))
+        else:
+            raise FileNotFoundError(path)
+    return documents
+
+
+class AnalysisCache:
+    """
+    Caché LRU de resultados por hash de contenido (y de reglas), persistida en un
+    JSON para que las ejecuciones sucesivas de la CLI sobre un directorio solo
+    analicen los documentos modificados. Segura entre hilos.
+    """
+
+    def __init__(self, path: Optional[str], max_entries: int = 4096):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock() # Una escritura a la vez: la última instantánea gana
+        self._loaded = False
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_FORMAT_VERSION:
+                self._entries.update((key, value) for key, value in data.get("entries", []))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable analysis cache {self.path}: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._loaded = self._dirty = True
+
+    def flush(self) -> bool:
+        """Escribe la caché si cambió (archivo temporal + rename, sin sangría: puede ser grande)."""
+        with self._flush_lock:
+            with self._lock:
+                if not self.path or not self._dirty:
+                    return False
+                data = {"version": CACHE_FORMAT_VERSION, "entries": list(self._entries.items())}
+                self._dirty = False
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+                return True
+            except OSError as e:
+                logger.error(f"Error saving analysis cache {self.path}: {e}")
+                with self._lock:
+                    self._dirty = True # Se reintenta en la próxima escritura
+                return False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"entries": len(self), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+# Índice de cada proceso del pool, construido una vez por proceso en el initializer
+_worker_index: Optional[InclusiveLanguageIndex] = None
+
+
+def _init_worker(rules: Dict[str, Any]):
+    global _worker_index
+    _worker_index = InclusiveLanguageIndex(rules)
+
+
+def _analyze_chunk(texts: List[str]) -> List[Dict[str, Any]]:
+    return [_worker_index.analyze(text) for text in texts]
+
+
+class _Slot:
+    """Un documento en vuelo: se emite en el orden de entrada cuando su resultado está listo."""
+    __slots__ = ("document", "key", "result", "error", "cached", "future", "position")
+
+    def __init__(self, document: str):
+        self.document = document
+        self.key: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.cached = False
+        self.future: Optional[Future] = None
+        self.position = 0
+
+
+class BatchAnalyzer:
+    """
+    Analiza colecciones de documentos y emite un registro por documento, en el orden
+    de entrada y a medida que están listos (apto para NDJSON), seguido de un resumen.
+
+    Cada documento se lee y se resume con SHA-256 en este proceso; si el hash (junto
+    con la huella de las reglas) está en la caché, el resultado se reutiliza. Los
+    demás se analizan en línea o, con `workers > 1`, en un pool de procesos en
+    trozos de `chunk_size` documentos. El pool solo se crea al llenarse el primer
+    trozo: una pasada con casi todo en caché no paga el arranque de los procesos.
+    Como mucho hay `workers * chunk_size * 2` documentos en vuelo, así que la
+    memoria no crece con el tamaño del corpus.
+    """
+
+    def __init__(self, rules: Dict[str, Any], cache: Optional[AnalysisCache] = None,
+                 index: Optional[InclusiveLanguageIndex] = None, chunk_size: int = 8,
+                 max_document_bytes: int = 10 * 1024 * 1024):
+        self.rules = rules
+        self.fingerprint = rules_fingerprint(rules)
+        self.index = index if index is not None else InclusiveLanguageIndex(rules)
+        self.cache = cache
+        self.chunk_size = max(1, chunk_size)
+        self.max_document_bytes = max_document_bytes
+
+    def _read(self, source: DocumentSource) -> bytes:
+        if not isinstance(source, Path):
+            return source.encode("utf-8") if isinstance(source, str) else source
+        if os.path.getsize(source) > self.max_document_bytes:
+            raise ValueError(f"document larger than {self.max_document_bytes} bytes")
+        with open(source, "rb") as f:
+            return f.read()
+
+    def _create_pool(self, workers: int) -> Optional[ProcessPoolExecutor]:
+        if "fork" not in multiprocessing.get_all_start_methods():
+            # Las funciones del pool viven en un paquete de plugin registrado en tiempo de
+            # ejecución: con "spawn" el proceso hijo no podría importarlas
+            logger.warning("Process pool needs the fork start method; analyzing documents in-process")
+            return None
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"),
+                                   initializer=_init_worker, initargs=(self.rules,))
+
+    def analyze(self, documents: Iterable[Tuple[str, DocumentSource]], workers: int = 1,
+                use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        `documents` son pares (identificador, texto o Path). Emite {"document", "sha256",
+        "cached", "analysis"} o {"document", "error"} por documento y al final
+        {"summary": {...}}.
+        """
+        started = time.perf_counter()
+        cache = self.cache if use_cache else None
+        pool: Optional[ProcessPoolExecutor] = None
+        use_pool = workers > 1
+        max_in_flight = workers * self.chunk_size * 2 if use_pool else 1
+        summary = {"documents": 0, "analyzed": 0, "cached": 0, "errors": 0, "flagged": 0, "workers": 1}
+        in_flight: Deque[_Slot] = deque()
+        batch: List[Tuple[_Slot, str]] = []
+
+        def submit_batch():
+            nonlocal pool, use_pool
+            if pool is None and use_pool and len(batch) >= self.chunk_size:
+                pool = self._create_pool(workers)
+                use_pool = pool is not None
+                summary["workers"] = workers if use_pool else 1
+            if pool is None:
+                for slot, text in batch:
+                    slot.result = self.index.analyze(text)
+                batch.clear()
+                return
+            future = pool.submit(_analyze_chunk, [text for _, text in batch])
+            for position, (slot, _) in enumerate(batch):
+                slot.future, slot.position = future, position
+            batch.clear()
+
+        def finish(slot: _Slot) -> Dict[str, Any]:
+            if slot.future is None and slot.result is None and slot.error is None:
+                submit_batch() # El documento sigue en un trozo sin enviar
+            if slot.future is not None:
+                try:
+                    slot.result = slot.future.result()[slot.position]
+                except Exception as e:
+                    slot.error = f"analysis failed: {e}"
+            summary["documents"] += 1
+            if slot.error is not None:
+                summary["errors"] += 1
+                return {"document": slot.document, "error": slot.error}
+            if slot.cached:
+                summary["cached"] += 1
+            else:
+                summary["analyzed"] += 1
+                if cache is not None:
+                    cache.put(slot.key, slot.result)
+            if slot.result["non_inclusive_terms"]:
+                summary["flagged"] += 1
+            return {"document": slot.document, "sha256": slot.key, "cached": slot.cached, "analysis": slot.result}
+
+        try:
+            for document, source in documents:
+                slot = _Slot(document)
+                try:
+                    data = self._read(source)
+                    slot.key = content_key(data, self.fingerprint)
+                    slot.result = cache.get(slot.key) if cache is not None else None
+                    slot.cached = slot.result is not None
+                    if not slot.cached:
+                        text = data.decode("utf-8", errors="replace")
+                        batch.append((slot, text))
+                        if len(batch) >= self.chunk_size or not use_pool:
+                            submit_batch()
+                except (OSError, ValueError) as e:
+                    slot.error = str(e)
+                in_flight.append(slot)
+                while len(in_flight) > max_in_flight:
+                    yield finish(in_flight.popleft())
+            while in_flight:
+                yield finish(in_flight.popleft())
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            if cache is not None:
+                cache.flush()
+        summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        yield {"summary": summary}
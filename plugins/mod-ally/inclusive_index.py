@@ -0,0 +1,138 @@
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Pattern, Tuple
+
+# Tokens de palabra (letras, dígitos y "_", cualquier alfabeto)
+WORD_RE = re.compile(r"\w+")
+
+GENDERED_CATEGORY = "gendered_terms"
+NEUTRAL_GROUP = "neutral"
+SUGGESTION_NEUTRAL = "Consider using neutral terms instead of '{term}'."
+SUGGESTION_REPHRASE = "Consider rephrasing '{term}' to be more inclusive."
+
+
+class RuleEntry(NamedTuple):
+    term: str # Término tal como aparece en las reglas
+    category: str # Categoría de la regla (gendered_terms, ableist_terms, ...)
+    group: Optional[str] # Subgrupo dentro de la categoría (male, female, ...) o None
+    suggestion: str
+    alternatives: Tuple[str, ...] # Términos neutrales sugeridos
+
+
+class InclusiveMatch(NamedTuple):
+    entry: RuleEntry
+    start: int
+    end: int
+    text: str # Fragmento del texto analizado
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"term": self.entry.term, "category": self.entry.category, "group": self.entry.group,
+                "start": self.start, "end": self.end, "text": self.text,
+                "suggestion": self.entry.suggestion, "alternatives": list(self.entry.alternatives)}
+
+
+def _fold(text: str) -> str:
+    return unicodedata.normalize("NFC", text).lower()
+
+
+def flatten_rules(rules: Dict[str, Any]) -> List[RuleEntry]:
+    """
+    Convierte `inclusive_language_rules.json` en entradas planas. Una categoría puede
+    ser una lista de términos o un dict de grupos; en las categorías con grupos, el
+    grupo "neutral" no se marca y sus términos se ofrecen como alternativas.
+    """
+    entries = []
+    for category, terms in rules.items():
+        if isinstance(terms, dict):
+            alternatives = tuple(terms.get(NEUTRAL_GROUP, ()))
+            groups = [(group, words) for group, words in terms.items() if group != NEUTRAL_GROUP]
+        else:
+            alternatives, groups = (), [(None, terms)]
+        template = SUGGESTION_NEUTRAL if category == GENDERED_CATEGORY or alternatives else SUGGESTION_REPHRASE
+        for group, words in groups:
+            for word in words or ():
+                if isinstance(word, str) and WORD_RE.search(word):
+                    entries.append(RuleEntry(word, category, group, template.format(term=word), alternatives))
+    return entries
+
+
+class InclusiveLanguageIndex:
+    """
+    Índice compilado de las reglas de lenguaje inclusivo.
+
+    Los términos (también expresiones de varias palabras) se indexan por su primer
+    token normalizado. Para analizar un texto se tokeniza una sola vez, se cruzan sus
+    tokens con el índice (operación de conjuntos) y solo si hay candidatos se recorre
+    el texto con una expresión regular limitada a esos términos, con fronteras de
+    palabra ("ellos" no coincide dentro de "aquellos"). El coste es lineal en el
+    texto y prácticamente independiente del número de reglas.
+    """
+
+    def __init__(self, rules: Dict[str, Any], pattern_cache_size: int = 64):
+        self.entries = flatten_rules(rules)
+        self._by_first_token: Dict[str, List[Tuple[Tuple[str, ...], RuleEntry]]] = {}
+        for entry in self.entries:
+            tokens = tuple(WORD_RE.findall(_fold(entry.term)))
+            candidates = self._by_first_token.setdefault(tokens[0], [])
+            if all(existing != tokens for existing, _ in candidates): # Un término repetido se marca una vez
+                candidates.append((tokens, entry))
+        self._first_tokens = frozenset(self._by_first_token)
+        self._patterns: "OrderedDict[FrozenSet[str], Tuple[Pattern, Dict[Tuple[str, ...], RuleEntry]]]" = OrderedDict()
+        self._pattern_cache_size = pattern_cache_size
+        self._patterns_lock = threading.Lock() # El índice se comparte entre peticiones concurrentes
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _pattern_for(self, first_tokens: FrozenSet[str]) -> Tuple[Pattern, Dict[Tuple[str, ...], RuleEntry]]:
+        with self._patterns_lock:
+            cached = self._patterns.get(first_tokens)
+            if cached is not None:
+                self._patterns.move_to_end(first_tokens)
+                return cached
+        phrases = {tokens: entry for token in first_tokens for tokens, entry in self._by_first_token[token]}
+        # Las expresiones más largas primero: "persona sorda" gana a "persona"
+        alternatives = sorted(phrases, key=lambda tokens: (-len(tokens), -len(" ".join(tokens))))
+        pattern = re.compile(r"(?<!\w)(?:" + "|".join(r"\W+".join(map(re.escape, tokens)) for tokens in alternatives) + r")(?!\w)")
+        with self._patterns_lock: # Compilado fuera del lock; si otro hilo lo compiló a la vez, se sustituye
+            self._patterns[first_tokens] = (pattern, phrases)
+            self._patterns.move_to_end(first_tokens)
+            if len(self._patterns) > self._pattern_cache_size:
+                self._patterns.popitem(last=False)
+        return pattern, phrases
+
+    def find(self, text: str) -> List[InclusiveMatch]:
+        """Coincidencias en `text` con sus posiciones (en la forma NFC del texto)."""
+        if not text or not self._first_tokens:
+            return []
+        if not unicodedata.is_normalized("NFC", text):
+            text = unicodedata.normalize("NFC", text)
+        folded = text.lower()
+        if len(folded) != len(text): # Algún carácter cambia de longitud al pasar a minúsculas (p. ej. "İ")
+            folded = "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+        present = self._first_tokens.intersection(WORD_RE.findall(folded))
+        if not present:
+            return []
+        pattern, phrases = self._pattern_for(frozenset(present))
+        matches = []
+        for found in pattern.finditer(folded):
+            tokens = tuple(WORD_RE.findall(found.group()))
+            matches.append(InclusiveMatch(phrases[tokens], found.start(), found.end(), text[found.start():found.end()]))
+        return matches
+
+    def analyze(self, text: str) -> Dict[str, Any]:
+        """
+        Resultado compatible con el formato anterior (`non_inclusive_terms` y
+        `suggestions`, un elemento por término distinto) más `matches` con posiciones.
+        """
+        matches = self.find(text)
+        terms, suggestions, seen = [], [], set()
+        for match in matches:
+            if match.entry.term not in seen:
+                seen.add(match.entry.term)
+                terms.append(match.entry.term)
+                suggestions.append(match.entry.suggestion)
+        return {"non_inclusive_terms": terms, "suggestions": suggestions,
+                "matches": [match.to_dict() for match in matches]}
@@ -1,11 +1,15 @@
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, Tuple, Union
 import json
+import os
 
-from config.config import DEFAULT_LANG, ALLY_MICROCOURSE_DIR, ALLY_INCLUSIVE_LANGUAGE_RULES_FILE
+from config.config import DEFAULT_LANG, ALLY_MICROCOURSE_DIR, ALLY_INCLUSIVE_LANGUAGE_RULES_FILE, ALLY_ANALYSIS_CACHE_FILE, ALLY_ANALYSIS_CACHE_SIZE, ALLY_ANALYSIS_WORKERS, ALLY_ANALYSIS_POOL_MIN_DOCS, ALLY_ANALYSIS_EXTENSIONS
 from core.localization import get_translator
 from core.utils import get_logger, load_json_file, save_json_file
 from core.module_manager import module_manager
+from core.status_service import publish_status
+from .inclusive_index import InclusiveLanguageIndex
+from .batch_analysis import AnalysisCache, BatchAnalyzer, collect_documents
 
 logger = get_logger(__name__)
 
@@ -15,6 +19,9 @@ class AllyModule:
         self.is_active = False
         self.current_course = None
         self.inclusive_language_rules = {}
+        self.inclusive_index = InclusiveLanguageIndex({})
+        self.analysis_cache = AnalysisCache(ALLY_ANALYSIS_CACHE_FILE, ALLY_ANALYSIS_CACHE_SIZE)
+        self.batch_analyzer = BatchAnalyzer({}, self.analysis_cache, self.inclusive_index)
         self.module_name = "mod-ally"
 
     def initialize(self):
@@ -25,6 +32,7 @@ class AllyModule:
             logger.warning(self._("[mod-ally] No se encontraron reglas de lenguaje inclusivo. Usando por defecto."))
             self._load_default_language_rules()
             save_json_file(ALLY_INCLUSIVE_LANGUAGE_RULES_FILE, self.inclusive_language_rules)
+        self._rebuild_inclusive_index()
 
         # Simulación de carga de microcursos
         logger.info(self._("[mod-ally] Cargando microcursos desde %s (simulado)"), ALLY_MICROCOURSE_DIR)
@@ -46,6 +54,13 @@ class AllyModule:
         logger.info(self._("[mod-ally] Cargando configuración persistente..."))
         if "inclusive_language_rules" in settings:
             self.inclusive_language_rules = settings["inclusive_language_rules"]
+            self._rebuild_inclusive_index()
+
+    def _rebuild_inclusive_index(self):
+        """Compila las reglas en el índice usado por `analyze_text_for_inclusivity`."""
+        self.inclusive_index = InclusiveLanguageIndex(self.inclusive_language_rules)
+        self.batch_analyzer = BatchAnalyzer(self.inclusive_language_rules, self.analysis_cache, self.inclusive_index)
+        logger.info(self._("[mod-ally] Índice de lenguaje inclusivo compilado: %s términos."), len(self.inclusive_index))
 
     def save_settings(self):
         """Guarda la configuración actual del módulo en la DB."""
@@ -77,6 +92,7 @@ class AllyModule:
             # o sugerir alternativas.
 
         self.is_active = True
+        publish_status(self.module_name, is_active=True, current_course=self.current_course)
         logger.info(self._("[mod-ally] Módulo Ally iniciado."))
 
     def stop(self):
@@ -88,38 +104,53 @@ class AllyModule:
         logger.info(self._("[mod-ally] Deteniendo módulo Ally..."))
         self.current_course = None
         self.is_active = False
+        publish_status(self.module_name, is_active=False, current_course=None)
         logger.info(self._("[mod-ally] Módulo Ally detenido."))
 
     def analyze_text_for_inclusivity(self, text: str) -> Dict[str, Any]:
-        """Analiza un texto para identificar lenguaje no inclusivo."""
+        """
+        Analiza un texto para identificar lenguaje no inclusivo. Retorna los términos
+        encontrados, una sugerencia por término y `matches` con posiciones y alternativas.
+        """
         logger.info(self._("[mod-ally] Analizando texto para inclusividad..."))
-        findings = {"non_inclusive_terms": [], "suggestions": []}
-
-        # --- Lógica de análisis de PNL (NO SIMULADA) ---
-        # Iterar sobre el texto y comparar con las reglas de self.inclusive_language_rules
-        # Ejemplo muy simplificado:
-        for term_type, terms in self.inclusive_language_rules.items():
-            if term_type == "gendered_terms":
-                for gender, words in terms.items():
-                    if gender != "neutral":
-                        for word in words:
-                            if word in text.lower():
-                                findings["non_inclusive_terms"].append(word)
-                                findings["suggestions"].append(f"Consider using neutral terms instead of '{word}'.")
-            elif term_type == "ableist_terms":
-                for word in terms:
-                    if word in text.lower():
-                        findings["non_inclusive_terms"].append(word)
-                        findings["suggestions"].append(f"Consider rephrasing '{word}' to be more inclusive.")
-
-        logger.info(self._("[mod-ally] Análisis de inclusividad completado. Hallazgos: %s"), findings)
+        findings = self.inclusive_index.analyze(text)
+        logger.info(self._("[mod-ally] Análisis de inclusividad completado. Hallazgos: %s"), findings["non_inclusive_terms"])
         return findings
 
+    def resolve_microcourse_path(self, relative_path: str = "") -> str:
+        """Ruta dentro de ALLY_MICROCOURSE_DIR; rechaza rutas que salgan del directorio (API)."""
+        base = os.path.realpath(ALLY_MICROCOURSE_DIR)
+        path = os.path.realpath(os.path.join(base, relative_path))
+        if path != base and not path.startswith(base + os.sep):
+            raise ValueError(f"Path outside the microcourse directory: {relative_path}")
+        return path
+
+    def analyze_documents(self, documents: Optional[List[Tuple[str, Union[str, bytes]]]] = None, paths: Optional[List[str]] = None,
+                          workers: Optional[int] = 1, use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Analiza varios documentos: pares (identificador, texto) y/o archivos y directorios
+        (por defecto ALLY_MICROCOURSE_DIR si no se pasa nada). Genera un resultado por
+        documento, en orden, y un resumen final; ver `BatchAnalyzer.analyze`.
+
+        Por defecto se analiza en el propio proceso: el pool de procesos hace fork y,
+        dentro del servidor (API, Socket.IO), con otros hilos en marcha, el hijo podría
+        heredar un lock tomado. Con `workers=None` (CLI) se usa el pool de
+        ALLY_ANALYSIS_WORKERS procesos a partir de ALLY_ANALYSIS_POOL_MIN_DOCS documentos.
+        """
+        if documents is None and paths is None:
+            paths = [ALLY_MICROCOURSE_DIR]
+        batch = list(documents or []) + (collect_documents(paths, ALLY_ANALYSIS_EXTENSIONS) if paths else [])
+        if workers is None:
+            workers = ALLY_ANALYSIS_WORKERS if len(batch) >= ALLY_ANALYSIS_POOL_MIN_DOCS else 1
+        logger.info(self._("[mod-ally] Analizando %s documentos (%s procesos)..."), len(batch), workers)
+        return self.batch_analyzer.analyze(batch, workers=workers, use_cache=use_cache)
+
     def get_status(self) -> Dict[str, Any]:
         """Retorna el estado actual del módulo Ally."""
         return {
             "is_active": self.is_active,
             "current_course": self.current_course,
             "rules_loaded": bool(self.inclusive_language_rules),
+            "analysis_cache": self.analysis_cache.get_stats(),
         }
 
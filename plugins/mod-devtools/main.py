@@ -1,13 +1,15 @@
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 import subprocess
 import os
+import sys
 import json
 
 from config.config import DEFAULT_LANG, DEVTOOLS_TEST_REPORTS_DIR
 from core.localization import get_translator
 from core.utils import get_logger, save_json_file
 from core.module_manager import module_manager
+from core.status_service import publish_status
 
 logger = get_logger(__name__)
 
@@ -50,6 +52,7 @@ class DevtoolsModule:
         logger.info(self._("[mod-devtools] Activando hooks de pre-commit (simulado)..."))
 
         self.is_active = True
+        publish_status(self.module_name, is_active=True)
         logger.info(self._("[mod-devtools] Módulo de herramientas de desarrollo iniciado."))
 
     def stop(self):
@@ -59,10 +62,15 @@ class DevtoolsModule:
             return
         logger.info(self._("[mod-devtools] Deteniendo módulo de herramientas de desarrollo."))
         self.is_active = False
+        publish_status(self.module_name, is_active=False)
         logger.info(self._("[mod-devtools] Módulo de herramientas de desarrollo detenido."))
 
-    def run_tests(self, module_name: Optional[str] = None) -> Dict[str, Any]:
-        """Ejecuta tests unitarios o de integración."""
+    def run_tests(self, module_name: Optional[str] = None, should_cancel: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        Ejecuta tests unitarios o de integración. `should_cancel` (p. ej. la cancelación
+        de un trabajo en segundo plano) se consulta mientras pytest corre: si retorna
+        True se termina el proceso y el resultado tiene status "cancelled".
+        """
         logger.info(self._("[mod-devtools] Ejecutando tests..."))
         test_command = [sys.executable, "-m", "pytest"]
         if module_name:
@@ -71,18 +79,30 @@ class DevtoolsModule:
             test_command.append("tests/")
 
         try:
-            result = subprocess.run(test_command, capture_output=True, text=True, check=True)
-            logger.info(self._("[mod-devtools] Tests ejecutados exitosamente."))
-            logger.debug(result.stdout)
-            return {"status": "success", "output": result.stdout, "stderr": result.stderr}
-        except subprocess.CalledProcessError as e:
-            logger.error(self._("[mod-devtools] Error al ejecutar tests: %s"), e)
-            logger.error(e.stderr)
-            return {"status": "error", "output": e.stdout, "stderr": e.stderr}
+            process = subprocess.Popen(test_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
         except FileNotFoundError:
             logger.error(self._("[mod-devtools] pytest no encontrado. Asegúrate de que esté instalado."))
             return {"status": "error", "output": "pytest not found", "stderr": ""}
 
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                if should_cancel is not None and should_cancel():
+                    process.kill()
+                    stdout, stderr = process.communicate()
+                    logger.warning(self._("[mod-devtools] Ejecución de tests cancelada."))
+                    return {"status": "cancelled", "output": stdout, "stderr": stderr}
+
+        if process.returncode == 0:
+            logger.info(self._("[mod-devtools] Tests ejecutados exitosamente."))
+            logger.debug(stdout)
+            return {"status": "success", "output": stdout, "stderr": stderr}
+        logger.error(self._("[mod-devtools] Error al ejecutar tests: código de salida %s"), process.returncode)
+        logger.error(stderr)
+        return {"status": "error", "output": stdout, "stderr": stderr}
+
     def run_linter(self) -> Dict[str, Any]:
         """Ejecuta el linter (flake8)."""
         logger.info(self._("[mod-devtools] Ejecutando linter (flake8)..."))
@@ -0,0 +1,116 @@
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterator, List, NamedTuple, Tuple
+
+from core.utils import get_logger, is_gevent_patched
+from .narration_cache import NarrationCache
+
+logger = get_logger(__name__)
+
+# Fin de frase (seguido de espacio) o párrafo en blanco
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…;:])\s+|\n\s*\n")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def split_sentences(text: str, max_chars: int = 400, min_chars: int = 40) -> List[str]:
+    """
+    Parte un texto en trozos para sintetizar por separado: en los finales de frase,
+    uniendo frases de menos de `min_chars` con la siguiente (cada trozo tiene un coste
+    fijo en el modelo) y cortando por espacios las de más de `max_chars`.
+    """
+    chunks: List[str] = []
+    pending = ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        sentence = _WHITESPACE_RE.sub(" ", sentence).strip()
+        if not sentence:
+            continue
+        pending = f"{pending} {sentence}" if pending else sentence
+        if len(pending) < min_chars:
+            continue
+        while len(pending) > max_chars:
+            cut = pending.rfind(" ", 0, max_chars + 1)
+            cut = cut if cut > 0 else max_chars
+            chunks.append(pending[:cut].strip())
+            pending = pending[cut:].strip()
+        if pending:
+            chunks.append(pending)
+        pending = ""
+    if pending:
+        if chunks and len(chunks[-1]) + len(pending) < max_chars:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
+
+
+class SynthesizedChunk(NamedTuple):
+    index: int
+    text: str
+    audio: bytes
+    cached: bool
+    path: str # Archivo del trozo en la caché
+
+
+class ChunkedSynthesizer:
+    """
+    Sintetiza trozos de texto en un pool de `workers` hilos (el modelo TTS suelta el
+    GIL durante la inferencia) y los entrega en orden a medida que están listos: el
+    primero llega en cuanto se sintetiza su frase, sin esperar al documento entero.
+    Cada trozo pasa por `cache` con su propia clave, así que una lección editada solo
+    vuelve a sintetizar las frases que cambiaron. Como mucho hay `window` trozos en
+    vuelo, para no encolar de golpe una lección larga si el cliente se desconecta.
+    Bajo gevent se usa el threadpool de gevent (hilos reales).
+    """
+
+    def __init__(self, cache: NarrationCache, workers: int = 4, window: int = 0):
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.window = window or self.workers * 2
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if is_gevent_patched():
+                    from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+                    self._executor = GeventThreadPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="educator-tts")
+            return self._executor
+
+    def _synthesize(self, index: int, key: str, text: str, synthesize: Callable[[str], bytes]) -> SynthesizedChunk:
+        path, audio, cached = self.cache.get_or_create(key, lambda: synthesize(text))
+        return SynthesizedChunk(index, text, audio, cached, path)
+
+    def stream(self, chunks: List[Tuple[str, str]], synthesize: Callable[[str], bytes]) -> Iterator[SynthesizedChunk]:
+        """`chunks` son pares (clave de caché, texto). Los errores de síntesis se propagan al consumidor."""
+        if self.workers == 1 or len(chunks) == 1:
+            for index, (key, text) in enumerate(chunks):
+                yield self._synthesize(index, key, text, synthesize)
+            return
+        executor = self._get_executor()
+        in_flight: Deque[Future] = deque()
+        pending = iter(enumerate(chunks))
+        try:
+            for index, (key, text) in pending:
+                in_flight.append(executor.submit(self._synthesize, index, key, text, synthesize))
+                if len(in_flight) >= self.window:
+                    break
+            while in_flight:
+                chunk = in_flight.popleft().result()
+                for index, (key, text) in pending:
+                    in_flight.append(executor.submit(self._synthesize, index, key, text, synthesize))
+                    break
+                yield chunk
+        finally:
+            for future in in_flight:
+                future.cancel() # Consumidor desconectado o error: no sintetizar lo que ya nadie espera
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
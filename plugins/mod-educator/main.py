@@ -1,14 +1,16 @@
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Generator, Iterator, List
 import os
 from gtts import gTTS
-from datetime import datetime
 
-from config.config import DEFAULT_LANG, EDUCATOR_NARRATION_OUTPUT_DIR, EDUCATOR_SUBTITLE_OUTPUT_DIR, EDUCATOR_RESOURCES_DIR
+from config.config import DEFAULT_LANG, EDUCATOR_NARRATION_OUTPUT_DIR, EDUCATOR_SUBTITLE_OUTPUT_DIR, EDUCATOR_RESOURCES_DIR, EDUCATOR_NARRATION_CACHE_MAX_BYTES, EDUCATOR_TTS_MODEL_VERSION, EDUCATOR_TTS_WORKERS, EDUCATOR_TTS_MAX_CHUNK_CHARS
 from core.localization import get_translator
 from core.utils import get_logger, save_json_file
 from core.module_manager import module_manager
+from core.status_service import publish_status
 from core.mocks import WhisperModelMock, BarkModelMock
+from .chunked_tts import ChunkedSynthesizer, SynthesizedChunk, split_sentences
+from .narration_cache import NarrationCache, narration_key
 
 logger = get_logger(__name__)
 
@@ -20,6 +22,8 @@ class EducatorModule:
         self.module_name = "mod-educator"
         self.whisper_model = None
         self.bark_model = None
+        self.narration_cache = NarrationCache(EDUCATOR_NARRATION_OUTPUT_DIR, EDUCATOR_NARRATION_CACHE_MAX_BYTES)
+        self.synthesizer = ChunkedSynthesizer(self.narration_cache, EDUCATOR_TTS_WORKERS)
 
     def initialize(self):
         """Prepara los directorios de salida y carga los recursos docentes."""
@@ -58,6 +62,7 @@ class EducatorModule:
             return
         logger.info(self._("[mod-educator] Iniciando módulo Educador."))
         self.is_active = True
+        publish_status(self.module_name, is_active=True)
 
     def stop(self):
         """Detiene el módulo Educador."""
@@ -65,22 +70,63 @@ class EducatorModule:
             logger.warning(self._("[mod-educator] El módulo Educador no está activo."))
             return
         logger.info(self._("[mod-educator] Deteniendo módulo Educador."))
+        self.synthesizer.shutdown()
+        self.narration_cache.flush()
         self.is_active = False
-
-    def generate_narration(self, text: str, lang: str = DEFAULT_LANG) -> Optional[str]:
-        """Genera una narración de IA a partir de un texto."""
+        publish_status(self.module_name, is_active=False)
+
+    def iter_narration_chunks(self, text: str, lang: str = DEFAULT_LANG,
+                              voice_preset: Optional[str] = None) -> Generator[SynthesizedChunk, None, str]:
+        """
+        Narración por frases, en orden y a medida que se sintetizan (ver
+        `ChunkedSynthesizer`): el primer trozo está disponible tras sintetizar la
+        primera frase. Si la narración completa ya está en caché sale en un solo trozo;
+        si no, al terminar se guarda también completa. Los errores se propagan.
+        Al agotarse retorna la ruta de la narración completa (`StopIteration.value`).
+        """
+        voice_preset = voice_preset or f"{lang}_speaker_0"
+        full_key = narration_key(text, lang, voice_preset, EDUCATOR_TTS_MODEL_VERSION)
+        cached = self.narration_cache.read(full_key)
+        if cached is not None:
+            full_path, audio = cached
+            yield SynthesizedChunk(0, text, audio, True, full_path)
+            return full_path
+        sentences = split_sentences(text, EDUCATOR_TTS_MAX_CHUNK_CHARS) or [text]
+        chunks = [(narration_key(sentence, lang, voice_preset, EDUCATOR_TTS_MODEL_VERSION), sentence) for sentence in sentences]
+        parts = []
+        for chunk in self.synthesizer.stream(chunks, lambda sentence: self.bark_model.generate_audio(sentence, voice_preset=voice_preset)):
+            parts.append(chunk.audio)
+            yield chunk
+        if chunks[0][0] == full_key: # Un solo trozo idéntico al texto: ya está guardado con la clave completa
+            return chunk.path
+        return self.narration_cache.put(full_key, b"".join(parts))
+
+    def stream_narration(self, text: str, lang: str = DEFAULT_LANG, voice_preset: Optional[str] = None) -> Iterator[bytes]:
+        """Audio de la narración en bloques, para una respuesta HTTP por partes."""
+        logger.info(self._("[mod-educator] Transmitiendo narración para texto (longitud: %d)..."), len(text))
+        for chunk in self.iter_narration_chunks(text, lang, voice_preset):
+            yield chunk.audio
+
+    def generate_narration(self, text: str, lang: str = DEFAULT_LANG, voice_preset: Optional[str] = None) -> Optional[str]:
+        """
+        Genera una narración de IA a partir de un texto. El audio se guarda en la caché
+        de narraciones por (texto, idioma, voz, versión del modelo): pedir otra vez la
+        misma narración retorna el archivo existente sin volver a sintetizarla. Los
+        textos largos se sintetizan por frases en paralelo (ver `iter_narration_chunks`).
+        """
         logger.info(self._("[mod-educator] Generando narración para texto (longitud: %d)..."), len(text))
         try:
-            # Usar BarkModelMock para simular la generación de audio
-            audio_bytes = self.bark_model.generate_audio(text, voice_preset=f"{lang}_speaker_0")
-            
-            filename = f"narration_{hash(text)}_{datetime.now().strftime('%Y%m%d%H%M%S')}.mp3"
-            audio_file_path = os.path.join(EDUCATOR_NARRATION_OUTPUT_DIR, filename)
-            
-            with open(audio_file_path, "wb") as f:
-                f.write(audio_bytes)
-
-            logger.info(self._("[mod-educator] Narración guardada en: %s"), audio_file_path)
+            chunks = self.iter_narration_chunks(text, lang, voice_preset)
+            synthesized = 0
+            try:
+                while True:
+                    synthesized += not next(chunks).cached
+            except StopIteration as done:
+                audio_file_path = done.value
+            if synthesized:
+                logger.info(self._("[mod-educator] Narración guardada en: %s"), audio_file_path)
+            else:
+                logger.info(self._("[mod-educator] Narración recuperada de la caché: %s"), audio_file_path)
             return audio_file_path
         except Exception as e:
             logger.error(self._("[mod-educator] Error al generar narración de IA: %s"), e)
@@ -111,6 +157,7 @@ class EducatorModule:
         return {
             "is_active": self.is_active,
             "narrations_output_dir": EDUCATOR_NARRATION_OUTPUT_DIR,
+            "narration_cache": self.narration_cache.get_stats(),
             "subtitles_output_dir": EDUCATOR_SUBTITLE_OUTPUT_DIR,
             "loaded_resources_count": len(self.loaded_resources),
         }
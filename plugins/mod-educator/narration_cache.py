@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+INDEX_FILENAME = "narration_index.json"
+_CACHED_FILE_RE = re.compile(r"^narration_([0-9a-f]{64})(\.\w+)$")
+
+
+def narration_key(text: str, lang: str, voice_preset: str, model_version: str) -> str:
+    """Clave estable (entre procesos y reinicios, a diferencia de hash()) de una narración."""
+    payload = json.dumps([text, lang, voice_preset, model_version], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class NarrationCache:
+    """
+    Caché de audio direccionada por contenido en `directory`: cada narración se guarda
+    como `narration_<clave>.<ext>` y un índice JSON (persistido con archivo temporal
+    + rename) recuerda el tamaño y el último uso de cada archivo, así que la caché
+    sobrevive a los reinicios. Si el total supera `max_bytes` se borran los archivos
+    usados hace más tiempo (el recién escrito nunca se expulsa).
+
+    `get_or_create` evita además generar dos veces a la vez la misma narración: las
+    peticiones concurrentes de una clave esperan a la primera en lugar de llamar
+    también al modelo. Segura entre hilos.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, flush_interval_s: float = 30.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flush_interval_s = flush_interval_s
+        self.index_path = os.path.join(directory, INDEX_FILENAME)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict() # clave -> {file, size, last_used}
+        self._in_flight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self._last_flush = 0.0
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load(self):
+        """Lee el índice y lo reconcilia con el directorio (archivos borrados a mano o índice perdido)."""
+        self._loaded = True
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_FORMAT_VERSION:
+                entries = {key: entry for key, entry in data.get("entries", [])}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Rebuilding unreadable narration index {self.index_path}: {e}")
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            names = []
+        on_disk = {}
+        for name in names:
+            match = _CACHED_FILE_RE.match(name)
+            if match:
+                on_disk[match.group(1)] = name
+        for key, name in on_disk.items():
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entry = entries.get(key)
+            if entry is None or entry.get("file") != name:
+                entry = {"file": name, "last_used": stat.st_mtime} # Archivo sin índice: se adopta
+                self._dirty = True
+            entry["size"] = stat.st_size
+            entries[key] = entry
+        if len(entries) != len(on_disk):
+            self._dirty = True # Entradas del índice cuyo archivo ya no existe
+        for key in sorted((key for key in entries if key in on_disk), key=lambda key: entries[key]["last_used"]):
+            self._entries[key] = entries[key]
+            self.size_bytes += entries[key]["size"]
+        self._evict()
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._load()
+
+    def _evict(self, keep: Optional[str] = None):
+        while self.size_bytes > self.max_bytes and len(self._entries) > (1 if keep else 0):
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                self._entries.move_to_end(key)
+                continue
+            del self._entries[key]
+            self.size_bytes -= entry["size"]
+            self.evictions += 1
+            self._dirty = True
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove evicted narration {entry['file']}: {e}")
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """Ruta del audio de `key` y actualización de su uso; requiere el lock."""
+        self._ensure_loaded()
+        entry = self._entries.get(key)
+        path = os.path.join(self.directory, entry["file"]) if entry is not None else None
+        if entry is not None and not os.path.exists(path):
+            self._forget(key) # Borrado por fuera de la caché
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        entry["last_used"] = time.time()
+        self._dirty = True
+        self.hits += 1
+        return path
+
+    def _forget(self, key: str):
+        entry = self._entries.pop(key)
+        self.size_bytes -= entry["size"]
+        self._dirty = True
+
+    def get(self, key: str) -> Optional[str]:
+        """Ruta del audio cacheado para `key`, o None."""
+        with self._lock:
+            path = self._lookup(key)
+        self._maybe_flush()
+        return path
+
+    def read(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """
+        (ruta, audio) cacheados para `key`, o None. El archivo se lee con el lock
+        tomado: una expulsión de otro hilo no puede borrarlo entre buscarlo y leerlo.
+        """
+        with self._lock:
+            path = self._lookup(key)
+            audio = None
+            if path is not None:
+                try:
+                    with open(path, "rb") as f:
+                        audio = f.read()
+                except FileNotFoundError:
+                    self._forget(key) # Borrado por fuera de la caché justo ahora
+        self._maybe_flush()
+        return (path, audio) if audio is not None else None
+
+    @staticmethod
+    def key_of(path: str) -> Optional[str]:
+        """Clave de la narración guardada en `path`, o None si no es un archivo de la caché."""
+        match = _CACHED_FILE_RE.match(os.path.basename(path))
+        return match.group(1) if match else None
+
+    def put(self, key: str, audio: bytes, extension: str = ".mp3") -> str:
+        """Guarda el audio de `key` (escritura atómica) y retorna su ruta."""
+        name = f"narration_{key}{extension}"
+        path = os.path.join(self.directory, name)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._ensure_loaded()
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous["size"]
+            self._entries[key] = {"file": name, "size": len(audio), "last_used": time.time()}
+            self.size_bytes += len(audio)
+            self._dirty = True
+            self._evict(keep=key)
+        self.flush()
+        return path
+
+    def get_or_create(self, key: str, generate: Callable[[], bytes], extension: str = ".mp3") -> Tuple[str, bytes, bool]:
+        """
+        Retorna (ruta, audio, cacheado). Si `key` no está, llama a `generate()` una sola
+        vez aunque haya varias peticiones concurrentes de la misma clave. El audio se
+        retorna en memoria (ver `read`): el archivo puede expulsarse en cuanto se suelta
+        el lock. Si `generate` falla, la excepción llega a quien la llamó y los que
+        esperaban lo reintentan.
+        """
+        while True:
+            found = self.read(key)
+            if found is not None:
+                return found[0], found[1], True
+            with self._lock:
+                if key in self._entries:
+                    continue # Otro hilo la generó entre read() y este punto
+                waiting = self._in_flight.get(key)
+                if waiting is None:
+                    done = self._in_flight[key] = threading.Event()
+            if waiting is not None:
+                waiting.wait()
+                continue
+            try:
+                audio = generate()
+                return self.put(key, audio, extension), audio, False
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+                done.set()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Escribe el índice si cambió."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = {"version": INDEX_FORMAT_VERSION, "entries": list(self._entries.items())}
+            self._dirty = False
+            self._last_flush = time.monotonic()
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+            return True
+        except OSError as e:
+            logger.error(f"Error saving narration index {self.index_path}: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._ensure_loaded()
+            return {"entries": len(self._entries), "size_bytes": self.size_bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -6,6 +6,7 @@ from config.config import DEFAULT_LANG, MOBILE_TERMUX_CONFIG_FILE
 from core.localization import get_translator
 from core.utils import get_logger, load_json_file, save_json_file
 from core.module_manager import module_manager
+from core.status_service import publish_status
 
 logger = get_logger(__name__)
 
@@ -58,6 +59,7 @@ class MobileModule:
 
         self.is_active = True
         self.save_settings()
+        publish_status(self.module_name, is_active=True)
         logger.info(self._("[mod-mobile] Módulo móvil iniciado."))
 
     def stop(self):
@@ -69,6 +71,7 @@ class MobileModule:
         self.is_active = False
         self.connected_device = None
         self.save_settings()
+        publish_status(self.module_name, is_active=False, connected_device=None)
         logger.info(self._("[mod-mobile] Módulo móvil detenido."))
 
     def connect_device(self, device_id: str) -> bool:
@@ -79,6 +82,7 @@ class MobileModule:
         if device_id == "test_device": # Simulación de conexión exitosa
             self.connected_device = device_id
             self.save_settings()
+            publish_status(self.module_name, connected_device=device_id)
             logger.info(self._("[mod-mobile] Conectado exitosamente a: %s"), device_id)
             return True
         else:
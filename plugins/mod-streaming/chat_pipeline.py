@@ -0,0 +1,325 @@
+import abc
+import asyncio
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class ChatMessage(NamedTuple):
+    id: str
+    user: str
+    text: str
+    received_at: float # time.perf_counter() al leerlo de la fuente
+
+
+class ChatSource(abc.ABC):
+    """Adaptador de una plataforma de chat: produce mensajes y aplica acciones de moderación."""
+
+    async def connect(self):
+        pass
+
+    @abc.abstractmethod
+    def messages(self) -> AsyncIterator[ChatMessage]:
+        """Mensajes de la conexión actual; termina cuando la plataforma la cierra."""
+
+    async def send_action(self, action: Dict[str, Any]):
+        pass
+
+    async def close(self):
+        pass
+
+
+class NDJSONChatSource(ChatSource):
+    """
+    Fuente TCP de líneas JSON ({"id", "user", "text"}), el formato del puente de chat
+    local y de `ChatServerMock`. Las acciones se devuelven por la misma conexión.
+    """
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        if parsed.scheme != "tcp" or not parsed.port:
+            raise ValueError(f"Invalid chat source URL: {url}")
+        self.host, self.port = parsed.hostname, parsed.port
+        self._reader = None
+        self._writer = None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def _readline(self) -> Optional[bytes]:
+        """
+        Siguiente línea (b"" al cerrar la conexión). Una línea más larga que el límite
+        del StreamReader (64 KiB) se descarta hasta su salto de línea y retorna None.
+        """
+        try:
+            return await self._reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial # Última línea sin salto de línea
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+        while True:
+            await self._reader.readexactly(consumed) # Sin acumular la línea en memoria
+            try:
+                await self._reader.readuntil(b"\n")
+                return None
+            except asyncio.IncompleteReadError:
+                return None
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+
+    async def messages(self) -> AsyncIterator[ChatMessage]:
+        while True:
+            line = await self._readline()
+            if line is None:
+                logger.warning("Discarding oversized chat line")
+                continue
+            if not line:
+                return
+            try:
+                data = json.loads(line)
+                yield ChatMessage(str(data.get("id", "")), str(data.get("user", "")), str(data.get("text", "")),
+                                  time.perf_counter())
+            except (ValueError, AttributeError):
+                logger.warning(f"Discarding malformed chat line: {line[:80]!r}")
+
+    async def send_action(self, action: Dict[str, Any]):
+        self._writer.write((json.dumps(action) + "\n").encode("utf-8"))
+        await self._writer.drain()
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+
+def normalize_chat_text(text: str, max_length: int) -> str:
+    """Quita caracteres de control/formato, colapsa espacios y recorta a `max_length`."""
+    if not text.isascii():
+        text = "".join(char for char in text if unicodedata.category(char) not in ("Cc", "Cf") or char.isspace())
+    elif not text.isprintable():
+        text = "".join(char for char in text if char.isprintable() or char.isspace())
+    return _WHITESPACE_RE.sub(" ", text).strip()[:max_length]
+
+
+def percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class StageStats:
+    """Contadores de una etapa: mensajes procesados, descartados y latencia acumulada desde la recepción."""
+
+    def __init__(self, name: str, samples: int = 4096):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.batches = 0
+        self.busy_s = 0.0
+        self.latencies: Deque[float] = deque(maxlen=samples)
+
+    def get_stats(self, elapsed_s: float) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+        return {
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "per_s": round(self.processed / elapsed_s, 1) if elapsed_s > 0 else 0.0,
+            "busy_pct": round(100 * self.busy_s / elapsed_s, 1) if elapsed_s > 0 else 0.0,
+            "p50_ms": round(p50 * 1000, 3) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 3) if p99 is not None else None,
+        }
+
+
+class ChatPipeline:
+    """
+    Pipeline asyncio de ingesta de chat: fuente -> normalizar -> moderar -> acciones.
+
+    Corre en un hilo propio con su bucle de eventos, así que `start()` vuelve de
+    inmediato (no bloquea el hilo de Flask que arrancó el módulo). Las etapas se
+    comunican por colas acotadas: si la moderación se retrasa, la ingesta deja de
+    leer del socket y la contrapresión llega a la fuente en lugar de acumular
+    memoria. La moderación procesa por lotes: en cada tick toma todo lo pendiente
+    (hasta `batch_size`) y llama una vez a `moderate_batch`. Con `tick_ms > 0`
+    espera ese tiempo para agrupar más mensajes cuando la cola está casi vacía.
+
+    `moderate_batch(textos) -> [resultado]` decide; `on_flagged(mensaje, resultado)`
+    retorna la acción a enviar a la fuente (o None).
+    """
+
+    STAGES = ("ingest", "normalize", "moderate", "actions")
+
+    def __init__(self, source: ChatSource, moderate_batch: Callable[[List[str]], List[Dict[str, Any]]],
+                 on_flagged: Optional[Callable[[ChatMessage, Dict[str, Any]], Optional[Dict[str, Any]]]] = None,
+                 queue_size: int = 1024, batch_size: int = 32, tick_ms: float = 0.0, max_length: int = 500,
+                 reconnect_max_s: float = 30.0):
+        self.source = source
+        self.moderate_batch = moderate_batch
+        self.on_flagged = on_flagged
+        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+        self.tick_s = tick_ms / 1000.0
+        self.max_length = max_length
+        self.reconnect_max_s = reconnect_max_s
+        self.stats = {name: StageStats(name) for name in self.STAGES}
+        self.connected = False
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._started_at = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run, name="chat-pipeline", daemon=True)
+        self._thread.start()
+        self._started.wait(5)
+
+    def stop(self, timeout: float = 5.0):
+        """Deja de leer de la fuente, termina lo que ya está en las colas y para el bucle."""
+        if not self.is_running:
+            return
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            logger.error(f"Chat pipeline crashed: {e}")
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._queues = {name: asyncio.Queue(self.queue_size) for name in ("normalize", "moderate", "actions")}
+        self._started_at = time.perf_counter()
+        ingest = asyncio.ensure_future(self._ingest())
+        workers = [asyncio.ensure_future(coro) for coro in (self._normalize(), self._moderate(), self._act())]
+        self._started.set()
+        await self._stop.wait()
+        ingest.cancel()
+        try:
+            for name in ("normalize", "moderate", "actions"):
+                await asyncio.wait_for(self._queues[name].join(), timeout=2.0)
+        except asyncio.TimeoutError:
+            logger.warning("Chat pipeline stopped with messages still queued")
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(ingest, *workers, return_exceptions=True)
+        await self.source.close()
+        self.connected = False
+
+    async def _ingest(self):
+        stats, queue = self.stats["ingest"], self._queues["normalize"]
+        retry_s = 1.0
+        while True:
+            try:
+                await self.source.connect()
+                self.connected, retry_s = True, 1.0
+                logger.info("Chat source connected")
+                async for message in self.source.messages():
+                    stats.processed += 1
+                    await queue.put(message) # Bloquea si la cola está llena: contrapresión hacia la fuente
+                    if stats.processed % self.batch_size == 0:
+                        # Con datos en el buffer ni readline() ni put() ceden el control: sin esto una
+                        # ráfaga entera se leería antes de que las demás etapas empiecen a moderarla
+                        await asyncio.sleep(0)
+                logger.warning("Chat source closed the connection")
+            except (ConnectionError, OSError) as e:
+                logger.warning(f"Chat source unavailable: {e}")
+            except Exception as e:
+                # Cualquier otro fallo de la fuente no debe terminar la ingesta: se reconecta
+                logger.error(f"Chat ingest failed, reconnecting: {e}")
+            self.connected = False
+            try:
+                await self.source.close() # Siempre antes de reconectar, para no dejar abierto el transporte anterior
+            except Exception as e:
+                logger.warning(f"Error closing chat source: {e}")
+            await asyncio.sleep(retry_s)
+            retry_s = min(retry_s * 2, self.reconnect_max_s)
+
+    async def _normalize(self):
+        stats, inbox, outbox = self.stats["normalize"], self._queues["normalize"], self._queues["moderate"]
+        while True:
+            message = await inbox.get()
+            text = normalize_chat_text(message.text, self.max_length)
+            if text:
+                stats.processed += 1
+                stats.latencies.append(time.perf_counter() - message.received_at)
+                await outbox.put(message._replace(text=text))
+                if stats.processed % self.batch_size == 0:
+                    await asyncio.sleep(0) # Igual que en la ingesta: dejar moderar el lote ya normalizado
+            else:
+                stats.dropped += 1
+            inbox.task_done()
+
+    async def _moderate(self):
+        stats, inbox, outbox = self.stats["moderate"], self._queues["moderate"], self._queues["actions"]
+        while True:
+            batch = [await inbox.get()]
+            if self.tick_s > 0 and inbox.qsize() < self.batch_size:
+                await asyncio.sleep(self.tick_s)
+            while len(batch) < self.batch_size and not inbox.empty():
+                batch.append(inbox.get_nowait())
+            started = time.perf_counter()
+            try:
+                results = self.moderate_batch([message.text for message in batch])
+            except Exception as e:
+                logger.error(f"Chat moderation failed for a batch of {len(batch)}: {e}")
+                results = []
+            decided = time.perf_counter()
+            stats.busy_s += decided - started
+            stats.batches += 1
+            stats.processed += len(results)
+            stats.dropped += len(batch) - len(results)
+            for message, result in zip(batch, results):
+                stats.latencies.append(decided - message.received_at)
+                if result.get("flagged"):
+                    await outbox.put((message, result))
+            for _ in batch:
+                inbox.task_done()
+
+    async def _act(self):
+        stats, inbox = self.stats["actions"], self._queues["actions"]
+        while True:
+            message, result = await inbox.get()
+            try:
+                action = self.on_flagged(message, result) if self.on_flagged else None
+                if action is not None:
+                    await self.source.send_action(action)
+                stats.processed += 1
+                stats.latencies.append(time.perf_counter() - message.received_at)
+            except Exception as e:
+                stats.dropped += 1
+                logger.error(f"Chat moderation action failed for message {message.id}: {e}")
+            finally:
+                inbox.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            "running": self.is_running,
+            "connected": self.connected,
+            "uptime_s": round(elapsed, 1),
+            "queue_depths": {name: queue.qsize() for name, queue in self._queues.items()},
+            "stages": {name: stage.get_stats(elapsed) for name, stage in self.stats.items()},
+        }
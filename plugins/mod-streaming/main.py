@@ -1,11 +1,15 @@
 import logging
-from typing import Optional, Dict, Any, List
+from collections import deque
+from typing import Optional, Dict, Any, Iterable, List
 import json
 
-from config.config import DEFAULT_LANG, STREAMING_OVERLAYS_DIR, STREAMING_ALERT_SOUNDS_DIR, STREAMING_MODERATION_KEYWORDS_FILE
+from config.config import DEFAULT_LANG, STREAMING_OVERLAYS_DIR, STREAMING_ALERT_SOUNDS_DIR, STREAMING_MODERATION_KEYWORDS_FILE, STREAMING_MODERATION_WHOLE_WORDS, STREAMING_MODERATION_ACTION, STREAMING_CHAT_SOURCE_URL, STREAMING_CHAT_QUEUE_SIZE, STREAMING_CHAT_BATCH_SIZE, STREAMING_CHAT_TICK_MS, STREAMING_CHAT_MAX_LENGTH
 from core.localization import get_translator
 from core.utils import get_logger, load_json_file, save_json_file
 from core.module_manager import module_manager
+from core.status_service import publish_status
+from .moderation import KeywordMatcher, mask_matches
+from .chat_pipeline import ChatMessage, ChatPipeline, ChatSource, NDJSONChatSource
 
 logger = get_logger(__name__)
 
@@ -15,6 +19,11 @@ class StreamingModule:
         self.is_active = False
         self.active_overlays: List[str] = []
         self.moderation_keywords: List[str] = []
+        self.moderation_matcher = KeywordMatcher(word_boundaries=STREAMING_MODERATION_WHOLE_WORDS)
+        self.messages_moderated = 0
+        self.messages_flagged = 0
+        self.chat_pipeline: Optional[ChatPipeline] = None
+        self.recent_flags = deque(maxlen=50) # Últimos mensajes marcados (para el panel del streamer)
         self.module_name = "mod-streaming"
 
     def initialize(self):
@@ -25,6 +34,7 @@ class StreamingModule:
             logger.warning(self._("[mod-streaming] No se encontraron palabras clave de moderación. Usando por defecto."))
             self.moderation_keywords = ["badword1", "badword2"]
             save_json_file(STREAMING_MODERATION_KEYWORDS_FILE, self.moderation_keywords)
+        self._rebuild_moderation_matcher()
 
         # Simulación de carga de assets de overlays
         logger.info(self._("[mod-streaming] Cargando assets de overlays desde %s (simulado)"), STREAMING_OVERLAYS_DIR)
@@ -36,9 +46,14 @@ class StreamingModule:
         logger.info(self._("[mod-streaming] Cargando configuración persistente..."))
         if "moderation_keywords" in settings:
             self.moderation_keywords = settings["moderation_keywords"]
+            self._rebuild_moderation_matcher()
         if "active_overlays" in settings:
             self.active_overlays = settings["active_overlays"]
 
+    def _rebuild_moderation_matcher(self):
+        """Compila el autómata de moderación a partir de la lista completa de palabras clave."""
+        self.moderation_matcher = KeywordMatcher(self.moderation_keywords, word_boundaries=STREAMING_MODERATION_WHOLE_WORDS)
+
     def save_settings(self):
         """Guarda la configuración actual del módulo en la DB."""
         logger.info(self._("[mod-streaming] Guardando configuración persistente..."))
@@ -78,8 +93,13 @@ class StreamingModule:
         # Conexión a APIs de chat (Twitch Chat, YouTube Live Chat) para monitorear
         # mensajes y aplicar reglas de moderación (filtrado de palabras, auto-mod).
         logger.info(self._("[mod-streaming] Iniciando monitoreo y moderación de chat."))
+        if STREAMING_CHAT_SOURCE_URL:
+            self.start_chat(NDJSONChatSource(STREAMING_CHAT_SOURCE_URL))
+        else:
+            logger.info(self._("[mod-streaming] Sin fuente de chat configurada (STREAMING_CHAT_SOURCE_URL)."))
 
         self.is_active = True
+        publish_status(self.module_name, is_active=True, active_overlays=self.active_overlays)
         logger.info(self._("[mod-streaming] Módulo de streaming iniciado."))
 
     def stop(self):
@@ -90,9 +110,11 @@ class StreamingModule:
 
         logger.info(self._("[mod-streaming] Deteniendo módulo de streaming..."))
         # Lógica para detener renderizado de overlays, alertas y moderación de chat.
+        self.stop_chat()
         self.active_overlays = []
         self.is_active = False
         self.save_settings()
+        publish_status(self.module_name, is_active=False, active_overlays=self.active_overlays)
         logger.info(self._("[mod-streaming] Módulo de streaming detenido."))
 
     def activate_overlay(self, overlay_name: str):
@@ -100,6 +122,7 @@ class StreamingModule:
         if overlay_name not in self.active_overlays:
             self.active_overlays.append(overlay_name)
             self.save_settings()
+            publish_status(self.module_name, active_overlays=self.active_overlays)
             logger.info(self._("[mod-streaming] Overlay '%s' activado."), overlay_name)
         else:
             logger.warning(self._("[mod-streaming] Overlay '%s' ya está activo."), overlay_name)
@@ -109,25 +132,83 @@ class StreamingModule:
         if overlay_name in self.active_overlays:
             self.active_overlays.remove(overlay_name)
             self.save_settings()
+            publish_status(self.module_name, active_overlays=self.active_overlays)
             logger.info(self._("[mod-streaming] Overlay '%s' desactivado."), overlay_name)
         else:
             logger.warning(self._("[mod-streaming] Overlay '%s' no está activo."), overlay_name)
 
     def add_moderation_keyword(self, keyword: str):
         """Añade una palabra clave a la lista de moderación."""
-        if keyword not in self.moderation_keywords:
+        if self.moderation_matcher.add(keyword): # Inserción incremental en el autómata
             self.moderation_keywords.append(keyword)
             save_json_file(STREAMING_MODERATION_KEYWORDS_FILE, self.moderation_keywords)
             self.save_settings()
+            publish_status(self.module_name, moderation_keywords_count=len(self.moderation_keywords))
             logger.info(self._("[mod-streaming] Palabra clave de moderación añadida: %s"), keyword)
         else:
             logger.warning(self._("[mod-streaming] Palabra clave '%s' ya existe en la lista de moderación."), keyword)
 
+    def start_chat(self, source: ChatSource):
+        """Arranca el pipeline de moderación en vivo en segundo plano (no bloquea al llamante)."""
+        if self.chat_pipeline is not None and self.chat_pipeline.is_running:
+            logger.warning(self._("[mod-streaming] El pipeline de chat ya está en marcha."))
+            return
+        self.chat_pipeline = ChatPipeline(source, self.moderate_batch, on_flagged=self._moderation_action,
+                                          queue_size=STREAMING_CHAT_QUEUE_SIZE, batch_size=STREAMING_CHAT_BATCH_SIZE,
+                                          tick_ms=STREAMING_CHAT_TICK_MS, max_length=STREAMING_CHAT_MAX_LENGTH)
+        self.chat_pipeline.start()
+        publish_status(self.module_name, chat_running=True)
+        logger.info(self._("[mod-streaming] Pipeline de chat iniciado."))
+
+    def stop_chat(self):
+        """Detiene el pipeline de chat tras procesar los mensajes ya recibidos."""
+        if self.chat_pipeline is None or not self.chat_pipeline.is_running:
+            return
+        self.chat_pipeline.stop()
+        publish_status(self.module_name, chat_running=False)
+        logger.info(self._("[mod-streaming] Pipeline de chat detenido."))
+
+    def _moderation_action(self, message: ChatMessage, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Acción para un mensaje marcado; se envía de vuelta a la plataforma de chat."""
+        keywords = sorted({match["keyword"] for match in result["matches"]})
+        self.recent_flags.append({"id": message.id, "user": message.user, "keywords": keywords,
+                                  "censored": result["censored"]})
+        if STREAMING_MODERATION_ACTION == "log":
+            logger.info(self._("[mod-streaming] Mensaje marcado de %s: %s"), message.user, result["censored"])
+            return None
+        return {"action": STREAMING_MODERATION_ACTION, "id": message.id, "user": message.user, "keywords": keywords}
+
+    def moderate(self, message: str) -> Dict[str, Any]:
+        """
+        Revisa un mensaje de chat contra las palabras clave de moderación.
+        Retorna {"flagged", "matches": [{"keyword", "start", "end"}], "censored"}.
+        """
+        matches = self.moderation_matcher.find(message)
+        self.messages_moderated += 1
+        if matches:
+            self.messages_flagged += 1
+        return {
+            "flagged": bool(matches),
+            "matches": [match._asdict() for match in matches],
+            "censored": mask_matches(message, matches) if matches else message,
+        }
+
+    def moderate_batch(self, messages: Iterable[str]) -> List[Dict[str, Any]]:
+        """Modera un lote de mensajes (p. ej. lo recibido del chat desde la última lectura)."""
+        return [self.moderate(message) for message in messages]
+
+    def get_chat_stats(self) -> Optional[Dict[str, Any]]:
+        """Contadores por etapa del pipeline de chat (None si nunca se ha iniciado)."""
+        return self.chat_pipeline.get_stats() if self.chat_pipeline is not None else None
+
     def get_status(self) -> Dict[str, Any]:
         """Retorna el estado actual del módulo de streaming."""
         return {
             "is_active": self.is_active,
             "active_overlays": self.active_overlays,
             "moderation_keywords_count": len(self.moderation_keywords),
+            "messages_moderated": self.messages_moderated,
+            "messages_flagged": self.messages_flagged,
+            "chat_running": self.chat_pipeline is not None and self.chat_pipeline.is_running,
         }
 
@@ -0,0 +1,177 @@
+import threading
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """Forma canónica para comparar: NFKC + casefold (ｂａｄ, BAD y bad son iguales)."""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def normalize_with_offsets(text: str) -> Tuple[str, List[int], List[int]]:
+    """
+    Normaliza `text` y retorna (normalizado, inicios, finales): para cada carácter del
+    texto normalizado, el rango [inicio, fin) que ocupa en el texto original. Se
+    normaliza por grupos (carácter base + marcas combinantes) para que "e\\u0301" y
+    "é" coincidan sin perder las posiciones originales.
+    """
+    if text.isascii():
+        positions = list(range(len(text)))
+        return text.lower(), positions, list(range(1, len(text) + 1))
+    normalized, starts, ends = [], [], []
+    i, length = 0, len(text)
+    while i < length:
+        j = i + 1
+        while j < length and unicodedata.combining(text[j]):
+            j += 1
+        for char in normalize_text(text[i:j]):
+            normalized.append(char)
+            starts.append(i)
+            ends.append(j)
+        i = j
+    return "".join(normalized), starts, ends
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatch(NamedTuple):
+    keyword: str # Palabra clave tal como se añadió
+    start: int # Posición en el mensaje original
+    end: int
+
+
+class _Automaton(NamedTuple):
+    goto: List[Dict[str, int]]
+    fail: List[int]
+    outputs: List[Tuple[int, ...]] # Índices de patrones que terminan en cada nodo (incluye los de la cadena de fallo)
+
+
+class KeywordMatcher:
+    """
+    Buscador multi-patrón Aho–Corasick para la moderación de chat: el coste de
+    `find()` depende de la longitud del mensaje y del número de coincidencias, no
+    del número de palabras clave.
+
+    Las palabras clave y los mensajes se comparan en forma NFKC + casefold. Con
+    `word_boundaries` (por defecto, o por palabra clave en `add()`) solo cuentan las
+    coincidencias que no están pegadas a otra letra o dígito ("class" no coincide con
+    "ass"). `add()` inserta en el trie de forma incremental; los enlaces de fallo se
+    recalculan una sola vez en la siguiente búsqueda, así que añadir muchas palabras
+    seguidas no recompila el autómata en cada una.
+    """
+
+    def __init__(self, keywords: Iterable[str] = (), word_boundaries: bool = True):
+        self.word_boundaries = word_boundaries
+        self._trie: List[Dict[str, int]] = [{}]
+        self._terminal: Dict[int, int] = {} # nodo -> índice del patrón
+        self._keywords: List[str] = []
+        self._pattern_lengths: List[int] = []
+        self._pattern_boundaries: List[bool] = []
+        self._index: Dict[str, int] = {} # forma normalizada -> índice del patrón
+        self._automaton: Optional[_Automaton] = None
+        self._lock = threading.Lock()
+        self.compilations = 0
+        for keyword in keywords:
+            self.add(keyword)
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def __contains__(self, keyword: str) -> bool:
+        return normalize_text(keyword.strip()) in self._index
+
+    def add(self, keyword: str, word_boundaries: Optional[bool] = None) -> bool:
+        """Añade una palabra clave. Retorna False si está vacía o ya existía (tras normalizar)."""
+        pattern = normalize_text(keyword.strip())
+        if not pattern:
+            return False
+        with self._lock:
+            if pattern in self._index:
+                return False
+            node = 0
+            for char in pattern:
+                next_node = self._trie[node].get(char)
+                if next_node is None:
+                    next_node = len(self._trie)
+                    self._trie.append({})
+                    self._trie[node][char] = next_node
+                node = next_node
+            pattern_index = len(self._keywords)
+            self._terminal[node] = pattern_index
+            self._index[pattern] = pattern_index
+            self._keywords.append(keyword)
+            self._pattern_lengths.append(len(pattern))
+            self._pattern_boundaries.append(self.word_boundaries if word_boundaries is None else word_boundaries)
+            self._automaton = None
+        return True
+
+    def _compile(self) -> _Automaton:
+        with self._lock:
+            if self._automaton is not None:
+                return self._automaton
+            goto = [dict(children) for children in self._trie]
+            fail = [0] * len(goto)
+            outputs: List[Tuple[int, ...]] = [()] * len(goto)
+            queue = deque()
+            for child in goto[0].values():
+                outputs[child] = (self._terminal[child],) if child in self._terminal else ()
+                queue.append(child)
+            while queue:
+                node = queue.popleft()
+                for char, child in goto[node].items():
+                    state = fail[node]
+                    while state and char not in goto[state]:
+                        state = fail[state]
+                    fail[child] = goto[state].get(char, 0)
+                    own = (self._terminal[child],) if child in self._terminal else ()
+                    outputs[child] = own + outputs[fail[child]]
+                    queue.append(child)
+            self._automaton = _Automaton(goto, fail, outputs)
+            self.compilations += 1
+            return self._automaton
+
+    def find(self, message: str) -> List[KeywordMatch]:
+        """Todas las coincidencias de `message` (posiciones en el texto original)."""
+        if not self._keywords or not message:
+            return []
+        goto, fail, outputs = self._compile()
+        text, starts, ends = normalize_with_offsets(message)
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_index in outputs[state]:
+                first = position - self._pattern_lengths[pattern_index] + 1
+                if self._pattern_boundaries[pattern_index] and not self._at_boundaries(text, first, position + 1):
+                    continue
+                matches.append(KeywordMatch(self._keywords[pattern_index], starts[first], ends[position]))
+        matches.sort(key=lambda match: (match.start, -match.end))
+        return matches
+
+    @staticmethod
+    def _at_boundaries(text: str, start: int, end: int) -> bool:
+        # Como \b de las expresiones regulares: solo se exige frontera en los extremos de tipo palabra
+        if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and _is_word_char(text[end - 1]) and _is_word_char(text[end]):
+            return False
+        return True
+
+    @property
+    def keywords(self) -> List[str]:
+        return list(self._keywords)
+
+
+def mask_matches(message: str, matches: Iterable[KeywordMatch], mask_char: str = "*") -> str:
+    """Sustituye los rangos coincidentes por `mask_char` (los solapes se fusionan)."""
+    chars = list(message)
+    for match in matches:
+        for i in range(match.start, match.end):
+            if not chars[i].isspace():
+                chars[i] = mask_char
+    return "".join(chars)
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from cryptography.fernet import Fernet
+
+from core.utils import get_logger, is_gevent_patched
+
+logger = get_logger(__name__)
+
+
+def _zeroize(buffer: bytearray):
+    buffer[:] = bytes(len(buffer))
+
+
+class DecryptedEntryCache:
+    """
+    Caché corta y acotada en memoria del texto descifrado de entradas del diario,
+    por (usuario, entrada). El texto se guarda en un `bytearray` que se sobrescribe
+    con ceros al expulsarlo (por LRU, por caducidad o por invalidación), de modo que
+    la caché no deja copias del texto en claro en memoria liberada. Las cadenas
+    devueltas a quien llama son copias normales de Python y no se pueden borrar así.
+    """
+
+    def __init__(self, max_bytes: int, ttl_s: float, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[bytearray, float]]" = OrderedDict()
+        self._by_user: Dict[int, set] = {}
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remove(self, key: Tuple[int, int]):
+        buffer, _ = self._entries.pop(key)
+        self.size_bytes -= len(buffer)
+        _zeroize(buffer)
+        user_keys = self._by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key[1])
+            if not user_keys:
+                del self._by_user[key[0]]
+
+    def get(self, user_id: int, entry_id: int) -> Optional[str]:
+        key = (user_id, entry_id)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                self.misses += 1
+                return None
+            buffer, expires_at = cached
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return buffer.decode("utf-8")
+
+    def put(self, user_id: int, entry_id: int, plaintext: bytes):
+        if self.max_bytes <= 0 or len(plaintext) > self.max_bytes:
+            return
+        key = (user_id, entry_id)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (bytearray(plaintext), self._clock() + self.ttl_s)
+            self._by_user.setdefault(user_id, set()).add(entry_id)
+            self.size_bytes += len(plaintext)
+            while self.size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int):
+        """Borra (y pone a cero) todo lo cacheado de un usuario; se llama en cada escritura de su diario."""
+        with self._lock:
+            for entry_id in list(self._by_user.get(user_id, ())):
+                self._remove((user_id, entry_id))
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "size_bytes": self.size_bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class JournalDecryptor:
+    """
+    Descifrado Fernet por lotes. Con más de `min_parallel` tokens el lote se parte en
+    trozos de `chunk_size` que se descifran en un pool de `workers` hilos (OpenSSL
+    hace el trabajo de AES y HMAC); con menos, se descifra en el hilo que llama para
+    no pagar el reparto. Bajo gevent se usa el threadpool de gevent (hilos reales).
+    """
+
+    def __init__(self, fernet: Fernet, workers: int = 4, chunk_size: int = 64, min_parallel: int = 128):
+        self.fernet = fernet
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.min_parallel = min_parallel
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if is_gevent_patched():
+                    from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+                    self._executor = GeventThreadPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="journal-decrypt")
+            return self._executor
+
+    def _decrypt_chunk(self, tokens: List[bytes]) -> List[Union[bytes, Exception]]:
+        results: List[Union[bytes, Exception]] = []
+        for token in tokens:
+            try:
+                results.append(self.fernet.decrypt(token))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def decrypt_many(self, tokens: List[bytes]) -> List[Union[bytes, Exception]]:
+        """Descifra en orden; un token ilegible da su excepción en esa posición en lugar de abortar el lote."""
+        if self.workers == 1 or len(tokens) < self.min_parallel:
+            return self._decrypt_chunk(tokens)
+        executor = self._get_executor()
+        chunks = [tokens[i:i + self.chunk_size] for i in range(0, len(tokens), self.chunk_size)]
+        results: List[Union[bytes, Exception]] = []
+        for chunk_results in executor.map(self._decrypt_chunk, chunks):
+            results.extend(chunk_results)
+        return results
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
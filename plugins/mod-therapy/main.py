@@ -1,37 +1,68 @@
+import base64
 import logging
-import os
-from typing import Optional, Dict, Any, List
+from collections import Counter
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
 from cryptography.fernet import Fernet, InvalidToken
-from datetime import datetime
+from datetime import date, datetime
 
-from config.config import DEFAULT_LANG, ENCRYPTION_KEY, THERAPY_JOURNAL_ENCRYPTED_FILE, THERAPY_SENTIMENT_MODEL_PATH
+from config.config import DEFAULT_LANG, ENCRYPTION_KEY, THERAPY_JOURNAL_ENCRYPTED_FILE, THERAPY_SENTIMENT_MODEL_PATH, THERAPY_SENTIMENT_SCORER, THERAPY_SENTIMENT_LEXICON_FILE, THERAPY_JOURNAL_PAGE_SIZE, THERAPY_JOURNAL_MAX_PAGE_SIZE, THERAPY_JOURNAL_EXPORT_BATCH_SIZE, THERAPY_DECRYPT_WORKERS, THERAPY_DECRYPT_CHUNK_SIZE, THERAPY_DECRYPT_MIN_PARALLEL, THERAPY_PLAINTEXT_CACHE_MAX_BYTES, THERAPY_PLAINTEXT_CACHE_TTL_S
 from core.localization import get_translator
-from core.utils import get_logger
-from core.database import get_db, JournalEntry
+from core.utils import get_logger, load_json_file, save_json_file
+from core.database import get_db, JournalEntry, JournalSentimentAggregate, SENTIMENT_PERIODS, increment_sentiment_aggregates, sentiment_bucket_start
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from core.module_manager import module_manager
+from core.status_service import publish_status
+from .journal_crypto import DecryptedEntryCache, JournalDecryptor
+from .sentiment import SENTIMENT_LABELS, SentimentScorer, create_sentiment_scorer
 
 logger = get_logger(__name__)
 
+# Columnas que se leen del diario: sin cargar objetos ORM completos
+_JOURNAL_COLUMNS = (JournalEntry.id, JournalEntry.encrypted_content, JournalEntry.sentiment_analysis, JournalEntry.created_at)
+
+def encode_journal_cursor(created_at: datetime, entry_id: int) -> str:
+    """Cursor opaco de paginación: posición (created_at, id) de la última entrada devuelta."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{entry_id}".encode("ascii")).decode("ascii")
+
+def decode_journal_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverso de `encode_journal_cursor`. Lanza ValueError si el cursor no es válido."""
+    try:
+        created_at, entry_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split("|")
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid journal cursor: {cursor!r}") from e
+
 class TherapyModule:
     def __init__(self):
         self._ = get_translator(DEFAULT_LANG)
         self.is_active = False
         self.fernet = Fernet(ENCRYPTION_KEY)
-        self.sentiment_model = None # Placeholder para modelo de sentimiento
+        self.decryptor = JournalDecryptor(self.fernet, THERAPY_DECRYPT_WORKERS, THERAPY_DECRYPT_CHUNK_SIZE, THERAPY_DECRYPT_MIN_PARALLEL)
+        self.plaintext_cache = DecryptedEntryCache(THERAPY_PLAINTEXT_CACHE_MAX_BYTES, THERAPY_PLAINTEXT_CACHE_TTL_S)
+        self.sentiment_scorer: SentimentScorer = create_sentiment_scorer(THERAPY_SENTIMENT_SCORER, THERAPY_SENTIMENT_MODEL_PATH,
+                                                                         load_json_file(THERAPY_SENTIMENT_LEXICON_FILE))
         self.module_name = "mod-therapy"
 
     def initialize(self):
-        """Carga el modelo de análisis de sentimiento."""
+        """Prepara el análisis de sentimiento y los agregados del diario."""
         logger.info(self._("[mod-therapy] Inicializando módulo de terapia..."))
-        # --- Carga de modelo de sentimiento (NO SIMULADA) ---
-        # Aquí se cargaría un modelo de Machine Learning para análisis de sentimiento.
-        # Ejemplo: from joblib import load; self.sentiment_model = load(THERAPY_SENTIMENT_MODEL_PATH)
-        if os.path.exists(THERAPY_SENTIMENT_MODEL_PATH):
-            logger.info(self._("[mod-therapy] Cargando modelo de sentimiento desde %s (simulado)"), THERAPY_SENTIMENT_MODEL_PATH)
-            # self.sentiment_model = load(THERAPY_SENTIMENT_MODEL_PATH)
+        # El modelo (si lo hay) se carga en el primer análisis, no al arrancar
+        if self.sentiment_scorer.name == "sklearn":
+            logger.info(self._("[mod-therapy] Análisis de sentimiento con el modelo de %s."), THERAPY_SENTIMENT_MODEL_PATH)
         else:
-            logger.warning(self._("[mod-therapy] No se encontró modelo de sentimiento en %s. El análisis será básico."), THERAPY_SENTIMENT_MODEL_PATH)
+            logger.warning(self._("[mod-therapy] No se encontró modelo de sentimiento en %s. El análisis será por léxico."), THERAPY_SENTIMENT_MODEL_PATH)
+
+        # Diarios anteriores a la tabla de agregados: calcularlos una vez
+        try:
+            db: Session
+            for db in get_db():
+                needs_backfill = db.query(JournalSentimentAggregate.id).first() is None and db.query(JournalEntry.id).first() is not None
+            if needs_backfill:
+                self.rebuild_sentiment_aggregates()
+        except SQLAlchemyError as e:
+            logger.error(self._("[mod-therapy] No se pudieron comprobar los agregados de sentimiento: %s"), e)
 
         logger.info(self._("[mod-therapy] Módulo de terapia inicializado."))
 
@@ -55,6 +86,7 @@ class TherapyModule:
             return
         logger.info(self._("[mod-therapy] Iniciando módulo de terapia."))
         self.is_active = True
+        publish_status(self.module_name, is_active=True)
 
     def stop(self):
         """Detiene el módulo de terapia."""
@@ -62,7 +94,9 @@ class TherapyModule:
             logger.warning(self._("[mod-therapy] El módulo de terapia no está activo."))
             return
         logger.info(self._("[mod-therapy] Deteniendo módulo de terapia."))
+        self.plaintext_cache.clear() # No dejar texto descifrado en memoria
         self.is_active = False
+        publish_status(self.module_name, is_active=False)
 
     def add_journal_entry(self, user_id: int, content: str) -> bool:
         """Añade una entrada al diario cifrado y realiza análisis de sentimiento."""
@@ -80,7 +114,9 @@ class TherapyModule:
                     created_at=datetime.now()
                 )
                 db.add(new_entry)
+                increment_sentiment_aggregates(db, user_id, new_entry.created_at, sentiment)
                 db.commit()
+                self.plaintext_cache.invalidate_user(user_id)
                 db.refresh(new_entry)
                 logger.info(self._("[mod-therapy] Entrada de diario guardada (ID: %d, Sentimiento: %s)."), new_entry.id, sentiment)
                 return True
@@ -88,53 +124,298 @@ class TherapyModule:
             logger.error(self._("[mod-therapy] Error al añadir entrada de diario: %s"), e)
             return False
 
-    def get_journal_entries(self, user_id: int) -> List[Dict[str, Any]]:
-        """Recupera y descifra las entradas del diario para un usuario."""
-        logger.info(self._("[mod-therapy] Recuperando entradas de diario para usuario %d..."), user_id)
-        entries = []
-        db: Session
-        for db in get_db():
-            journal_entries = db.query(JournalEntry).filter_by(user_id=user_id).all()
-            for entry in journal_entries:
+    def _journal_query(self, db: Session, user_id: int, after: Optional[Tuple[datetime, int]], newest_first: bool):
+        """Entradas de un usuario después de la posición `after` según el orden (created_at, id)."""
+        query = db.query(*_JOURNAL_COLUMNS).filter(JournalEntry.user_id == user_id)
+        if after is not None:
+            created_at, entry_id = after
+            if newest_first:
+                query = query.filter(or_(JournalEntry.created_at < created_at,
+                                         and_(JournalEntry.created_at == created_at, JournalEntry.id < entry_id)))
+            else:
+                query = query.filter(or_(JournalEntry.created_at > created_at,
+                                         and_(JournalEntry.created_at == created_at, JournalEntry.id > entry_id)))
+        if newest_first:
+            return query.order_by(JournalEntry.created_at.desc(), JournalEntry.id.desc())
+        return query.order_by(JournalEntry.created_at.asc(), JournalEntry.id.asc())
+
+    def _decrypt_rows(self, user_id: int, rows, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Descifra filas (id, encrypted_content, sentiment, created_at) en orden; las
+        ilegibles se registran y se omiten. Con `use_cache`, las entradas ya descifradas
+        hace poco salen de `plaintext_cache` y solo el resto pasa por el descifrado
+        por lotes de `decryptor`.
+        """
+        contents: Dict[int, str] = {}
+        pending = []
+        for row in rows:
+            cached = self.plaintext_cache.get(user_id, row.id) if use_cache else None
+            if cached is None:
+                pending.append(row)
+            else:
+                contents[row.id] = cached
+        if pending:
+            results = self.decryptor.decrypt_many([row.encrypted_content.encode('utf-8') for row in pending])
+            for row, result in zip(pending, results):
                 try:
-                    decrypted_content = self.fernet.decrypt(entry.encrypted_content.encode('utf-8')).decode('utf-8')
-                    entries.append({
-                        "id": entry.id,
-                        "content": decrypted_content,
-                        "sentiment": entry.sentiment_analysis,
-                        "created_at": entry.created_at.isoformat()
-                    })
+                    if isinstance(result, Exception):
+                        raise result
+                    contents[row.id] = result.decode('utf-8')
                 except InvalidToken:
-                    logger.error(self._("[mod-therapy] Error de token inválido al descifrar entrada %d. Posible corrupción o clave incorrecta."), entry.id)
+                    logger.error(self._("[mod-therapy] Error de token inválido al descifrar entrada %d. Posible corrupción o clave incorrecta."), row.id)
                 except Exception as e:
-                    logger.error(self._("[mod-therapy] Error al descifrar entrada %d: %s"), entry.id, e)
+                    logger.error(self._("[mod-therapy] Error al descifrar entrada %d: %s"), row.id, e)
+                else:
+                    if use_cache:
+                        self.plaintext_cache.put(user_id, row.id, result)
+        return [{
+            "id": row.id,
+            "content": contents[row.id],
+            "sentiment": row.sentiment_analysis,
+            "created_at": row.created_at.isoformat()
+        } for row in rows if row.id in contents]
+
+    def get_journal_page(self, user_id: int, limit: int = THERAPY_JOURNAL_PAGE_SIZE, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Una página del diario, de la entrada más reciente a la más antigua. Solo se leen
+        y descifran las entradas de la página: el coste no depende del historial total.
+        `next_cursor` es None en la última página. Lanza ValueError si el cursor no es válido.
+        """
+        limit = max(1, min(limit, THERAPY_JOURNAL_MAX_PAGE_SIZE))
+        after = decode_journal_cursor(cursor) if cursor else None
+        rows = []
+        db: Session
+        for db in get_db():
+            rows = self._journal_query(db, user_id, after, newest_first=True).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "entries": self._decrypt_rows(user_id, rows),
+            "next_cursor": encode_journal_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+        }
+
+    def export_journal_entries(self, user_id: int, decrypt: bool = True,
+                               batch_size: int = THERAPY_JOURNAL_EXPORT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Genera todas las entradas de un usuario en orden cronológico, leyendo lotes de
+        `batch_size` con paginación por cursor (cada lote con su propia sesión, sin
+        mantener una conexión durante toda la exportación). Con `decrypt=False` se
+        exportan los tokens cifrados tal cual (copia de seguridad cifrada).
+        """
+        after = None
+        while True:
+            db: Session
+            for db in get_db():
+                rows = self._journal_query(db, user_id, after, newest_first=False).limit(batch_size).all()
+            if not rows:
+                return
+            if decrypt:
+                # Sin caché: una exportación completa expulsaría las páginas recientes
+                yield from self._decrypt_rows(user_id, rows, use_cache=False)
+            else:
+                for row in rows:
+                    yield {"id": row.id, "encrypted_content": row.encrypted_content,
+                           "sentiment": row.sentiment_analysis, "created_at": row.created_at.isoformat()}
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1].created_at, rows[-1].id)
+
+    def import_journal_entries(self, user_id: int, records: Iterable[Dict[str, Any]],
+                               batch_size: int = THERAPY_JOURNAL_EXPORT_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Importa entradas (el formato de `export_journal_entries`) en lotes con una sola
+        inserción por lote. Cada registro trae `content` (se cifra y se analiza con el
+        resto del lote) o
+        `encrypted_content` (se comprueba que se puede descifrar con la clave actual
+        y se guarda tal cual). Los registros no válidos se omiten.
+        """
+        imported = skipped = 0
+        batch: List[Dict[str, Any]] = []
+
+        def flush():
+            # Las entradas en claro del lote se puntúan juntas con una sola llamada al analizador
+            to_score = [row for row in batch if "content" in row]
+            for row, sentiment in zip(to_score, self.sentiment_scorer.score_batch([row.pop("content") for row in to_score])):
+                row["sentiment_analysis"] = sentiment
+            db: Session
+            for db in get_db():
+                db.bulk_insert_mappings(JournalEntry, batch)
+                # Un incremento por día y sentimiento del lote, en la misma transacción
+                per_day = Counter((row["created_at"].date(), row["sentiment_analysis"]) for row in batch)
+                for (day, sentiment), count in per_day.items():
+                    increment_sentiment_aggregates(db, user_id, datetime.combine(day, datetime.min.time()), sentiment, count)
+                db.commit()
+            self.plaintext_cache.invalidate_user(user_id)
+            batch.clear()
+
+        for record in records:
+            try:
+                created_at = datetime.fromisoformat(record["created_at"]) if record.get("created_at") else datetime.now()
+                if record.get("content") is not None:
+                    content = str(record["content"])
+                    row = {"content": content, "encrypted_content": self.fernet.encrypt(content.encode('utf-8')).decode('utf-8')}
+                else:
+                    encrypted_content = str(record["encrypted_content"])
+                    self.fernet.extract_timestamp(encrypted_content.encode('utf-8')) # Verifica la firma sin descifrar
+                    # La etiqueta la envía el cliente: solo se aceptan las del analizador; el resto queda sin clasificar
+                    sentiment = record.get("sentiment")
+                    row = {"encrypted_content": encrypted_content, "sentiment_analysis": sentiment if sentiment in SENTIMENT_LABELS else None}
+            except (KeyError, ValueError, TypeError, AttributeError, InvalidToken) as e:
+                skipped += 1
+                logger.warning(self._("[mod-therapy] Registro de diario omitido en la importación: %s"), type(e).__name__)
+                continue
+            row.update(user_id=user_id, created_at=created_at)
+            batch.append(row)
+            imported += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        logger.info(self._("[mod-therapy] %d entradas de diario importadas para usuario %d (%d omitidas)."), imported, user_id, skipped)
+        return {"imported": imported, "skipped": skipped}
+
+    def get_journal_entries(self, user_id: int) -> List[Dict[str, Any]]:
+        """Recupera y descifra todas las entradas del diario de un usuario (ver `get_journal_page`)."""
+        logger.info(self._("[mod-therapy] Recuperando entradas de diario para usuario %d..."), user_id)
+        entries = list(self.export_journal_entries(user_id))
         logger.info(self._("[mod-therapy] %d entradas de diario recuperadas para usuario %d."), len(entries), user_id)
         return entries
 
-    def _analyze_sentiment(self, text: str) -> str:
-        """Realiza análisis de sentimiento sobre el texto."""
-        # --- Lógica de análisis de sentimiento (NO SIMULADA) ---
-        # Si self.sentiment_model está cargado, usarlo para predecir el sentimiento.
-        # Ejemplo conceptual con un modelo simple:
-        if self.sentiment_model:
-            # prediction = self.sentiment_model.predict([text])
-            # return "positive" if prediction[0] == 1 else "negative" # Ejemplo binario
-            return "neutral" # Placeholder
-        else:
-            # Análisis de sentimiento muy básico basado en palabras clave
-            text_lower = text.lower()
-            if any(word in text_lower for word in ["feliz", "alegre", "amor", "positivo"]):
-                return "positive"
-            elif any(word in text_lower for word in ["triste", "enojado", "miedo", "negativo"]):
-                return "negative"
+    def rescore_journal(self, user_id: Optional[int] = None,
+                        batch_size: int = THERAPY_JOURNAL_EXPORT_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Vuelve a analizar el sentimiento de las entradas guardadas (de un usuario o de
+        todos) con el analizador actual, p. ej. tras cambiar el léxico o el modelo. Se
+        recorre el diario por lotes: descifrado por lotes, `score_batch` sobre el lote
+        y una sola actualización con las filas cuyo sentimiento cambió. Al terminar se
+        recalculan los agregados. Las entradas ilegibles conservan su sentimiento.
+        """
+        scored = changed = 0
+        db: Session
+        for db in get_db():
+            if user_id is not None:
+                user_ids = [user_id]
             else:
-                return "neutral"
+                user_ids = [owner for (owner,) in db.query(JournalEntry.user_id).distinct().order_by(JournalEntry.user_id)]
+            for owner in user_ids:
+                after = None
+                while True:
+                    rows = self._journal_query(db, owner, after, newest_first=False).limit(batch_size).all()
+                    if not rows:
+                        break
+                    entries = self._decrypt_rows(owner, rows, use_cache=False)
+                    sentiments = self.sentiment_scorer.score_batch([entry["content"] for entry in entries])
+                    updates = [{"id": entry["id"], "sentiment_analysis": sentiment}
+                               for entry, sentiment in zip(entries, sentiments) if entry["sentiment"] != sentiment]
+                    if updates:
+                        db.bulk_update_mappings(JournalEntry, updates)
+                        db.commit()
+                    scored += len(entries)
+                    changed += len(updates)
+                    if len(rows) < batch_size:
+                        break
+                    after = (rows[-1].created_at, rows[-1].id)
+        if changed:
+            self.rebuild_sentiment_aggregates(user_id)
+        logger.info(self._("[mod-therapy] Sentimiento recalculado: %d entradas analizadas, %d cambiadas."), scored, changed)
+        return {"scored": scored, "changed": changed}
+
+    def update_lexicon(self, lexicon: Dict[str, float]) -> bool:
+        """Guarda un nuevo léxico {palabra: peso} y lo aplica a los análisis siguientes (no a los ya guardados: ver `rescore_journal`)."""
+        try:
+            lexicon = {str(word): float(weight) for word, weight in lexicon.items()}
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.error(self._("[mod-therapy] Léxico de sentimiento no válido: %s"), e)
+            return False
+        if not save_json_file(THERAPY_SENTIMENT_LEXICON_FILE, lexicon):
+            return False
+        self.sentiment_scorer = create_sentiment_scorer(THERAPY_SENTIMENT_SCORER, THERAPY_SENTIMENT_MODEL_PATH, lexicon)
+        logger.info(self._("[mod-therapy] Léxico de sentimiento actualizado (%d términos)."), len(lexicon))
+        return True
+
+    def rebuild_sentiment_aggregates(self, user_id: Optional[int] = None) -> int:
+        """
+        Recalcula los agregados de sentimiento (de un usuario o de todos) a partir de la
+        columna de sentimiento del diario, sin descifrar contenido. Solo hace falta tras
+        migrar datos antiguos o borrar entradas fuera de este módulo. Retorna las
+        entradas contadas.
+        """
+        counts: Counter = Counter()
+        db: Session
+        for db in get_db():
+            query = db.query(JournalEntry.user_id, JournalEntry.created_at, JournalEntry.sentiment_analysis)
+            if user_id is not None:
+                query = query.filter(JournalEntry.user_id == user_id)
+            for row in query.yield_per(1000):
+                created_at = row.created_at or datetime.now()
+                for period in SENTIMENT_PERIODS:
+                    counts[(row.user_id, period, sentiment_bucket_start(created_at, period), row.sentiment_analysis or "unknown")] += 1
+            stale = db.query(JournalSentimentAggregate)
+            if user_id is not None:
+                stale = stale.filter(JournalSentimentAggregate.user_id == user_id)
+            stale.delete(synchronize_session=False)
+            db.bulk_insert_mappings(JournalSentimentAggregate, [
+                {"user_id": owner, "period": period, "bucket_start": bucket_start, "sentiment": sentiment, "count": count}
+                for (owner, period, bucket_start, sentiment), count in counts.items()])
+            db.commit()
+        entries = sum(count for (_, period, _, _), count in counts.items() if period == "day")
+        logger.info(self._("[mod-therapy] Agregados de sentimiento recalculados: %d entradas."), entries)
+        return entries
+
+    def get_mood_trend(self, user_id: int, period: str = "day", start: Optional[date] = None,
+                       end: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Tendencia de ánimo: recuento por sentimiento de cada día o semana (solo los
+        periodos con entradas) entre `start` y `end` inclusive. Se responde solo con la
+        tabla de agregados: el coste depende del número de periodos, no de entradas.
+        """
+        if period not in SENTIMENT_PERIODS:
+            raise ValueError(f"Invalid period: {period}")
+        buckets: Dict[date, Dict[str, int]] = {}
+        db: Session
+        for db in get_db():
+            query = db.query(JournalSentimentAggregate.bucket_start, JournalSentimentAggregate.sentiment, JournalSentimentAggregate.count).filter(
+                JournalSentimentAggregate.user_id == user_id, JournalSentimentAggregate.period == period)
+            if start is not None:
+                query = query.filter(JournalSentimentAggregate.bucket_start >= sentiment_bucket_start(datetime.combine(start, datetime.min.time()), period))
+            if end is not None:
+                query = query.filter(JournalSentimentAggregate.bucket_start <= end)
+            for bucket_start, sentiment, count in query.order_by(JournalSentimentAggregate.bucket_start):
+                buckets.setdefault(bucket_start, {})[sentiment] = count
+        totals: Counter = Counter()
+        for counts in buckets.values():
+            totals.update(counts)
+        return {
+            "period": period,
+            "buckets": [{"start": bucket_start.isoformat(), "counts": counts, "total": sum(counts.values())}
+                        for bucket_start, counts in buckets.items()],
+            "totals": dict(totals),
+        }
+
+    def count_journal_entries(self, user_id: Optional[int] = None) -> Optional[int]:
+        """Entradas del diario (de un usuario o de todos) según los agregados diarios; None si la DB no responde."""
+        try:
+            db: Session
+            for db in get_db():
+                query = db.query(func.coalesce(func.sum(JournalSentimentAggregate.count), 0)).filter(JournalSentimentAggregate.period == "day")
+                if user_id is not None:
+                    query = query.filter(JournalSentimentAggregate.user_id == user_id)
+                return int(query.scalar())
+        except SQLAlchemyError as e:
+            logger.error(self._("[mod-therapy] Error al contar entradas de diario: %s"), e)
+            return None
+
+    def _analyze_sentiment(self, text: str) -> str:
+        """Realiza análisis de sentimiento sobre el texto (para varios textos, `sentiment_scorer.score_batch`)."""
+        return self.sentiment_scorer.score(text)
 
     def get_status(self) -> Dict[str, Any]:
         """Retorna el estado actual del módulo de terapia."""
         return {
             "is_active": self.is_active,
-            "sentiment_model_loaded": self.sentiment_model is not None,
-            "journal_entries_count": 0 # Esto debería ser consultado de la DB para el usuario actual
+            "sentiment_model_loaded": getattr(self.sentiment_scorer, "loaded", False),
+            "sentiment_scorer": self.sentiment_scorer.get_stats(),
+            "journal_entries_count": self.count_journal_entries(), # Todas las entradas, desde los agregados
+            "plaintext_cache": self.plaintext_cache.get_stats(),
         }
 
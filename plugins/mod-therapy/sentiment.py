@@ -0,0 +1,151 @@
+import abc
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+POSITIVE, NEGATIVE, NEUTRAL = "positive", "negative", "neutral"
+SENTIMENT_LABELS = (POSITIVE, NEGATIVE, NEUTRAL)
+
+# Léxico por defecto: las palabras clave del análisis básico original
+# y sus formas más comunes (el léxico se compara por palabra completa, no por subcadena)
+DEFAULT_LEXICON: Dict[str, float] = {
+    "feliz": 1.0, "felices": 1.0, "alegre": 1.0, "alegres": 1.0, "alegría": 1.0,
+    "amor": 1.0, "positivo": 1.0, "positiva": 1.0,
+    "triste": -1.0, "tristes": -1.0, "tristeza": -1.0, "enojado": -1.0, "enojada": -1.0,
+    "miedo": -1.0, "miedos": -1.0, "negativo": -1.0, "negativa": -1.0,
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class SentimentScorer(abc.ABC):
+    """Interfaz de los analizadores de sentimiento: `score_batch(textos) -> [etiqueta]`."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def score_batch(self, texts: Sequence[str]) -> List[str]:
+        """Etiqueta de cada texto del lote, en el mismo orden."""
+
+    def score(self, text: str) -> str:
+        return self.score_batch([text])[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"name": self.name}
+
+
+class LexiconScorer(SentimentScorer):
+    """
+    Léxico compilado en un vector de pesos denso: cada término tiene su propia
+    posición y la última, con peso 0, recoge cualquier token fuera del léxico. Para
+    un lote se tokenizan todos los textos, cada token se traduce a su posición con
+    un diccionario y la puntuación de cada texto es el producto escalar de sus
+    recuentos de tokens con el vector de pesos, calculado para todo el lote con una
+    sola llamada a NumPy (`bincount` ponderado). Cambiar el léxico solo reconstruye
+    el vector.
+    """
+
+    name = "lexicon"
+
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None, threshold: float = 0.0):
+        if lexicon is None:
+            lexicon = DEFAULT_LEXICON
+        self.lexicon: Dict[str, float] = {}
+        for word, weight in lexicon.items():
+            word = word.lower()
+            self.lexicon[word] = self.lexicon.get(word, 0.0) + float(weight)
+        self.threshold = threshold
+        self._ids: Dict[str, int] = {word: i for i, word in enumerate(self.lexicon)}
+        self._unknown_id = len(self._ids)
+        self.weights = np.zeros(len(self._ids) + 1, dtype=np.float32)
+        self.weights[:self._unknown_id] = list(self.lexicon.values())
+
+    def scores(self, texts: Sequence[str]) -> np.ndarray:
+        """Puntuación continua de cada texto (suma de pesos de sus tokens)."""
+        per_text = [_TOKEN_RE.findall(text.lower()) for text in texts]
+        tokens = [token for text_tokens in per_text for token in text_tokens]
+        if not tokens:
+            return np.zeros(len(texts), dtype=np.float64)
+        documents = np.repeat(np.arange(len(texts), dtype=np.intp), [len(text_tokens) for text_tokens in per_text])
+        ids, unknown = self._ids, self._unknown_id
+        indices = np.fromiter((ids.get(token, unknown) for token in tokens), dtype=np.intp, count=len(tokens))
+        return np.bincount(documents, weights=self.weights[indices], minlength=len(texts))
+
+    def score_batch(self, texts: Sequence[str]) -> List[str]:
+        scores = self.scores(texts)
+        labels = np.where(scores > self.threshold, POSITIVE, np.where(scores < -self.threshold, NEGATIVE, NEUTRAL))
+        return labels.tolist()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "lexicon_terms": len(self.lexicon)}
+
+
+class SklearnPipelineScorer(SentimentScorer):
+    """
+    Pipeline de scikit-learn serializado con joblib en `model_path`. Se carga
+    una sola vez, en el primer uso y no al arrancar el módulo. Las etiquetas de texto
+    se devuelven tal cual; las numéricas siguen la convención binaria (1 = positive,
+    otra = negative). Si el modelo no se puede cargar se usa `fallback`.
+    """
+
+    name = "sklearn"
+
+    def __init__(self, model_path: str, fallback: Optional[SentimentScorer] = None):
+        self.model_path = model_path
+        self.fallback = fallback if fallback is not None else LexiconScorer()
+        self._pipeline = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._pipeline is not None
+
+    def _load(self):
+        with self._lock:
+            if self._pipeline is not None or self._load_failed:
+                return
+            try:
+                import joblib # Instalado con scikit-learn; sin él se usa el léxico
+                pipeline = joblib.load(self.model_path)
+                if not hasattr(pipeline, "predict"):
+                    raise TypeError(f"{type(pipeline).__name__} has no predict()")
+                self._pipeline = pipeline
+                logger.info(f"Sentiment model loaded from {self.model_path}")
+            except Exception as e:
+                self._load_failed = True
+                logger.error(f"Could not load sentiment model {self.model_path}, using the lexicon: {e}")
+
+    def score_batch(self, texts: Sequence[str]) -> List[str]:
+        if not texts:
+            return []
+        self._load()
+        if self._pipeline is None:
+            return self.fallback.score_batch(texts)
+        labels = []
+        for label in self._pipeline.predict(list(texts)):
+            if isinstance(label, (str, np.str_)):
+                labels.append(str(label))
+            else:
+                labels.append(POSITIVE if label == 1 else NEGATIVE)
+        return labels
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "model_path": self.model_path, "loaded": self.loaded, "load_failed": self._load_failed}
+
+
+def create_sentiment_scorer(kind: str, model_path: str, lexicon: Optional[Dict[str, float]] = None) -> SentimentScorer:
+    """`kind`: lexicon, sklearn o auto (el modelo si existe el archivo, si no el léxico)."""
+    lexicon_scorer = LexiconScorer(lexicon)
+    if kind == "sklearn" or (kind == "auto" and os.path.exists(model_path)):
+        return SklearnPipelineScorer(model_path, fallback=lexicon_scorer)
+    if kind not in ("auto", "lexicon"):
+        logger.warning(f"Unknown sentiment scorer '{kind}', using the lexicon")
+    return lexicon_scorer
@@ -0,0 +1,389 @@
+import hashlib
+import json
+import math
+import threading
+import time
+import wave
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+PCM_INT16_SCALE = 32768.0
+
+
+def pcm16_to_float(data: bytes) -> np.ndarray:
+    """Convierte PCM int16 (bytes) a un bloque float32 en [-1, 1)."""
+    return np.frombuffer(data, dtype=np.int16).astype(np.float32) / PCM_INT16_SCALE
+
+
+def float_to_pcm16(block: np.ndarray) -> bytes:
+    """Convierte un bloque float32 a PCM int16 (bytes) con saturación."""
+    clipped = np.clip(block, -1.0, (PCM_INT16_SCALE - 1) / PCM_INT16_SCALE)
+    return (clipped * PCM_INT16_SCALE).astype(np.int16).tobytes()
+
+
+def preset_hash(settings: Dict[str, Any]) -> str:
+    """Huella estable de los settings de un preset (independiente del orden de claves)."""
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+@lru_cache(maxsize=16)
+def _sqrt_hann(frame_size: int) -> np.ndarray:
+    # Ventana sqrt-Hann periódica: análisis * síntesis suman 1 con 50% de solapamiento.
+    window = np.sqrt(0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(frame_size) / frame_size))
+    window.flags.writeable = False
+    return window
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class EffectChain:
+    """
+    Cadena de efectos compilada e inmutable para un preset.
+
+    Contiene todas las tablas que no dependen de la señal (ventana, avance de fase
+    esperado, tabla de reasignación de bins y ejes de remuestreo de la envolvente),
+    de modo que cambiar de preset en mitad del stream es solo cambiar una referencia.
+    """
+    __slots__ = ("name", "settings_hash", "sample_rate", "block_size", "frame_size", "pitch", "formant",
+                 "gain", "bypass", "shift_formants", "window", "expected_advance", "bins", "target_bins",
+                 "valid_bins", "pitch_env_bins", "formant_env_bins", "lifter")
+
+    def __init__(self, sample_rate: int = 48000, block_size: int = 256, pitch: float = 1.0,
+                 formant: float = 1.0, gain: float = 1.0, name: Optional[str] = None,
+                 settings_hash: Optional[str] = None):
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if pitch <= 0 or formant <= 0:
+            raise ValueError("pitch and formant must be positive")
+
+        frame_size = block_size * 2
+        n_bins = frame_size // 2 + 1
+        bins = np.arange(n_bins, dtype=np.float64)
+        target_bins = np.rint(bins * pitch).astype(np.int64)
+        valid_bins = target_bins < n_bins
+        values = {
+            "name": name,
+            "settings_hash": settings_hash,
+            "sample_rate": sample_rate,
+            "block_size": block_size,
+            "frame_size": frame_size,
+            "pitch": float(pitch),
+            "formant": float(formant),
+            "gain": float(gain),
+            "bypass": math.isclose(pitch, 1.0) and math.isclose(formant, 1.0),
+            "shift_formants": not math.isclose(formant, pitch),
+            "window": _sqrt_hann(frame_size),
+            "expected_advance": _frozen(2.0 * np.pi * bins * block_size / frame_size),
+            "bins": _frozen(bins),
+            "target_bins": _frozen(target_bins[valid_bins]),
+            "valid_bins": _frozen(valid_bins),
+            "pitch_env_bins": _frozen(bins / pitch),
+            "formant_env_bins": _frozen(bins / formant),
+            "lifter": max(8, frame_size // 32),
+        }
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("EffectChain is immutable")
+
+    @classmethod
+    def compile(cls, settings: Dict[str, Any], name: Optional[str] = None, **kwargs) -> "EffectChain":
+        """Compila los `settings` de un preset de voz."""
+        return cls(
+            pitch=settings.get("pitch", 1.0),
+            formant=settings.get("formant", 1.0),
+            gain=settings.get("gain", 1.0),
+            name=name,
+            settings_hash=preset_hash(settings),
+            **kwargs,
+        )
+
+
+class PresetChainCache:
+    """Caché LRU de cadenas compiladas, indexada por (nombre del preset, hash de settings)."""
+
+    def __init__(self, maxsize: int = 32, sample_rate: int = 48000, block_size: int = 256):
+        self.maxsize = maxsize
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self._chains: "OrderedDict[Tuple[str, str], EffectChain]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, settings: Dict[str, Any]) -> EffectChain:
+        """Retorna la cadena compilada del preset, compilándola solo si no está en caché."""
+        key = (name, preset_hash(settings))
+        with self._lock:
+            chain = self._chains.get(key)
+            if chain is not None:
+                self._chains.move_to_end(key)
+                self.hits += 1
+                return chain
+            self.misses += 1
+        chain = EffectChain.compile(settings, name=name, sample_rate=self.sample_rate, block_size=self.block_size)
+        with self._lock:
+            self._chains[key] = chain
+            self._chains.move_to_end(key)
+            while len(self._chains) > self.maxsize:
+                self._chains.popitem(last=False)
+        return chain
+
+    def invalidate(self, names: Iterable[str]) -> int:
+        """Elimina de la caché todas las versiones compiladas de los presets dados."""
+        names = set(names)
+        with self._lock:
+            stale = [key for key in self._chains if key[0] in names]
+            for key in stale:
+                del self._chains[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._chains.clear()
+
+    def __len__(self) -> int:
+        return len(self._chains)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"size": len(self._chains), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class VoiceEffectEngine:
+    """
+    Motor de efectos de voz en streaming sobre bloques PCM de tamaño fijo.
+
+    Usa un vocoder de fase con solapamiento del 50% (ventana sqrt-Hann de
+    2 * block_size muestras) y un buffer circular de overlap-add, de modo que
+    la latencia añadida es de un frame (block_size * 2 / sample_rate).
+    El motor solo guarda el estado del stream; las tablas viven en un `EffectChain`.
+    """
+
+    def __init__(self, sample_rate: int = 48000, block_size: int = 256, pitch: float = 1.0,
+                 formant: float = 1.0, gain: float = 1.0, latency_budget_ms: float = 20.0,
+                 chain: Optional[EffectChain] = None):
+        if chain is None:
+            chain = EffectChain(sample_rate, block_size, pitch, formant, gain)
+        self.chain = chain
+        self.sample_rate = chain.sample_rate
+        self.block_size = chain.block_size
+        self.frame_size = chain.frame_size
+        self.latency_budget_ms = latency_budget_ms
+        self.reset()
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any], **kwargs) -> "VoiceEffectEngine":
+        """Crea un motor a partir de los `settings` de un preset de voz."""
+        return cls(
+            pitch=settings.get("pitch", 1.0),
+            formant=settings.get("formant", 1.0),
+            gain=settings.get("gain", 1.0),
+            **kwargs,
+        )
+
+    def set_chain(self, chain: EffectChain):
+        """Cambia la cadena activa sin reiniciar el stream (mismo tamaño de bloque)."""
+        if chain.block_size != self.block_size or chain.sample_rate != self.sample_rate:
+            raise ValueError("Chain was compiled for a different block size or sample rate")
+        if self.chain.bypass and not chain.bypass:
+            # En bypass no se analiza la fase: se toma la del último frame de entrada para que
+            # el primer frame procesado no calcule su frecuencia contra una fase antigua.
+            self._last_phase = np.angle(np.fft.rfft(self._input_ring * chain.window))
+            self._synth_phase = self._last_phase.copy()
+            self._output_ring[:] = 0.0
+        self.chain = chain
+
+    @property
+    def bypass(self) -> bool:
+        return self.chain.bypass
+
+    @property
+    def pitch(self) -> float:
+        return self.chain.pitch
+
+    @property
+    def formant(self) -> float:
+        return self.chain.formant
+
+    @property
+    def gain(self) -> float:
+        return self.chain.gain
+
+    @property
+    def added_latency_ms(self) -> float:
+        """Latencia algorítmica añadida por el motor, en milisegundos."""
+        if self.bypass:
+            return 0.0
+        return 1000.0 * self.frame_size / self.sample_rate
+
+    @property
+    def block_duration_ms(self) -> float:
+        return 1000.0 * self.block_size / self.sample_rate
+
+    def reset(self):
+        """Reinicia los buffers internos y las estadísticas del motor."""
+        n_bins = self.frame_size // 2 + 1
+        self._input_ring = np.zeros(self.frame_size, dtype=np.float64)
+        self._output_ring = np.zeros(self.frame_size, dtype=np.float64)
+        self._last_phase = np.zeros(n_bins, dtype=np.float64)
+        self._synth_phase = np.zeros(n_bins, dtype=np.float64)
+        self.blocks_processed = 0
+        self.budget_overruns = 0
+        self.total_processing_s = 0.0
+        self.max_block_ms = 0.0
+
+    def process_block(self, block: np.ndarray) -> np.ndarray:
+        """Procesa un bloque float de `block_size` muestras y devuelve otro del mismo tamaño."""
+        started = time.perf_counter()
+        block = np.asarray(block, dtype=np.float64)
+        if block.shape != (self.block_size,):
+            raise ValueError(f"Expected block of {self.block_size} samples, got {block.shape}")
+
+        if self.bypass:
+            # Mantener el historial de entrada para poder cambiar de preset sin transitorios.
+            self._input_ring[:-self.block_size] = self._input_ring[self.block_size:]
+            self._input_ring[-self.block_size:] = block
+            out = block * self.gain
+        else:
+            out = self._process_frame(block)
+
+        elapsed = time.perf_counter() - started
+        self._record_timing(elapsed)
+        return np.clip(out, -1.0, 1.0).astype(np.float32)
+
+    def process_bytes(self, data: bytes) -> bytes:
+        """Procesa un bloque PCM int16 (mono) y devuelve PCM int16."""
+        return float_to_pcm16(self.process_block(pcm16_to_float(data)))
+
+    def _process_frame(self, block: np.ndarray) -> np.ndarray:
+        chain = self.chain
+        hop = self.block_size
+        # Desplazar el buffer circular de entrada y añadir el bloque nuevo.
+        self._input_ring[:-hop] = self._input_ring[hop:]
+        self._input_ring[-hop:] = block
+
+        spectrum = np.fft.rfft(self._input_ring * chain.window)
+        magnitude = np.abs(spectrum)
+        phase = np.angle(spectrum)
+
+        # Frecuencia instantánea por bin (vocoder de fase).
+        delta = phase - self._last_phase - chain.expected_advance
+        delta -= 2.0 * np.pi * np.round(delta / (2.0 * np.pi))
+        true_advance = chain.expected_advance + delta
+        self._last_phase = phase
+
+        n_bins = magnitude.shape[0]
+        shifted_mag = np.bincount(chain.target_bins, weights=magnitude[chain.valid_bins], minlength=n_bins)
+        shifted_adv = np.zeros(n_bins)
+        shifted_adv[chain.target_bins] = true_advance[chain.valid_bins] * chain.pitch
+
+        if chain.shift_formants:
+            envelope = self._spectral_envelope(magnitude, chain.lifter)
+            pitched_env = np.interp(chain.pitch_env_bins, chain.bins, envelope, right=envelope[-1])
+            formant_env = np.interp(chain.formant_env_bins, chain.bins, envelope, right=envelope[-1])
+            shifted_mag *= formant_env / np.maximum(pitched_env, 1e-9)
+
+        self._synth_phase = np.mod(self._synth_phase + shifted_adv, 2.0 * np.pi)
+        frame = np.fft.irfft(shifted_mag * np.exp(1j * self._synth_phase), n=self.frame_size)
+
+        # Overlap-add sobre el buffer circular de salida.
+        self._output_ring[:-hop] = self._output_ring[hop:]
+        self._output_ring[-hop:] = 0.0
+        self._output_ring += frame * chain.window
+        return self._output_ring[:hop] * chain.gain
+
+    def _spectral_envelope(self, magnitude: np.ndarray, lifter: int) -> np.ndarray:
+        """Envolvente espectral por suavizado cepstral."""
+        cepstrum = np.fft.irfft(np.log(magnitude + 1e-9), n=self.frame_size)
+        cepstrum[lifter:self.frame_size - lifter] = 0.0
+        return np.exp(np.fft.rfft(cepstrum).real)
+
+    def _record_timing(self, elapsed: float):
+        elapsed_ms = 1000.0 * elapsed
+        self.blocks_processed += 1
+        self.total_processing_s += elapsed
+        self.max_block_ms = max(self.max_block_ms, elapsed_ms)
+        # El presupuesto por bloque es lo que queda tras la latencia algorítmica,
+        # acotado por la duración del bloque (para no atrasarse respecto al tiempo real).
+        budget_ms = min(self.block_duration_ms, self.latency_budget_ms - self.added_latency_ms)
+        if elapsed_ms > budget_ms:
+            self.budget_overruns += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna las estadísticas de procesamiento del motor."""
+        avg_ms = 1000.0 * self.total_processing_s / self.blocks_processed if self.blocks_processed else 0.0
+        return {
+            "preset": self.chain.name,
+            "sample_rate": self.sample_rate,
+            "block_size": self.block_size,
+            "bypass": self.bypass,
+            "added_latency_ms": round(self.added_latency_ms, 3),
+            "blocks_processed": self.blocks_processed,
+            "avg_block_ms": round(avg_ms, 4),
+            "max_block_ms": round(self.max_block_ms, 4),
+            "budget_overruns": self.budget_overruns,
+        }
+
+
+# --- Fuentes de audio para pruebas y benchmarks sin dispositivo ---
+
+def synthetic_source(sample_rate: int = 48000, block_size: int = 256, duration_s: float = 1.0,
+                     frequency: float = 220.0) -> Iterator[np.ndarray]:
+    """Genera bloques de una señal tipo voz (fundamental + armónicos)."""
+    n_blocks = int(math.ceil(duration_s * sample_rate / block_size))
+    harmonics = np.arange(1, 6)
+    amplitudes = 0.3 / harmonics
+    for i in range(n_blocks):
+        t = (np.arange(block_size) + i * block_size) / sample_rate
+        yield (amplitudes[:, None] * np.sin(2.0 * np.pi * frequency * harmonics[:, None] * t)).sum(axis=0).astype(np.float32)
+
+
+def wav_file_source(path: str, block_size: int = 256) -> Iterator[np.ndarray]:
+    """Lee un WAV PCM de 16 bits por bloques (mezcla a mono). El último bloque se rellena con ceros."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError("Only 16-bit PCM WAV files are supported")
+        channels = wav.getnchannels()
+        while True:
+            data = wav.readframes(block_size)
+            if not data:
+                break
+            samples = pcm16_to_float(data)
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1)
+            if samples.shape[0] < block_size:
+                samples = np.pad(samples, (0, block_size - samples.shape[0]))
+            yield samples
+
+
+def benchmark(engine: VoiceEffectEngine, source: Iterator[np.ndarray]) -> Dict[str, Any]:
+    """Procesa una fuente completa y devuelve percentiles de tiempo por bloque."""
+    timings = []
+    for block in source:
+        started = time.perf_counter()
+        engine.process_block(block)
+        timings.append(1000.0 * (time.perf_counter() - started))
+    if not timings:
+        return {"blocks": 0}
+    timings_arr = np.asarray(timings)
+    return {
+        "blocks": len(timings),
+        "block_ms": engine.block_duration_ms,
+        "added_latency_ms": engine.added_latency_ms,
+        "p50_ms": float(np.percentile(timings_arr, 50)),
+        "p99_ms": float(np.percentile(timings_arr, 99)),
+        "max_ms": float(timings_arr.max()),
+        "realtime_factor": engine.block_duration_ms / float(timings_arr.mean()),
+        "budget_overruns": engine.budget_overruns,
+    }
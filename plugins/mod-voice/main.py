@@ -1,12 +1,17 @@
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Iterator
 import json
 
-from config.config import DEFAULT_LANG, VOICE_PRESETS_FILE, VOICE_OBS_WEBSOCKET_URL, VOICE_AUDIORELAY_IP
+import numpy as np
+
+from config.config import DEFAULT_LANG, VOICE_PRESETS_FILE, VOICE_OBS_WEBSOCKET_URL, VOICE_AUDIORELAY_IP, VOICE_SAMPLE_RATE, VOICE_BLOCK_SIZE, VOICE_LATENCY_BUDGET_MS, VOICE_PRESET_CACHE_SIZE
 from core.localization import get_translator
 from core.utils import get_logger, load_json_file, save_json_file
 from core.module_manager import module_manager # Importar para guardar settings
 from core.mocks import OBSClientMock, AudioRelayClientMock # Importar mocks
+from core.ring_buffer import get_audio_bus
+from core.status_service import publish_status
+from .dsp import VoiceEffectEngine, PresetChainCache, preset_hash
 
 logger = get_logger(__name__)
 
@@ -18,6 +23,10 @@ class VoiceModule:
         self.voice_presets = {}
         self.obs_client = None 
         self.audiorelay_client = None 
+        self.effect_engine: Optional[VoiceEffectEngine] = None
+        self.audio_bus = get_audio_bus()
+        self.bus_reader = None
+        self.preset_cache = PresetChainCache(maxsize=VOICE_PRESET_CACHE_SIZE, sample_rate=VOICE_SAMPLE_RATE, block_size=VOICE_BLOCK_SIZE)
         self.module_name = "mod-voice"
 
     def initialize(self):
@@ -29,6 +38,7 @@ class VoiceModule:
             logger.warning(self._("[mod-voice] No se encontraron presets de voz. Cargando presets por defecto."))
             self._load_default_presets()
             save_json_file(VOICE_PRESETS_FILE, self.voice_presets) # Guardar presets por defecto
+        self._compile_presets(self.voice_presets.keys())
         
         # Inicializar mocks para OBS y AudioRelay
         self.obs_client = OBSClientMock(host="localhost", port=4444) # Usar mock
@@ -61,6 +71,7 @@ class VoiceModule:
         """Carga la configuración persistente del módulo desde la DB."""
         logger.info(self._("[mod-voice] Cargando configuración persistente..."))
         if "voice_presets" in settings:
+            self._invalidate_changed_presets(settings["voice_presets"])
             self.voice_presets = settings["voice_presets"]
         # Aquí se cargarían otras configuraciones específicas del módulo
 
@@ -81,25 +92,21 @@ class VoiceModule:
 
         selected_preset = preset if preset in self.voice_presets else "standard"
         self.current_preset = selected_preset
-        settings = self.voice_presets.get(selected_preset, {}).get("settings", {})
+        settings = self._preset_settings(selected_preset)
 
         logger.info(self._("[mod-voice] Iniciando modulación de voz con preset: %s"), selected_preset)
         logger.debug(self._("[mod-voice] Configuración del preset: %s"), settings)
 
-        # --- Lógica de procesamiento de audio en tiempo real (NO SIMULADA) ---
-        # Aquí iría la integración con librerías como PyAudio o Sounddevice
-        # para capturar el audio del micrófono y aplicar efectos.
-        # Ejemplo conceptual:
-        # import pyaudio
-        # p = pyaudio.PyAudio()
-        # stream = p.open(format=pyaudio.paInt64, channels=1, rate=44100, input=True, output=True)
+        # --- Motor de efectos en tiempo real ---
+        # El motor procesa bloques PCM de VOICE_BLOCK_SIZE muestras. La captura real
+        # (PyAudio/Sounddevice) publica cada bloque una sola vez en el bus compartido
+        # (`capture_block`), del que también leen mod-vtuber y AudioRelay:
         # while self.is_active:
-        #     data = stream.read(1024)
-        #     processed_data = self._apply_voice_effect(data, settings) # Función interna para aplicar efectos
-        #     stream.write(processed_data)
-        # stream.stop_stream()
-        # stream.close()
-        # p.terminate()
+        #     self.capture_block(stream.read(VOICE_BLOCK_SIZE))
+        #     for processed in self.pump_audio():
+        #         stream.write(processed)
+        self.effect_engine = self._build_effect_engine(selected_preset, settings)
+        logger.info(self._("[mod-voice] Motor de efectos listo (latencia añadida: %.2f ms)."), self.effect_engine.added_latency_ms)
 
         # --- Integración con OBS Studio (NO SIMULADA) ---
         # Si OBS está conectado, se podría cambiar la fuente de audio, aplicar filtros, etc.
@@ -107,13 +114,12 @@ class VoiceModule:
         #     self.obs_client.set_source_filter_settings("Mic/Aux", "VST Plugin", {"preset_name": selected_preset})
         #     logger.info(self._("[mod-voice] Enviando comando a OBS para aplicar filtro de voz."))
 
-        # --- Integración con AudioRelay (NO SIMULADA) ---
-        # Si AudioRelay está conectado, se podría enviar el audio procesado a un dispositivo móvil.
-        # if self.audiorelay_client and self.audiorelay_client.is_connected:
-        #     self.audiorelay_client.send_audio(processed_audio_stream)
-        #     logger.info(self._("[mod-voice] Enviando audio procesado a AudioRelay."))
+        # --- Integración con AudioRelay ---
+        # `pump_audio` envía cada bloque procesado a AudioRelay sin copias intermedias.
+        self.bus_reader = self.audio_bus.reader(self.module_name)
 
         self.is_active = True
+        publish_status(self.module_name, is_active=True, current_preset=self.current_preset)
         logger.info(self._("[mod-voice] Modulación de voz iniciada."))
 
     def stop(self):
@@ -128,15 +134,110 @@ class VoiceModule:
 
         self.is_active = False
         self.current_preset = None
+        self.effect_engine = None
+        self.audio_bus.remove_reader(self.module_name)
+        self.bus_reader = None
+        publish_status(self.module_name, is_active=False, current_preset=None, effect_engine=None, audio_bus=None)
         logger.info(self._("[mod-voice] Modulación de voz detenida."))
 
+    def _preset_settings(self, preset_name: str) -> Dict[str, Any]:
+        return self.voice_presets.get(preset_name, {}).get("settings", {})
+
+    def _compile_presets(self, preset_names):
+        """Precompila las cadenas de efectos de los presets indicados."""
+        for name in preset_names:
+            try:
+                self.preset_cache.get(name, self._preset_settings(name))
+            except ValueError as e:
+                logger.error(self._("[mod-voice] Preset '%s' inválido: %s"), name, e)
+
+    def _invalidate_changed_presets(self, new_presets: Dict[str, Any]) -> list:
+        """Invalida en caché solo los presets cuyos settings cambian (o desaparecen)."""
+        changed = [
+            name for name in set(self.voice_presets) | set(new_presets)
+            if name not in new_presets or name not in self.voice_presets
+            or preset_hash(new_presets[name].get("settings", {})) != preset_hash(self._preset_settings(name))
+        ]
+        self.preset_cache.invalidate(changed)
+        return changed
+
+    def _build_effect_engine(self, preset_name: str, settings: Dict[str, Any]) -> VoiceEffectEngine:
+        """Crea el motor de efectos a partir de la cadena compilada del preset."""
+        return VoiceEffectEngine(
+            chain=self.preset_cache.get(preset_name, settings),
+            latency_budget_ms=VOICE_LATENCY_BUDGET_MS,
+        )
+
+    def switch_preset(self, preset: str) -> bool:
+        """Cambia de preset en mitad del stream reutilizando la cadena precompilada."""
+        if preset not in self.voice_presets:
+            logger.warning(self._("[mod-voice] Preset '%s' no encontrado."), preset)
+            return False
+        if not self.is_active or self.effect_engine is None:
+            logger.warning(self._("[mod-voice] La modulación de voz no está activa."))
+            return False
+        self.effect_engine.set_chain(self.preset_cache.get(preset, self._preset_settings(preset)))
+        self.current_preset = preset
+        publish_status(self.module_name, current_preset=preset)
+        logger.info(self._("[mod-voice] Preset cambiado a: %s"), preset)
+        return True
+
+    def _apply_voice_effect(self, data):
+        """
+        Aplica el efecto del preset activo a un bloque de audio.
+        Acepta PCM int16 en `bytes` (y devuelve `bytes`) o un array float (y devuelve float32).
+        El motor guarda estado entre bloques (vocoder de fase): para otro preset, `switch_preset`.
+        """
+        engine = self.effect_engine
+        if engine is None:
+            return data
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return engine.process_bytes(bytes(data))
+        return engine.process_block(np.asarray(data, dtype=np.float32))
+
+    def capture_block(self, block) -> int:
+        """Publica un bloque capturado en el bus de audio compartido (una sola copia)."""
+        return self.audio_bus.write(block)
+
+    def pump_audio(self, max_blocks: Optional[int] = None) -> list:
+        """
+        Procesa los bloques pendientes del bus de captura con el preset activo y
+        los reenvía a AudioRelay. Retorna los bloques procesados.
+        """
+        if not self.is_active or self.bus_reader is None:
+            return []
+        processed_blocks = []
+        relay_connected = self.audiorelay_client is not None and self.audiorelay_client.is_connected
+        for view in self.bus_reader.read_available(max_blocks):
+            processed = self._apply_voice_effect(view)
+            if relay_connected:
+                self.audiorelay_client.send_audio(memoryview(processed))
+            processed_blocks.append(processed)
+        return processed_blocks
+
+    def process_source(self, source: Iterable) -> Iterator:
+        """
+        Procesa bloques de una fuente (archivo WAV, generador sintético o loopback)
+        mientras la modulación esté activa.
+        """
+        for block in source:
+            if not self.is_active:
+                break
+            yield self._apply_voice_effect(block)
+
     def configure(self, new_settings: Dict[str, Any]):
         """Configura el módulo de voz (ej. añadir/modificar presets)."""
         logger.info(self._("[mod-voice] Configurando módulo de voz..."))
         # Lógica para actualizar presets o configuraciones internas
         if "presets" in new_settings:
-            self.voice_presets.update(new_settings["presets"])
+            updated_presets = dict(self.voice_presets, **new_settings["presets"])
+            changed = self._invalidate_changed_presets(updated_presets)
+            self.voice_presets = updated_presets
+            self._compile_presets(changed)
+            if self.current_preset in changed and self.is_active:
+                self.switch_preset(self.current_preset)
             self.save_settings()
+            publish_status(self.module_name, available_presets=list(self.voice_presets.keys()))
             logger.info(self._("[mod-voice] Presets de voz actualizados."))
         logger.info(self._("[mod-voice] Módulo de voz configurado."))
 
@@ -148,5 +249,8 @@ class VoiceModule:
             "available_presets": list(self.voice_presets.keys()),
             "obs_connected": self.obs_client.is_connected, 
             "audiorelay_connected": self.audiorelay_client.is_connected, 
+            "effect_engine": self.effect_engine.get_stats() if self.effect_engine else None,
+            "preset_cache": self.preset_cache.get_stats(),
+            "audio_bus": self.bus_reader.get_stats() if self.bus_reader else None,
         }
 
@@ -0,0 +1,145 @@
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Bandas de energía (Hz) usadas para distinguir visemas
+LIPSYNC_BANDS = ((80, 300), (300, 1000), (1000, 2500), (2500, 6000))
+VISEMES = ("sil", "A", "E", "I", "O", "U")
+
+
+class LipsyncAnalyzer:
+    """
+    Analizador de lipsync en streaming.
+
+    Calcula por frame (ventanas deslizantes de `frame_size` con salto `hop_size`)
+    RMS, centroide espectral y energía por bandas con una sola FFT vectorizada
+    sobre todos los frames disponibles, y los mapea a visemas.
+    """
+
+    def __init__(self, sample_rate: int = 48000, frame_size: int = 1024, hop_size: Optional[int] = None,
+                 silence_rms: float = 0.01, full_open_rms: float = 0.25):
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.hop_size = hop_size or frame_size // 2
+        self.silence_rms = silence_rms
+        self.full_open_rms = full_open_rms
+
+        freqs = np.fft.rfftfreq(frame_size, d=1.0 / sample_rate)
+        self._freqs = freqs
+        self._window = np.hanning(frame_size).astype(np.float32)
+        # Matriz (bins x bandas) para obtener todas las energías de banda con un producto matricial.
+        self._band_matrix = np.stack(
+            [((freqs >= low) & (freqs < high)).astype(np.float32) for low, high in LIPSYNC_BANDS], axis=1
+        )
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.frames_analyzed = 0
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.frames_analyzed = 0
+
+    def feed(self, samples) -> Dict[str, np.ndarray]:
+        """
+        Añade muestras y analiza todos los frames completos disponibles.
+        Retorna arrays por frame: rms, centroid, bands (n_frames x 4), mouth_open y viseme.
+        """
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        buffer = np.concatenate((self._pending, samples)) if self._pending.size else samples
+        if buffer.shape[0] < self.frame_size:
+            self._pending = buffer.copy()
+            return self._empty_result()
+
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.frame_size)[::self.hop_size]
+        consumed = frames.shape[0] * self.hop_size
+        self._pending = buffer[consumed:].copy()
+        self.frames_analyzed += frames.shape[0]
+        return self.analyze_frames(frames)
+
+    def analyze_frames(self, frames: np.ndarray) -> Dict[str, np.ndarray]:
+        """Analiza un bloque (n_frames x frame_size) de frames de una vez."""
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+        power = np.square(np.abs(np.fft.rfft(frames * self._window, axis=1))).astype(np.float32)
+        total = power.sum(axis=1) + 1e-12
+        centroid = (power @ self._freqs.astype(np.float32)) / total
+        bands = (power @ self._band_matrix) / total[:, None]
+        mouth_open = np.clip((rms - self.silence_rms) / (self.full_open_rms - self.silence_rms), 0.0, 1.0)
+        return {
+            "rms": rms,
+            "centroid": centroid,
+            "bands": bands,
+            "mouth_open": mouth_open,
+            "viseme": self._classify(rms, centroid, bands),
+        }
+
+    def _classify(self, rms: np.ndarray, centroid: np.ndarray, bands: np.ndarray) -> np.ndarray:
+        # Heurística vectorizada: vocales cerradas (U/O) concentran energía en graves,
+        # vocales anteriores (E/I) tienen el centroide alto, A queda en el medio.
+        low, low_mid, high_mid, high = bands[:, 0], bands[:, 1], bands[:, 2], bands[:, 3]
+        viseme = np.full(rms.shape, 1, dtype=np.int8) # A
+        viseme[(low > 0.6) & (centroid < 500)] = 5 # U
+        viseme[(low + low_mid > 0.7) & (centroid >= 500) & (centroid < 900)] = 4 # O
+        viseme[(high_mid > 0.3) & (centroid >= 1500)] = 2 # E
+        viseme[(high > 0.3) & (centroid >= 2500)] = 3 # I
+        viseme[rms < self.silence_rms] = 0 # sil
+        return viseme
+
+    def _empty_result(self) -> Dict[str, np.ndarray]:
+        empty = np.zeros(0, dtype=np.float32)
+        return {"rms": empty, "centroid": empty, "bands": np.zeros((0, len(LIPSYNC_BANDS)), dtype=np.float32),
+                "mouth_open": empty, "viseme": np.zeros(0, dtype=np.int8)}
+
+
+class LipsyncDriver:
+    """
+    Envía actualizaciones al renderer a una frecuencia fija, fusionando todos los
+    frames analizados desde la última actualización en una sola llamada.
+    """
+
+    def __init__(self, update_callback: Callable[[Dict[str, Any]], None], target_fps: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.update_callback = update_callback
+        self.interval = 1.0 / target_fps
+        self.clock = clock
+        self._next_emit = 0.0
+        self._pending: List[Dict[str, np.ndarray]] = []
+        self.updates_sent = 0
+        self.frames_coalesced = 0
+
+    def push(self, features: Dict[str, np.ndarray]):
+        if features["rms"].shape[0]:
+            self._pending.append(features)
+
+    def tick(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Emite una actualización si toca según la frecuencia objetivo y hay frames pendientes."""
+        now = self.clock() if now is None else now
+        if now < self._next_emit or not self._pending:
+            return None
+        mouth_open = np.concatenate([f["mouth_open"] for f in self._pending])
+        rms = np.concatenate([f["rms"] for f in self._pending])
+        visemes = np.concatenate([f["viseme"] for f in self._pending])
+        self.frames_coalesced += mouth_open.shape[0]
+        self._pending.clear()
+        # El frame con más energía representa el intervalo fusionado.
+        loudest = int(np.argmax(rms))
+        phoneme_data = {
+            "viseme": VISEMES[int(visemes[loudest])],
+            "mouth_open": round(float(mouth_open.max()), 3),
+            "rms": round(float(rms[loudest]), 5),
+            "frames": int(mouth_open.shape[0]),
+        }
+        self.update_callback(phoneme_data)
+        self.updates_sent += 1
+        # Frecuencia fija: si nos atrasamos no se acumulan emisiones pendientes.
+        self._next_emit += self.interval
+        if self._next_emit <= now:
+            self._next_emit = now + self.interval
+        return phoneme_data
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"target_fps": round(1.0 / self.interval, 2), "updates_sent": self.updates_sent,
+                "frames_coalesced": self.frames_coalesced}
@@ -3,11 +3,16 @@ from typing import Optional, Dict, Any
 import os
 import json
 
-from config.config import DEFAULT_LANG, VTUBER_MODELS_DIR, VTUBER_DEFAULT_MODEL
+import numpy as np
+
+from config.config import DEFAULT_LANG, VTUBER_MODELS_DIR, VTUBER_DEFAULT_MODEL, VTUBER_LIPSYNC_FPS, VTUBER_LIPSYNC_FRAME_SIZE, VOICE_SAMPLE_RATE
 from core.localization import get_translator
 from core.utils import get_logger, load_json_file, save_json_file
 from core.module_manager import module_manager
 from core.mocks import Live2DRendererMock
+from core.ring_buffer import get_audio_bus, POLICY_LATEST
+from core.status_service import publish_status
+from .lipsync import LipsyncAnalyzer, LipsyncDriver
 
 logger = get_logger(__name__)
 
@@ -18,6 +23,10 @@ class VTuberModule:
         self.current_model = None
         self.audio_input_stream = None # Placeholder para stream de audio
         self.vtuber_renderer = None 
+        self.audio_bus = get_audio_bus()
+        self.bus_reader = None
+        self.lipsync_analyzer: Optional[LipsyncAnalyzer] = None
+        self.lipsync_driver: Optional[LipsyncDriver] = None
         self.module_name = "mod-vtuber"
 
     def initialize(self):
@@ -67,20 +76,22 @@ class VTuberModule:
         logger.info(self._("[mod-vtuber] Cargando modelo: %s"), self.current_model)
         self.save_settings()
 
-        # --- Lógica de captura de audio y detección de fonemas (NO SIMULADA) ---
-        # Usar PyAudio o Sounddevice para capturar audio del micrófono.
-        # Procesar el audio para detectar fonemas o amplitudes de voz que
-        # puedan ser mapeadas a animaciones labiales del modelo.
-        # self.audio_input_stream = pyaudio.PyAudio().open(format=pyaudio.paInt16, channels=1, rate=44100, input=True)
-        logger.info(self._("[mod-vtuber] Captura de audio y detección de fonemas activada (simulado)."))
+        # --- Captura de audio y detección de visemas ---
+        # El audio llega por el bus de captura compartido con mod-voice; si el lipsync
+        # se atrasa, salta al bloque más reciente en lugar de frenar la captura.
+        self.bus_reader = self.audio_bus.reader(self.module_name, policy=POLICY_LATEST)
+        self.lipsync_analyzer = LipsyncAnalyzer(sample_rate=VOICE_SAMPLE_RATE, frame_size=VTUBER_LIPSYNC_FRAME_SIZE)
+        logger.info(self._("[mod-vtuber] Captura de audio y detección de visemas activada."))
 
-        # --- Lógica de renderizado y animación (NO SIMULADA) ---
-        # Enviar datos de fonemas/animación al motor de renderizado.
+        # --- Renderizado y animación ---
+        # Las actualizaciones se envían al renderer a VTUBER_LIPSYNC_FPS, fusionando frames.
         self.vtuber_renderer.load_model(self.current_model)
         self.vtuber_renderer.start_lipsync()
-        logger.info(self._("[mod-vtuber] Renderizado y animación del modelo iniciados (simulado)."))
+        self.lipsync_driver = LipsyncDriver(self.vtuber_renderer.update_animation, target_fps=VTUBER_LIPSYNC_FPS)
+        logger.info(self._("[mod-vtuber] Renderizado y animación del modelo iniciados."))
 
         self.is_active = True
+        publish_status(self.module_name, is_active=True, current_model=self.current_model)
         logger.info(self._("[mod-vtuber] Módulo VTuber iniciado."))
 
     def stop(self):
@@ -93,12 +104,29 @@ class VTuberModule:
         # Lógica para detener la captura de audio y el bucle de renderizado.
         # if self.audio_input_stream: self.audio_input_stream.stop_stream(); self.audio_input_stream.close()
         self.vtuber_renderer.stop_lipsync()
+        self.audio_bus.remove_reader(self.module_name)
+        self.bus_reader = None
+        self.lipsync_analyzer = None
+        self.lipsync_driver = None
 
         self.is_active = False
         self.current_model = None
         self.save_settings()
+        publish_status(self.module_name, is_active=False, current_model=None, lipsync=None, audio_bus=None)
         logger.info(self._("[mod-vtuber] Módulo VTuber detenido."))
 
+    def pump_audio(self) -> Optional[Dict[str, Any]]:
+        """
+        Analiza el audio pendiente del bus de captura y, si toca según la frecuencia
+        objetivo, envía una actualización de animación. Retorna los datos enviados.
+        """
+        if not self.is_active or self.bus_reader is None:
+            return None
+        views = self.bus_reader.read_available()
+        if views:
+            self.lipsync_driver.push(self.lipsync_analyzer.feed(np.concatenate(views)))
+        return self.lipsync_driver.tick()
+
     def get_status(self) -> Dict[str, Any]:
         """Retorna el estado actual del módulo VTuber."""
         return {
@@ -106,5 +134,7 @@ class VTuberModule:
             "current_model": self.current_model,
             "models_directory": VTUBER_MODELS_DIR,
             "renderer_active": self.vtuber_renderer.is_animating if self.vtuber_renderer else False,
+            "lipsync": self.lipsync_driver.get_stats() if self.lipsync_driver else None,
+            "audio_bus": self.bus_reader.get_stats() if self.bus_reader else None,
         }
 
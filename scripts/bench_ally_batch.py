@@ -0,0 +1,91 @@
+"""
+Benchmark del análisis por lotes de mod-ally sobre un directorio de microcursos sintético.
+
+Uso:
+    python -m scripts.bench_ally_batch [--documents 200] [--kb 50] [--workers 4]
+
+Mide el análisis en frío en un solo proceso, en frío con el pool de procesos y en
+caliente (todo en caché), además del caso habitual al editar: un documento modificado.
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.config import ALLY_ANALYSIS_EXTENSIONS, ALLY_ANALYSIS_WORKERS
+from core.module_manager import module_manager
+
+
+def run(module, paths, workers, use_cache=True):
+    started = time.perf_counter()
+    summary = None
+    for record in module.analyze_documents(paths=paths, workers=workers, use_cache=use_cache):
+        summary = record.get("summary", summary)
+    return round(time.perf_counter() - started, 3), summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del análisis por lotes de mod-ally")
+    parser.add_argument("--documents", type=int, default=200, help="Documentos en el directorio")
+    parser.add_argument("--kb", type=int, default=50, help="Tamaño de cada documento en KB")
+    parser.add_argument("--workers", type=int, default=ALLY_ANALYSIS_WORKERS, help="Procesos del pool")
+    parser.add_argument("--terms", type=int, default=2000, help="Términos en las reglas")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    def word(low, high):
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+    terms = sorted({word(5, 12) for _ in range(args.terms)})
+    vocabulary = [word(2, 10) for _ in range(5000)]
+    module = module_manager.get_module("mod-ally")
+    batch_analysis = sys.modules[type(module).__module__.rsplit(".", 1)[0] + ".batch_analysis"]
+    module.load_settings({"inclusive_language_rules": {"ableist_terms": terms}})
+
+    with tempfile.TemporaryDirectory() as course_dir:
+        # Caché propia del benchmark para no tocar la de data/
+        module.analysis_cache = module.batch_analyzer.cache = batch_analysis.AnalysisCache(os.path.join(course_dir, "cache.json"))
+        for i in range(args.documents):
+            words, size = [], 0
+            while size < args.kb * 1024:
+                token = rng.choice(terms) if rng.random() < 0.001 else rng.choice(vocabulary)
+                words.append(token)
+                size += len(token) + 1
+            with open(os.path.join(course_dir, f"lesson_{i:04d}{ALLY_ANALYSIS_EXTENSIONS[0]}"), "w", encoding="utf-8") as f:
+                f.write(" ".join(words))
+        paths = [course_dir]
+
+        inline_s, _ = run(module, paths, workers=1, use_cache=False)
+        pool_s, _ = run(module, paths, workers=args.workers, use_cache=False)
+        run(module, paths, workers=1) # Llenar la caché
+        warm_s, warm = run(module, paths, workers=1)
+        with open(os.path.join(course_dir, f"lesson_0000{ALLY_ANALYSIS_EXTENSIONS[0]}"), "a", encoding="utf-8") as f:
+            f.write(" editado")
+        edit_s, edit = run(module, paths, workers=args.workers)
+
+    print(json.dumps({
+        "documents": args.documents,
+        "document_kb": args.kb,
+        "terms": len(terms),
+        "workers": args.workers,
+        "cpus": os.cpu_count(),
+        "cold_inline_s": inline_s,
+        "cold_pool_s": pool_s,
+        "pool_speedup": round(inline_s / pool_s, 2),
+        "warm_cached_s": warm_s,
+        "warm_cached": warm["cached"],
+        "one_edit_s": edit_s,
+        "one_edit_analyzed": edit["analyzed"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark del análisis de lenguaje inclusivo de mod-ally: índice compilado frente al
+recorrido de todas las reglas con `término in texto`.
+
+Uso:
+    python -m scripts.bench_ally_inclusive [--terms 2000] [--kb 300] [--documents 20]
+
+Genera reglas y documentos sintéticos (unos pocos términos de las reglas por documento)
+y mide documentos/s y MB/s de cada método, además del tiempo de compilar el índice.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.config import PLUGINS_DIR
+
+
+def load_inclusive_index():
+    spec = importlib.util.spec_from_file_location("ally_inclusive_index", os.path.join(PLUGINS_DIR, "mod-ally", "inclusive_index.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def substring_scan(rules, text):
+    """El análisis anterior: una búsqueda de subcadena por término y grupo."""
+    lowered, found = text.lower(), []
+    for term_type, terms in rules.items():
+        groups = [words for group, words in terms.items() if group != "neutral"] if isinstance(terms, dict) else [terms]
+        for words in groups:
+            found.extend(word for word in words if word in lowered)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del análisis de lenguaje inclusivo")
+    parser.add_argument("--terms", type=int, default=2000, help="Términos en las reglas")
+    parser.add_argument("--kb", type=int, default=300, help="Tamaño de cada documento en KB")
+    parser.add_argument("--documents", type=int, default=20, help="Número de documentos")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    inclusive_index = load_inclusive_index()
+    rng = random.Random(args.seed)
+
+    def word(low, high):
+        return "".join(rng.choice(string.ascii_lowercase + "áéíóúñ") for _ in range(rng.randint(low, high)))
+
+    terms = sorted({word(5, 12) for _ in range(args.terms)})
+    half = len(terms) // 2
+    rules = {"gendered_terms": {"male": terms[:half // 2], "female": terms[half // 2:half], "neutral": ["persona"]},
+             "ableist_terms": terms[half:]}
+    vocabulary = [word(2, 10) for _ in range(5000)]
+    documents = []
+    for _ in range(args.documents):
+        words, size = [], 0
+        while size < args.kb * 1024:
+            token = rng.choice(terms) if rng.random() < 0.001 else rng.choice(vocabulary)
+            words.append(token.capitalize() if rng.random() < 0.1 else token)
+            size += len(token) + 1
+        documents.append(" ".join(words))
+    total_mb = sum(len(document.encode("utf-8")) for document in documents) / 1e6
+
+    started = time.perf_counter()
+    index = inclusive_index.InclusiveLanguageIndex(rules)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    found = sum(len(index.analyze(document)["non_inclusive_terms"]) for document in documents)
+    index_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scan_found = sum(len(substring_scan(rules, document)) for document in documents)
+    scan_s = time.perf_counter() - started
+
+    print(json.dumps({
+        "terms": len(terms),
+        "documents": len(documents),
+        "document_kb": args.kb,
+        "found": found,
+        "substring_found": scan_found, # Incluye coincidencias dentro de otras palabras
+        "compile_ms": round(compile_ms, 1),
+        "index_docs_per_s": round(len(documents) / index_s, 2),
+        "index_mb_per_s": round(total_mb / index_s, 1),
+        "substring_docs_per_s": round(len(documents) / scan_s, 2),
+        "substring_mb_per_s": round(total_mb / scan_s, 1),
+        "speedup": round(scan_s / index_s, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
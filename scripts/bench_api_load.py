@@ -0,0 +1,156 @@
+"""
+Prueba de carga HTTP de la API: servidor de desarrollo (Werkzeug) frente a gunicorn con workers gevent.
+
+Uso:
+    python -m scripts.bench_api_load [--servers werkzeug gunicorn] [--workers 2] [--clients 32] [--duration 10]
+
+Arranca `main.py api` en un puerto libre para cada modo, crea un usuario temporal
+`bench_api_load` con su token, lanza `--clients` clientes que repiten GET `--path`
+durante `--duration` segundos y mide peticiones/s, p50/p99 y errores. Las respuestas
+304 (ETag) no se usan: cada petición recibe el cuerpo completo.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from config.config import SECRET_KEY
+from core.database import init_db, get_db, User
+from core.utils import create_access_token, hash_password
+
+BENCH_USERNAME = "bench_api_load"
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 2)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(server: str, workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, API_HOST="127.0.0.1", API_PORT=str(port), API_DEBUG="False")
+    command = [sys.executable, os.path.join(PROJECT_ROOT, "main.py"), "api", "--server", server, "--workers", str(workers)]
+    return subprocess.Popen(command, env=env, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_ready(url: str, timeout_s: float = 30.0):
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start within {timeout_s}s")
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate() # SIGTERM: drenado ordenado en gunicorn
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def run_load(url: str, token: str, clients: int, duration_s: float):
+    latencies_ms, statuses, errors = [], {}, 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def client():
+        nonlocal errors
+        session = requests.Session()
+        session.headers["Authorization"] = f"Bearer {token}"
+        local_latencies, local_statuses, local_errors = [], {}, 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = session.get(url, timeout=10)
+            except requests.RequestException:
+                local_errors += 1
+                continue
+            local_latencies.append((time.perf_counter() - started) * 1000)
+            local_statuses[response.status_code] = local_statuses.get(response.status_code, 0) + 1
+        with lock:
+            latencies_ms.extend(local_latencies)
+            errors += local_errors
+            for code, count in local_statuses.items():
+                statuses[code] = statuses.get(code, 0) + count
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies_ms),
+        "status_codes": statuses,
+        "errors": errors,
+        "requests_per_s": round(statuses.get(200, 0) / elapsed, 1),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p99_ms": percentile(latencies_ms, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API (Werkzeug vs gunicorn/gevent)")
+    parser.add_argument("--servers", nargs="+", choices=["werkzeug", "gunicorn"], default=["werkzeug", "gunicorn"])
+    parser.add_argument("--workers", type=int, default=2, help="Workers de gunicorn")
+    parser.add_argument("--clients", type=int, default=32, help="Clientes concurrentes")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de carga por servidor")
+    parser.add_argument("--path", default="/status", help="Endpoint GET a cargar")
+    args = parser.parse_args()
+
+    init_db()
+    for db in get_db():
+        db.query(User).filter_by(username=BENCH_USERNAME).delete(synchronize_session=False)
+        db.add(User(username=BENCH_USERNAME, role="user", _password_hash=hash_password("bench-password")))
+        db.commit()
+        break
+    token = create_access_token({"sub": BENCH_USERNAME}, SECRET_KEY)
+
+    results = {}
+    try:
+        for server in args.servers:
+            port = free_port()
+            process = start_server(server, args.workers, port)
+            try:
+                url = f"http://127.0.0.1:{port}{args.path}"
+                wait_until_ready(url)
+                run_load(url, token, min(args.clients, 4), 1.0) # Calentamiento
+                results[server] = run_load(url, token, args.clients, args.duration)
+            finally:
+                stop_server(process)
+    finally:
+        for db in get_db():
+            db.query(User).filter_by(username=BENCH_USERNAME).delete(synchronize_session=False)
+            db.commit()
+            break
+
+    report = {"path": args.path, "clients": args.clients, "duration_s": args.duration,
+              "gunicorn_workers": args.workers, "results": results}
+    if "werkzeug" in results and "gunicorn" in results and results["werkzeug"]["requests_per_s"]:
+        report["speedup"] = round(results["gunicorn"]["requests_per_s"] / results["werkzeug"]["requests_per_s"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
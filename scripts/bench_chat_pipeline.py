@@ -0,0 +1,114 @@
+"""
+Benchmark del pipeline de chat de mod-streaming (ingesta -> normalizar -> moderar -> acciones).
+
+Uso:
+    python -m scripts.bench_chat_pipeline [--rate 5000] [--seconds 10] [--keywords 5000]
+
+Arranca `ChatServerMock` en otro proceso emitiendo `--rate` mensajes/s (un ~5% con alguna
+palabra clave) y mide en este proceso el throughput de cada etapa y la latencia de
+decisión de moderación (desde que el mensaje se lee del socket hasta que se decide).
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.config import PLUGINS_DIR, STREAMING_CHAT_QUEUE_SIZE, STREAMING_CHAT_BATCH_SIZE, STREAMING_CHAT_TICK_MS
+
+
+def load_plugin_module(name, filename):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(PLUGINS_DIR, "mod-streaming", filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_keywords(count, seed):
+    rng = random.Random(seed)
+    return sorted({"".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12))) for _ in range(count)})
+
+
+def run_server(rate, total, keywords_count, seed, port_queue):
+    from core.mocks import ChatServerMock
+    keywords = make_keywords(keywords_count, seed)
+    rng = random.Random(seed + 1)
+
+    def generator(n):
+        words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9))) for _ in range(rng.randint(3, 20))]
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords).upper())
+        return " ".join(words)
+
+    server = ChatServerMock(rate=rate, total=total, generator=generator).start()
+    port_queue.put(server.port)
+    while True:
+        time.sleep(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de chat")
+    parser.add_argument("--rate", type=float, default=5000, help="Mensajes/s emitidos por el servidor")
+    parser.add_argument("--seconds", type=float, default=10, help="Duración de la emisión")
+    parser.add_argument("--keywords", type=int, default=5000, help="Palabras clave de moderación")
+    parser.add_argument("--tick-ms", type=float, default=STREAMING_CHAT_TICK_MS)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    moderation = load_plugin_module("streaming_moderation", "moderation.py")
+    chat_pipeline = load_plugin_module("streaming_chat_pipeline", "chat_pipeline.py")
+    matcher = moderation.KeywordMatcher(make_keywords(args.keywords, args.seed))
+    matcher.find("warmup")
+
+    def moderate_batch(texts):
+        results = []
+        for text in texts:
+            matches = matcher.find(text)
+            results.append({"flagged": bool(matches), "matches": [m._asdict() for m in matches]})
+        return results
+
+    actions = []
+    total = int(args.rate * args.seconds)
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=run_server, args=(args.rate, total, args.keywords, args.seed, port_queue), daemon=True)
+    server.start()
+    port = port_queue.get(timeout=10)
+
+    pipeline = chat_pipeline.ChatPipeline(chat_pipeline.NDJSONChatSource(f"tcp://127.0.0.1:{port}"), moderate_batch,
+                                          on_flagged=lambda message, result: actions.append(message.id),
+                                          queue_size=STREAMING_CHAT_QUEUE_SIZE, batch_size=STREAMING_CHAT_BATCH_SIZE,
+                                          tick_ms=args.tick_ms)
+    cpu_started = time.process_time()
+    pipeline.start()
+    deadline = time.time() + args.seconds * 3 + 10
+    while pipeline.stats["moderate"].processed + pipeline.stats["normalize"].dropped < total and time.time() < deadline:
+        time.sleep(0.05)
+    stats = pipeline.get_stats()
+    pipeline.stop()
+    cpu_s = time.process_time() - cpu_started
+    server.terminate()
+
+    moderated = stats["stages"]["moderate"]["processed"]
+    print(json.dumps({
+        "rate": args.rate,
+        "messages": total,
+        "keywords": args.keywords,
+        "moderated": moderated,
+        "flagged": len(actions),
+        "moderated_per_s": round(moderated / stats["uptime_s"], 1) if stats["uptime_s"] else None,
+        "decision_p50_ms": stats["stages"]["moderate"]["p50_ms"],
+        "decision_p99_ms": stats["stages"]["moderate"]["p99_ms"],
+        "moderate_batches": pipeline.stats["moderate"].batches,
+        "pipeline_cpu_pct": round(100 * cpu_s / stats["uptime_s"], 1) if stats["uptime_s"] else None,
+        "stages": stats["stages"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark de los trabajos en segundo plano: latencia de la petición HTTP de
+`run_tests` síncrona frente a encolarla con "background": true, y tiempo hasta que
+terminan todos los trabajos respetando el límite por tipo.
+
+Uso:
+    python -m scripts.bench_jobs [--requests 8] [--test-seconds 1.0]
+
+Simula una ejecución de pytest de `--test-seconds` segundos (un subproceso que
+duerme), con el cliente de pruebas de Flask y un usuario temporal.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.database import init_db, get_db, User
+from core.jobs import job_manager
+from core.module_manager import module_manager
+from api.app import app
+
+USERNAME, PASSWORD = "bench_jobs", "bench_jobs_password"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de trabajos en segundo plano")
+    parser.add_argument("--requests", type=int, default=8, help="Peticiones de run_tests")
+    parser.add_argument("--test-seconds", type=float, default=1.0, help="Duración simulada de cada ejecución de tests")
+    args = parser.parse_args()
+
+    init_db()
+    for db in get_db():
+        db.query(User).filter_by(username=USERNAME).delete()
+        db.add(User(username=USERNAME, password=PASSWORD, role="admin"))
+        db.commit()
+    client = app.test_client()
+    headers = {"Authorization": "Bearer " + client.post('/login', json={"username": USERNAME, "password": PASSWORD}).get_json()["access_token"]}
+
+    def run_tests(module_name=None, should_cancel=None):
+        subprocess.run([sys.executable, "-c", f"import time; time.sleep({args.test_seconds})"], check=True)
+        return {"status": "success", "output": "", "stderr": ""}
+
+    module = module_manager.get_module("mod-devtools")
+    with mock.patch.object(module, "run_tests", side_effect=run_tests):
+        started = time.perf_counter()
+        client.post('/modules/devtools/run_tests', headers=headers, json={})
+        sync_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        job_ids = [client.post('/modules/devtools/run_tests', headers=headers, json={"background": True}).get_json()["data"]["job_id"]
+                   for _ in range(args.requests)]
+        submit_ms = (time.perf_counter() - started) * 1000 / args.requests
+        statuses = [list(job_manager.watch(job_id, timeout_s=args.requests * args.test_seconds * 4))[-1]["status"] for job_id in job_ids]
+        drained_s = time.perf_counter() - started
+
+    for db in get_db():
+        db.query(User).filter_by(username=USERNAME).delete()
+        db.commit()
+    job_manager.shutdown()
+
+    print(json.dumps({
+        "requests": args.requests,
+        "sync_request_s": round(sync_s, 2),
+        "background_request_ms": round(submit_ms, 1),
+        "background_all_finished_s": round(drained_s, 2),
+        "run_tests_limit": job_manager.backend.kind_limits.get("devtools.run_tests"),
+        "statuses": {status: statuses.count(status) for status in set(statuses)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
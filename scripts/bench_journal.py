@@ -0,0 +1,80 @@
+"""
+Benchmark de lectura del diario de mod-therapy: primera página y páginas sucesivas por
+cursor frente a cargar y descifrar todo el historial.
+
+Uso:
+    python -m scripts.bench_journal [--entries 5000] [--limit 50]
+
+Crea `--entries` entradas para un usuario de prueba (se borran al terminar) y mide
+la latencia de `get_journal_page`, `get_journal_entries` y de la exportación completa.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.database import init_db, get_db, JournalEntry
+from core.module_manager import module_manager
+
+BENCH_USER_ID = 987654
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 2), result
+
+
+def clear():
+    for db in get_db():
+        db.query(JournalEntry).filter_by(user_id=BENCH_USER_ID).delete()
+        db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de paginación del diario")
+    parser.add_argument("--entries", type=int, default=5000, help="Entradas del usuario de prueba")
+    parser.add_argument("--limit", type=int, default=50, help="Entradas por página")
+    args = parser.parse_args()
+
+    init_db()
+    module = module_manager.get_module("mod-therapy")
+    clear()
+    start = datetime(2020, 1, 1)
+    started = time.perf_counter()
+    module.import_journal_entries(BENCH_USER_ID, ({"content": f"Entrada número {i}. Hoy me sentí feliz y un poco triste.",
+                                                   "created_at": (start + timedelta(hours=i)).isoformat()} for i in range(args.entries)))
+    import_s = time.perf_counter() - started
+    try:
+        first_page_ms, page = timed(lambda: module.get_journal_page(BENCH_USER_ID, limit=args.limit))
+        deep_cursor = page["next_cursor"]
+        for _ in range(args.entries // args.limit // 2):
+            deep_cursor = module.get_journal_page(BENCH_USER_ID, limit=args.limit, cursor=deep_cursor)["next_cursor"]
+        deep_page_ms, _ = timed(lambda: module.get_journal_page(BENCH_USER_ID, limit=args.limit, cursor=deep_cursor))
+        all_entries_ms, entries = timed(lambda: module.get_journal_entries(BENCH_USER_ID), repeat=2)
+        export_ms, _ = timed(lambda: sum(1 for _ in module.export_journal_entries(BENCH_USER_ID, decrypt=False)), repeat=2)
+    finally:
+        clear()
+
+    print(json.dumps({
+        "entries": args.entries,
+        "page_limit": args.limit,
+        "import_per_s": round(args.entries / import_s),
+        "first_page_ms": first_page_ms,
+        "middle_page_ms": deep_page_ms,
+        "all_entries_decrypted_ms": all_entries_ms,
+        "encrypted_export_ms": export_ms,
+        "first_page_speedup": round(all_entries_ms / first_page_ms, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark del descifrado Fernet del diario de mod-therapy con 1, 4 y 8 hilos, y del
+re-renderizado de una página con la caché de texto descifrado.
+
+Uso:
+    python -m scripts.bench_journal_decrypt [--entries 20000] [--size 600] [--workers 1,4,8]
+
+Cifra `--entries` textos de `--size` bytes y mide entradas/s de `decrypt_many` para
+cada número de hilos (la mejor de varias pasadas).
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cryptography.fernet import Fernet
+
+from config.config import PLUGINS_DIR, THERAPY_DECRYPT_CHUNK_SIZE, THERAPY_PLAINTEXT_CACHE_MAX_BYTES, THERAPY_PLAINTEXT_CACHE_TTL_S
+
+
+def load_journal_crypto():
+    spec = importlib.util.spec_from_file_location("therapy_journal_crypto", os.path.join(PLUGINS_DIR, "mod-therapy", "journal_crypto.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de descifrado del diario")
+    parser.add_argument("--entries", type=int, default=20000, help="Entradas cifradas")
+    parser.add_argument("--size", type=int, default=600, help="Bytes de texto por entrada")
+    parser.add_argument("--workers", default="1,4,8", help="Números de hilos a medir")
+    parser.add_argument("--chunk-size", type=int, default=THERAPY_DECRYPT_CHUNK_SIZE)
+    parser.add_argument("--page", type=int, default=50, help="Entradas por página para la medida con caché")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    journal_crypto = load_journal_crypto()
+    fernet = Fernet(Fernet.generate_key())
+    plaintext = ("Hoy ha sido un día largo. " * (args.size // 26 + 1))[:args.size].encode("utf-8")
+    tokens = [fernet.encrypt(plaintext) for _ in range(args.entries)]
+
+    throughput = {}
+    for workers in [int(w) for w in args.workers.split(",")]:
+        decryptor = journal_crypto.JournalDecryptor(fernet, workers=workers, chunk_size=args.chunk_size, min_parallel=0)
+        decryptor.decrypt_many(tokens[:workers * args.chunk_size]) # Arrancar los hilos
+        elapsed = best_of(lambda: decryptor.decrypt_many(tokens), args.repeat)
+        decryptor.shutdown()
+        throughput[workers] = round(args.entries / elapsed)
+
+    cache = journal_crypto.DecryptedEntryCache(THERAPY_PLAINTEXT_CACHE_MAX_BYTES, THERAPY_PLAINTEXT_CACHE_TTL_S)
+    page = tokens[:args.page]
+    serial = journal_crypto.JournalDecryptor(fernet, workers=1)
+    for entry_id, result in enumerate(serial.decrypt_many(page)):
+        cache.put(1, entry_id, result)
+    uncached_s = best_of(lambda: serial.decrypt_many(page), args.repeat * 10)
+    cached_s = best_of(lambda: [cache.get(1, entry_id) for entry_id in range(len(page))], args.repeat * 10)
+
+    print(json.dumps({
+        "entries": args.entries,
+        "entry_bytes": args.size,
+        "cpus": os.cpu_count(),
+        "chunk_size": args.chunk_size,
+        "entries_per_s_by_workers": throughput,
+        "page_entries": len(page),
+        "page_decrypt_ms": round(uncached_s * 1000, 3),
+        "page_cached_ms": round(cached_s * 1000, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de throughput de /login con clientes concurrentes (cliente de pruebas de Flask).
+
+Uso:
+    python -m scripts.bench_login [--clients 16] [--requests 8] [--rounds 10]
+
+Crea usuarios temporales `bench_login_N`, mide la latencia de cada login y cuenta las
+respuestas 429 del pool de verificación. Los usuarios se eliminan al terminar.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.config import AUTH_LOGIN_WORKERS, AUTH_LOGIN_QUEUE_SIZE, AUTH_PASSWORD_ROUNDS
+from core.database import init_db, get_db, User
+from core.utils import build_password_context
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de throughput de login")
+    parser.add_argument("--clients", type=int, default=16, help="Clientes concurrentes")
+    parser.add_argument("--requests", type=int, default=8, help="Logins por cliente")
+    parser.add_argument("--rounds", type=int, default=AUTH_PASSWORD_ROUNDS, help="Coste del hash de los usuarios de prueba")
+    args = parser.parse_args()
+
+    from api.app import app
+    from core.login_pool import login_pool
+
+    init_db()
+    # Un solo hash compartido: crear los usuarios no debe dominar el tiempo del benchmark
+    password_hash = build_password_context(rounds=args.rounds).hash("bench-password")
+    usernames = [f"bench_login_{i}" for i in range(args.clients)]
+    for db in get_db():
+        db.query(User).filter(User.username.in_(usernames)).delete(synchronize_session=False)
+        db.add_all([User(username=username, role="user", _password_hash=password_hash) for username in usernames])
+        db.commit()
+        break
+
+    latencies_ms, statuses = [], {}
+    lock = threading.Lock()
+
+    def client(username):
+        test_client = app.test_client()
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            response = test_client.post('/login', json={"username": username, "password": "bench-password"})
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code == 200:
+                    latencies_ms.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(username,)) for username in usernames]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    for db in get_db():
+        db.query(User).filter(User.username.in_(usernames)).delete(synchronize_session=False)
+        db.commit()
+        break
+
+    print(json.dumps({
+        "clients": args.clients,
+        "requests": args.clients * args.requests,
+        "workers": AUTH_LOGIN_WORKERS,
+        "queue_size": AUTH_LOGIN_QUEUE_SIZE,
+        "status_codes": statuses,
+        "logins_per_s": round(statuses.get(200, 0) / elapsed, 1),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p99_ms": percentile(latencies_ms, 99),
+        "pool": login_pool.get_stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark de la moderación de chat de mod-streaming: autómata Aho–Corasick frente al
+recorrido lineal de la lista de palabras clave.
+
+Uso:
+    python -m scripts.bench_moderation [--keywords 5000] [--messages 5000]
+
+Genera palabras clave y mensajes sintéticos (un ~5% contiene alguna palabra clave) y
+mide mensajes/s de cada método, el tiempo de compilación y el de añadir una palabra.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.config import PLUGINS_DIR
+
+
+def load_moderation():
+    spec = importlib.util.spec_from_file_location("streaming_moderation", os.path.join(PLUGINS_DIR, "mod-streaming", "moderation.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def linear_scan(keywords, message):
+    """Lo que haría la moderación recorriendo la lista: una búsqueda por palabra clave."""
+    text = message.casefold()
+    return [keyword for keyword in keywords if keyword in text]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de moderación de chat")
+    parser.add_argument("--keywords", type=int, default=5000, help="Número de palabras clave")
+    parser.add_argument("--messages", type=int, default=5000, help="Número de mensajes")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    moderation = load_moderation()
+    rng = random.Random(args.seed)
+
+    def word(low, high):
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+    keywords = sorted({word(5, 12) for _ in range(args.keywords)})
+    messages = []
+    for _ in range(args.messages):
+        words = [word(2, 9) for _ in range(rng.randint(3, 20))]
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords).upper())
+        messages.append(" ".join(words))
+
+    started = time.perf_counter()
+    matcher = moderation.KeywordMatcher(keywords)
+    matcher.find("warmup")
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    flagged = sum(1 for message in messages if matcher.find(message))
+    automaton_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    linear_flagged = sum(1 for message in messages if linear_scan(keywords, message))
+    linear_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matcher.add("newkeywordxyz")
+    matcher.find("warmup")
+    add_ms = (time.perf_counter() - started) * 1000
+
+    print(json.dumps({
+        "keywords": len(keywords),
+        "messages": len(messages),
+        "flagged": flagged,
+        "linear_flagged": linear_flagged, # Incluye coincidencias dentro de otras palabras
+        "compile_ms": round(compile_ms, 1),
+        "add_and_recompile_ms": round(add_ms, 1),
+        "automaton_msgs_per_s": round(len(messages) / automaton_s),
+        "linear_msgs_per_s": round(len(messages) / linear_s),
+        "speedup": round(linear_s / automaton_s, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
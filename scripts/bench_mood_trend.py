@@ -0,0 +1,84 @@
+"""
+Benchmark de la tendencia de ánimo de mod-therapy: consulta a la tabla de agregados
+frente a descifrar y recorrer todo el diario.
+
+Uso:
+    python -m scripts.bench_mood_trend [--entries 10000] [--days 365]
+
+Importa `--entries` entradas repartidas en `--days` días para un usuario de prueba
+(se borran al terminar) y compara ambas formas de obtener los recuentos semanales.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.database import init_db, get_db, JournalEntry, JournalSentimentAggregate, sentiment_bucket_start
+from core.module_manager import module_manager
+
+BENCH_USER_ID = 987655
+TEXTS = ["Hoy me sentí feliz.", "Estoy triste y con miedo.", "Un día como otro cualquiera."]
+
+
+def clear():
+    for db in get_db():
+        db.query(JournalEntry).filter_by(user_id=BENCH_USER_ID).delete()
+        db.query(JournalSentimentAggregate).filter_by(user_id=BENCH_USER_ID).delete()
+        db.commit()
+
+
+def timed(fn, repeat=3):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 2), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tendencias de ánimo")
+    parser.add_argument("--entries", type=int, default=10000, help="Entradas del usuario de prueba")
+    parser.add_argument("--days", type=int, default=365, help="Días que cubren las entradas")
+    args = parser.parse_args()
+
+    init_db()
+    module = module_manager.get_module("mod-therapy")
+    clear()
+    start = datetime(2024, 1, 1)
+    step = timedelta(days=args.days) / args.entries
+    module.import_journal_entries(BENCH_USER_ID, ({"content": TEXTS[i % len(TEXTS)], "created_at": (start + step * i).isoformat()}
+                                                  for i in range(args.entries)))
+
+    def rescan():
+        # Lo que haría una vista de tendencias sin agregados
+        weeks = {}
+        for entry in module.export_journal_entries(BENCH_USER_ID):
+            created_at = datetime.fromisoformat(entry["created_at"])
+            weeks.setdefault(sentiment_bucket_start(created_at, "week"), Counter())[module._analyze_sentiment(entry["content"])] += 1
+        return weeks
+
+    try:
+        aggregate_ms, trend = timed(lambda: module.get_mood_trend(BENCH_USER_ID, period="week"))
+        rescan_ms, weeks = timed(rescan, repeat=1)
+    finally:
+        clear()
+
+    print(json.dumps({
+        "entries": args.entries,
+        "weeks": len(trend["buckets"]),
+        "aggregate_trend_ms": aggregate_ms,
+        "decrypt_and_rescan_ms": rescan_ms,
+        "same_result": [b["counts"] for b in trend["buckets"]] == [dict(weeks[k]) for k in sorted(weeks)],
+        "speedup": round(rescan_ms / aggregate_ms, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
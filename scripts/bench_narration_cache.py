@@ -0,0 +1,66 @@
+"""
+Benchmark de la caché de narraciones de mod-educator: lecciones que se vuelven a
+narrar con la caché frente a sintetizar siempre.
+
+Uso:
+    python -m scripts.bench_narration_cache [--lessons 20] [--requests 200] [--tts-ms 200]
+
+Simula un modelo TTS que tarda `--tts-ms` por narración y hace `--requests`
+peticiones repartidas entre `--lessons` lecciones distintas, en un directorio
+temporal.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.module_manager import module_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la caché de narraciones")
+    parser.add_argument("--lessons", type=int, default=20, help="Lecciones distintas")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones de narración")
+    parser.add_argument("--tts-ms", type=float, default=200, help="Tiempo simulado de síntesis por narración")
+    args = parser.parse_args()
+
+    module = module_manager.get_module("mod-educator")
+    cache_module = sys.modules[type(module).__module__.rsplit(".", 1)[0] + ".narration_cache"]
+    rng = random.Random(0)
+    lessons = [f"Lección {i}: " + "texto del curso " * 200 for i in range(args.lessons)]
+    requests = [rng.choice(lessons) for _ in range(args.requests)]
+    syntheses = []
+
+    def generate_audio(text, voice_preset):
+        syntheses.append(text)
+        time.sleep(args.tts_ms / 1000)
+        return os.urandom(64 * 1024)
+
+    module.bark_model.generate_audio = generate_audio
+    original_cache = module.narration_cache
+    with tempfile.TemporaryDirectory() as tmp:
+        module.narration_cache = cache_module.NarrationCache(tmp, max_bytes=1 << 30)
+        started = time.perf_counter()
+        for text in requests:
+            module.generate_narration(text, "es")
+        cached_s = time.perf_counter() - started
+        stats = module.narration_cache.get_stats()
+    module.narration_cache = original_cache
+
+    print(json.dumps({
+        "requests": args.requests,
+        "lessons": args.lessons,
+        "syntheses": len(syntheses),
+        "uncached_estimate_s": round(args.requests * args.tts_ms / 1000, 1),
+        "cached_s": round(cached_s, 2),
+        "cache": stats,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
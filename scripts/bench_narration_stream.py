@@ -0,0 +1,69 @@
+"""
+Benchmark de la síntesis por frases de mod-educator: tiempo hasta el primer audio
+y tiempo total frente a sintetizar la lección entera en una llamada.
+
+Uso:
+    python -m scripts.bench_narration_stream [--pages 10] [--workers 4] [--ms-per-char 0.5]
+
+Simula un modelo TTS cuyo tiempo es proporcional al texto (`--ms-per-char`) y que
+suelta el GIL mientras "infiere" (time.sleep), como hace un modelo real. Usa una
+caché temporal, así que todo se sintetiza.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.module_manager import module_manager
+
+
+def page(number: int) -> str:
+    return " ".join(f"Esta es la frase {i} de la página {number}, con el contenido habitual de una lección." for i in range(25))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de narración por frases")
+    parser.add_argument("--pages", type=int, default=10, help="Páginas de la lección (25 frases por página)")
+    parser.add_argument("--workers", type=int, default=4, help="Hilos de síntesis")
+    parser.add_argument("--ms-per-char", type=float, default=0.5, help="Tiempo simulado de síntesis por carácter")
+    args = parser.parse_args()
+
+    module = module_manager.get_module("mod-educator")
+    lesson = "\n\n".join(page(number) for number in range(args.pages))
+
+    def generate_audio(text, voice_preset):
+        time.sleep(len(text) * args.ms_per_char / 1000)
+        return b"\x00" * len(text)
+
+    module.bark_model.generate_audio = generate_audio
+    original = module.narration_cache, module.synthesizer
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = type(module.narration_cache)(tmp, max_bytes=1 << 30)
+        module.narration_cache = cache
+        module.synthesizer = type(module.synthesizer)(cache, workers=args.workers)
+        started = time.perf_counter()
+        first_s, chunks = None, 0
+        for _ in module.iter_narration_chunks(lesson, "es"):
+            first_s = first_s if first_s is not None else time.perf_counter() - started
+            chunks += 1
+        total_s = time.perf_counter() - started
+        module.synthesizer.shutdown()
+    module.narration_cache, module.synthesizer = original
+
+    whole_s = len(lesson) * args.ms_per_char / 1000 # Una sola llamada con la lección entera
+    print(json.dumps({
+        "characters": len(lesson),
+        "chunks": chunks,
+        "workers": args.workers,
+        "whole_document_s": round(whole_s, 2),
+        "time_to_first_audio_s": round(first_s, 3),
+        "chunked_total_s": round(total_s, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
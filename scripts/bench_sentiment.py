@@ -0,0 +1,96 @@
+"""
+Benchmark del análisis de sentimiento de mod-therapy: búsqueda de cada palabra
+clave en el texto (el análisis anterior) frente a `score_batch` del léxico
+compilado, y re-análisis de un diario completo.
+
+Uso:
+    python -m scripts.bench_sentiment [--texts 20000] [--lexicon 2000] [--entries 3650]
+
+El léxico es el básico más `--lexicon` términos sintéticos. Mide además
+`rescore_journal` sobre `--entries` entradas (un año a 10 por día) de un usuario
+de prueba que se borra al terminar.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.database import init_db, get_db, JournalEntry, JournalSentimentAggregate
+from core.module_manager import module_manager
+
+BENCH_USER_ID = 987656
+WORDS = ("hoy", "estuve", "en", "casa", "trabajo", "feliz", "triste", "con", "miedo", "amor", "día", "largo",
+         "la", "familia", "alegre", "cansado", "pero", "bien", "y", "mañana", "otra", "vez")
+
+
+def clear():
+    for db in get_db():
+        db.query(JournalEntry).filter_by(user_id=BENCH_USER_ID).delete()
+        db.query(JournalSentimentAggregate).filter_by(user_id=BENCH_USER_ID).delete()
+        db.commit()
+
+
+def keyword_scan(texts, lexicon):
+    """El análisis anterior generalizado a un léxico con pesos: una búsqueda de subcadena por término y texto."""
+    labels = []
+    for text in texts:
+        lower = text.lower()
+        score = sum(weight for word, weight in lexicon.items() if word in lower)
+        labels.append("positive" if score > 0 else "negative" if score < 0 else "neutral")
+    return labels
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return round((time.perf_counter() - started) * 1000, 1), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de análisis de sentimiento")
+    parser.add_argument("--texts", type=int, default=20000, help="Textos para comparar por texto y por lotes")
+    parser.add_argument("--lexicon", type=int, default=2000, help="Términos sintéticos añadidos al léxico")
+    parser.add_argument("--entries", type=int, default=3650, help="Entradas del diario a re-analizar")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))) for _ in range(args.texts)]
+
+    init_db()
+    module = module_manager.get_module("mod-therapy")
+    sentiment = sys.modules[type(module).__module__.rsplit(".", 1)[0] + ".sentiment"]
+    lexicon = dict(sentiment.DEFAULT_LEXICON)
+    lexicon.update((f"término{i}", rng.choice((-1.0, 1.0))) for i in range(args.lexicon))
+    scorer = sentiment.LexiconScorer(lexicon)
+    scan_ms, scanned = timed(lambda: keyword_scan(texts, lexicon))
+    batch_ms, batch = timed(lambda: scorer.score_batch(texts))
+
+    clear()
+    start = datetime(2024, 1, 1)
+    step = timedelta(days=365) / args.entries
+    module.import_journal_entries(BENCH_USER_ID, ({"content": texts[i % len(texts)], "created_at": (start + step * i).isoformat()}
+                                                  for i in range(args.entries)))
+    try:
+        rescore_ms, rescored = timed(lambda: module.rescore_journal(BENCH_USER_ID))
+    finally:
+        clear()
+
+    print(json.dumps({
+        "scorer": scorer.get_stats(),
+        "texts": args.texts,
+        "keyword_scan_ms": scan_ms,
+        "score_batch_ms": batch_ms,
+        "agreement": round(sum(a == b for a, b in zip(scanned, batch)) / len(texts), 3), # Presencia frente a frecuencia de cada término
+        "speedup": round(scan_ms / batch_ms, 1),
+        "rescore_entries": rescored["scored"],
+        "rescore_ms": rescore_ms,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
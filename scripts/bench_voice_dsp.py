@@ -0,0 +1,57 @@
+"""
+Benchmark del motor de efectos de mod-voice sin dispositivo de audio.
+
+Uso:
+    python -m scripts.bench_voice_dsp [--wav archivo.wav] [--preset robot] [--seconds 10]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.config import PLUGINS_DIR, VOICE_SAMPLE_RATE, VOICE_BLOCK_SIZE, VOICE_LATENCY_BUDGET_MS
+
+PRESETS = {
+    "standard": {},
+    "robot": {"pitch": 0.8, "formant": 1.2},
+    "chipmunk": {"pitch": 1.5, "formant": 1.0},
+    "deep": {"pitch": 0.7, "formant": 0.9},
+}
+
+
+def load_dsp():
+    spec = importlib.util.spec_from_file_location("voice_dsp", os.path.join(PLUGINS_DIR, "mod-voice", "dsp.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de efectos de voz")
+    parser.add_argument("--wav", help="Archivo WAV PCM de 16 bits como entrada (por defecto, señal sintética)")
+    parser.add_argument("--preset", default=None, choices=sorted(PRESETS), help="Preset a medir (por defecto, todos)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duración de la señal sintética")
+    parser.add_argument("--block-size", type=int, default=VOICE_BLOCK_SIZE)
+    parser.add_argument("--sample-rate", type=int, default=VOICE_SAMPLE_RATE)
+    args = parser.parse_args()
+
+    dsp = load_dsp()
+    results = {}
+    for name in [args.preset] if args.preset else sorted(PRESETS):
+        engine = dsp.VoiceEffectEngine.from_settings(
+            PRESETS[name], sample_rate=args.sample_rate, block_size=args.block_size,
+            latency_budget_ms=VOICE_LATENCY_BUDGET_MS,
+        )
+        if args.wav:
+            source = dsp.wav_file_source(args.wav, block_size=args.block_size)
+        else:
+            source = dsp.synthetic_source(args.sample_rate, args.block_size, duration_s=args.seconds)
+        results[name] = dsp.benchmark(engine, source)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import unittest
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from sqlalchemy.orm import Session
+
+from config.config import PLUGINS_DIR
+from core.database import init_db, get_db, User
+from core.module_manager import module_manager
+
+_spec = importlib.util.spec_from_file_location("ally_inclusive_index", os.path.join(PLUGINS_DIR, "mod-ally", "inclusive_index.py"))
+inclusive_index = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(inclusive_index)
+
+RULES = {
+    "gendered_terms": {"male": ["hombre", "ellos"], "female": ["mujer", "ellas"], "neutral": ["persona", "elles"]},
+    "ableist_terms": ["ciego", "sordo", "persona sorda"],
+}
+
+
+class TestInclusiveLanguageIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = inclusive_index.InclusiveLanguageIndex(RULES)
+
+    def test_word_boundaries(self):
+        self.assertEqual(self.index.find("aquellos hombres mujeriegos"), [])
+        self.assertEqual([m.entry.term for m in self.index.find("Ellos y ellas.")], ["ellos", "ellas"])
+
+    def test_offsets_suggestions_and_alternatives(self):
+        text = "Pregunta a un HOMBRE ciego."
+        findings = self.index.analyze(text)
+        self.assertEqual(findings["non_inclusive_terms"], ["hombre", "ciego"])
+        self.assertEqual(findings["suggestions"], ["Consider using neutral terms instead of 'hombre'.",
+                                                   "Consider rephrasing 'ciego' to be more inclusive."])
+        first = findings["matches"][0]
+        self.assertEqual(text[first["start"]:first["end"]], "HOMBRE")
+        self.assertEqual(first["alternatives"], ["persona", "elles"])
+
+    def test_multiword_phrase_wins_over_single_word(self):
+        matches = self.index.find("una persona  sorda y un sordo")
+        self.assertEqual([(m.entry.term, m.text) for m in matches], [("persona sorda", "persona  sorda"), ("sordo", "sordo")])
+
+    def test_repeated_terms_reported_once(self):
+        findings = self.index.analyze("ellos, ellos y ellos")
+        self.assertEqual(findings["non_inclusive_terms"], ["ellos"])
+        self.assertEqual(len(findings["matches"]), 3)
+
+    def test_combining_accents_are_normalized(self):
+        index = inclusive_index.InclusiveLanguageIndex({"ableist_terms": ["pequeño"]})
+        match = index.find("un pequen\u0303o detalle")[0]
+        self.assertEqual((match.entry.term, match.text), ("peque\u00f1o", "peque\u00f1o"))
+
+
+    def test_concurrent_lookups_share_the_pattern_cache(self):
+        index = inclusive_index.InclusiveLanguageIndex(RULES, pattern_cache_size=2)
+        texts = ["hombre", "mujer ciego", "ellos sordo", "ellas", "persona sorda hombre"]
+        errors = []
+
+        def lookup(offset):
+            try:
+                for n in range(500):
+                    index.find(texts[(n + offset) % len(texts)])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=lookup, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(index._patterns), 2)
+
+
+class TestAllyModuleInclusivity(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        init_db() # El módulo lee su configuración de la DB al cargarse
+
+    def setUp(self):
+        self.module = module_manager.get_module("mod-ally")
+        self.original_rules = self.module.inclusive_language_rules
+
+    def tearDown(self):
+        self.module.load_settings({"inclusive_language_rules": self.original_rules})
+
+    def test_load_settings_rebuilds_index(self):
+        self.module.load_settings({"inclusive_language_rules": {"ableist_terms": ["cojo"]}})
+        self.assertEqual(self.module.analyze_text_for_inclusivity("un argumento cojo")["non_inclusive_terms"], ["cojo"])
+        self.assertEqual(self.module.analyze_text_for_inclusivity("Ellos")["non_inclusive_terms"], [])
+
+
+class TestAllyBatchAnalysis(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        init_db()
+
+    def setUp(self):
+        self.module = module_manager.get_module("mod-ally")
+        self.plugin = sys.modules[type(self.module).__module__]
+        self.batch_analysis = sys.modules[type(self.module).__module__.rsplit(".", 1)[0] + ".batch_analysis"]
+        self.original_rules = self.module.inclusive_language_rules
+        self.module.load_settings({"inclusive_language_rules": RULES})
+        # Caché solo en memoria: no tocar data/
+        self.module.analysis_cache = self.module.batch_analyzer.cache = self.batch_analysis.AnalysisCache(None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.course_dir = self.tmp.name
+        os.makedirs(os.path.join(self.course_dir, "intro"))
+        self._write("intro/a.md", "Un hombre ciego.")
+        self._write("intro/b.txt", "Texto sin hallazgos.")
+        self._write("intro/image.png", "ellos")
+        self._write("outro.md", "ellas")
+
+    def tearDown(self):
+        self.module.load_settings({"inclusive_language_rules": self.original_rules})
+        self.module.analysis_cache = self.module.batch_analyzer.cache = self.batch_analysis.AnalysisCache(None)
+        self.tmp.cleanup()
+
+    def _write(self, name, text):
+        with open(os.path.join(self.course_dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_directory_results_in_order_then_cached(self):
+        records = list(self.module.analyze_documents(paths=[self.course_dir], workers=1))
+        self.assertEqual([r.get("document") for r in records[:-1]], ["intro/a.md", "intro/b.txt", "outro.md"])
+        self.assertEqual(records[0]["analysis"]["non_inclusive_terms"], ["hombre", "ciego"])
+        self.assertEqual(records[-1]["summary"]["analyzed"], 3)
+        self.assertEqual(records[-1]["summary"]["flagged"], 2)
+
+        self._write("outro.md", "elles")
+        records = list(self.module.analyze_documents(paths=[self.course_dir], workers=1))
+        self.assertEqual([r.get("cached") for r in records[:-1]], [True, True, False])
+        self.assertEqual(records[-1]["summary"]["flagged"], 1)
+
+    def test_concurrent_flushes_write_a_complete_cache(self):
+        path = os.path.join(self.course_dir, "cache", "analysis.json")
+        cache = self.batch_analysis.AnalysisCache(path)
+        errors = []
+
+        def fill(worker):
+            try:
+                for n in range(20):
+                    cache.put(f"{worker}-{n}", {"non_inclusive_terms": ["x" * 200]})
+                    cache.flush()
+            except Exception as e:
+                errors.append(e)
+
+        def slow_dump(data, f, **kwargs):
+            # Escritura en dos partes para que las de varios hilos se intercalen
+            text = json.dumps(data, **kwargs)
+            f.write(text[:len(text) // 2])
+            time.sleep(0.002)
+            f.write(text[len(text) // 2:])
+
+        threads = [threading.Thread(target=fill, args=(worker,)) for worker in range(4)]
+        with mock.patch.object(self.batch_analysis.json, "dump", slow_dump):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        reopened = self.batch_analysis.AnalysisCache(path)
+        self.assertIsNotNone(reopened.get("3-19")) # El archivo final es legible y completo
+        self.assertEqual(len(reopened), 80)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["analysis.json"])
+
+    def test_process_pool_matches_inline_analysis(self):
+        documents = [(str(i), f"doc {i}: " + ("ellos y una persona sorda" if i % 3 == 0 else "nada")) for i in range(40)]
+        inline = list(self.module.analyze_documents(documents=documents, workers=1, use_cache=False))
+        pooled = list(self.module.analyze_documents(documents=documents, workers=2, use_cache=False))
+        self.assertEqual(pooled[-1]["summary"]["workers"], 2)
+        self.assertEqual(pooled[:-1], inline[:-1])
+
+    def test_rule_changes_invalidate_cache(self):
+        documents = [("1", "un argumento cojo")]
+        self.assertEqual(list(self.module.analyze_documents(documents=documents))[0]["analysis"]["non_inclusive_terms"], [])
+        self.module.load_settings({"inclusive_language_rules": {"ableist_terms": ["cojo"]}})
+        record = list(self.module.analyze_documents(documents=documents))[0]
+        self.assertFalse(record["cached"])
+        self.assertEqual(record["analysis"]["non_inclusive_terms"], ["cojo"])
+
+    def test_api_streams_ndjson(self):
+        from api.app import app
+        init_db()
+        db: Session
+        for db in get_db():
+            db.query(User).filter_by(username="allyuser").delete()
+            db.add(User(username="allyuser", password="allypassword", role="user"))
+            db.commit()
+            break
+        client = app.test_client()
+        token = client.post('/login', json={"username": "allyuser", "password": "allypassword"}).get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        with mock.patch.object(self.plugin, "ALLY_MICROCOURSE_DIR", self.course_dir):
+            response = client.post('/modules/ally/analyze', headers=headers,
+                                   json={"directory": "intro", "documents": [{"id": "inline", "text": "ellos"}]})
+            self.assertEqual(response.mimetype, "application/x-ndjson")
+            records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+            self.assertEqual([r.get("document") for r in records], ["inline", "a.md", "b.txt", None])
+            self.assertEqual(records[-1]["summary"]["documents"], 3)
+            response = client.post('/modules/ally/analyze', headers=headers, json={"directory": "../.."})
+            self.assertEqual(response.status_code, 400)
+
+        # La API analiza en el propio proceso aunque el lote supere ALLY_ANALYSIS_POOL_MIN_DOCS
+        documents = [{"id": str(i), "text": f"documento {i}"} for i in range(self.plugin.ALLY_ANALYSIS_POOL_MIN_DOCS + 8)]
+        with mock.patch.object(self.batch_analysis.BatchAnalyzer, "_create_pool") as create_pool:
+            response = client.post('/modules/ally/analyze', headers=headers, json={"documents": documents, "use_cache": False})
+            summary = json.loads(response.get_data(as_text=True).splitlines()[-1])["summary"]
+        create_pool.assert_not_called()
+        self.assertEqual((summary["documents"], summary["workers"]), (len(documents), 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
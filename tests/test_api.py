@@ -0,0 +1,327 @@
+import json
+import threading
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from sqlalchemy.orm import Session
+
+from core.database import init_db, get_db, get_pool_status, User, JournalEntry, JournalSentimentAggregate
+from core.token_cache import token_cache
+from core.login_pool import LoginVerifierPool
+from core.utils import build_password_context, pwd_context, create_access_token
+from config.config import SECRET_KEY
+from core.module_manager import module_manager
+from core.status_service import publish_status
+from core.event_bus import event_bus
+from api.app import app, socketio, socketio_options
+from api.message_queue import IPCBroker, IPCManager, parse_ipc_url
+
+class TestApiSessions(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        init_db()
+        app.config['TESTING'] = True
+
+    def setUp(self):
+        db: Session
+        for db in get_db():
+            db.query(User).delete()
+            db.add(User(username="apiuser", password="apipassword", role="admin"))
+            db.commit()
+            break
+        self.client = app.test_client()
+
+    def _login(self):
+        response = self.client.post('/login', json={"username": "apiuser", "password": "apipassword"})
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()["access_token"]
+
+    def test_request_sessions_are_returned_to_pool(self):
+        in_use = get_pool_status()["in_use"]
+        headers = {"Authorization": f"Bearer {self._login()}"}
+        for _ in range(20):
+            response = self.client.get('/status', headers=headers)
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_pool_status()["in_use"], in_use)
+        metrics = self.client.get('/metrics', headers=headers).get_json()["data"]
+        self.assertIn("checkouts", metrics["db_pool"])
+
+    def test_failed_login_closes_session(self):
+        in_use = get_pool_status()["in_use"]
+        response = self.client.post('/login', json={"username": "apiuser", "password": "wrong"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(get_pool_status()["in_use"], in_use)
+
+    def test_verified_tokens_skip_user_lookup(self):
+        headers = {"Authorization": f"Bearer {self._login()}"}
+        self.assertEqual(self.client.get('/status', headers=headers).status_code, 200)
+        checkouts = get_pool_status()["checkouts"]
+        for _ in range(10):
+            self.assertEqual(self.client.get('/status', headers=headers).status_code, 200)
+        self.assertEqual(get_pool_status()["checkouts"], checkouts)
+        self.assertGreaterEqual(token_cache.get_stats()["hits"], 10)
+
+    def test_role_change_invalidates_cached_token(self):
+        headers = {"Authorization": f"Bearer {self._login()}"}
+        self.assertEqual(self.client.get('/status', headers=headers).get_json()["data"]["current_role"], "admin")
+        db: Session
+        for db in get_db():
+            db.query(User).filter_by(username="apiuser").first().role = "user"
+            db.commit()
+            break
+        self.assertEqual(self.client.get('/status', headers=headers).get_json()["data"]["current_role"], "user")
+
+        for db in get_db():
+            db.delete(db.query(User).filter_by(username="apiuser").first())
+            db.commit()
+            break
+        self.assertEqual(self.client.get('/status', headers=headers).status_code, 401)
+
+    def test_login_rehashes_password_with_configured_cost(self):
+        db: Session
+        for db in get_db():
+            user = db.query(User).filter_by(username="apiuser").first()
+            user._password_hash = build_password_context(rounds=4).hash("apipassword")
+            db.commit()
+            break
+        self._login()
+        for db in get_db():
+            new_hash = db.query(User).filter_by(username="apiuser").first()._password_hash
+            self.assertFalse(pwd_context.needs_update(new_hash))
+            self.assertTrue(pwd_context.verify("apipassword", new_hash))
+            break
+
+    def test_login_returns_429_when_pool_is_saturated(self):
+        pool = LoginVerifierPool(workers=1, queue_size=0)
+        release = threading.Event()
+        pool.submit(release.wait)
+        try:
+            with mock.patch("api.app.login_pool", pool):
+                response = self.client.post('/login', json={"username": "apiuser", "password": "apipassword"})
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers["Retry-After"], "1")
+            self.assertEqual(pool.get_stats()["rejected"], 1)
+        finally:
+            release.set()
+            pool.shutdown()
+
+    def test_status_is_served_with_etag_and_304(self):
+        headers = {"Authorization": f"Bearer {self._login()}"}
+        module = module_manager.get_module("mod-mobile")
+        module.connected_device = None
+        publish_status("mod-mobile", connected_device=None)
+        first = self.client.get('/status', headers=headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("module_statuses", first.get_json()["data"])
+        etag = first.headers["ETag"]
+
+        unchanged = self.client.get('/status', headers={**headers, "If-None-Match": etag})
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(unchanged.data, b"")
+
+        module.connect_device("test_device")
+        changed = self.client.get('/status', headers={**headers, "If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+        self.assertEqual(changed.get_json()["data"]["module_statuses"]["mod-mobile"]["connected_device"], "test_device")
+
+    def test_voice_command_is_routed_and_pushed_to_subscribers(self):
+        client = socketio.test_client(app, auth={"token": self._login()})
+        self.assertTrue(client.get_received()[0]["args"][0]["authenticated"])
+        client.emit('subscribe', {"modules": ["mod-voice"]})
+        received = client.get_received()
+        snapshot = [m["args"][0] for m in received if m["name"] == "module_state"]
+        self.assertEqual(snapshot[0]["type"], "snapshot")
+        self.assertEqual(snapshot[0]["module"], "mod-voice")
+
+        client.emit('voice_command', {"action": "start", "preset": "robot"})
+        event_bus.flush()
+        received = client.get_received()
+        status = [m["args"][0] for m in received if m["name"] == "voice_status"][0]
+        self.assertEqual(status["status"], "success")
+        self.assertTrue(status["is_active"])
+        self.assertTrue(module_manager.get_module("mod-voice").is_active)
+        changes = [m["args"][0] for m in received if m["name"] == "module_state"]
+        self.assertEqual(changes[-1]["type"], "state_changed")
+        self.assertTrue(changes[-1]["data"]["is_active"])
+
+        client.emit('voice_command', {"action": "stop"})
+        event_bus.flush()
+        self.assertFalse(module_manager.get_module("mod-voice").is_active)
+        client.disconnect()
+
+    def test_journal_trend_is_served_from_aggregates(self):
+        headers = {"Authorization": f"Bearer {self._login()}"}
+        db: Session
+        for db in get_db():
+            user_id = db.query(User).filter_by(username="apiuser").first().id
+            db.query(JournalEntry).filter_by(user_id=user_id).delete()
+            db.query(JournalSentimentAggregate).filter_by(user_id=user_id).delete()
+            db.commit()
+            break
+        for content in ("me siento feliz", "un poco triste", "feliz"):
+            self.assertEqual(self.client.post('/modules/therapy/journal', headers=headers, json={"content": content}).status_code, 200)
+        trend = self.client.get('/modules/therapy/trends?period=week', headers=headers).get_json()["data"]
+        self.assertEqual(trend["totals"], {"positive": 2, "negative": 1})
+        page = self.client.get('/modules/therapy/journal?limit=2', headers=headers).get_json()["data"]
+        self.assertEqual([entry["content"] for entry in page["entries"]], ["feliz", "un poco triste"])
+        self.assertIsNotNone(page["next_cursor"])
+        self.assertEqual(self.client.get('/modules/therapy/trends?period=year', headers=headers).status_code, 400)
+        self.assertEqual(self.client.get('/modules/therapy/journal?cursor=xyz', headers=headers).status_code, 400)
+
+    def test_narration_streams_over_http_and_socketio(self):
+        headers = {"Authorization": f"Bearer {self._login()}"}
+        module = module_manager.get_module("mod-educator")
+        text = "Primera frase de la lección de hoy, bastante larga. Segunda frase, también con algo de contenido."
+        with mock.patch.object(module.bark_model, "generate_audio", side_effect=lambda sentence, voice_preset: sentence.encode("utf-8")):
+            response = self.client.post('/modules/educator/narrate', headers=headers,
+                                        json={"text": text, "language": "es", "voice_preset": "api_test", "stream": True})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, "audio/mpeg")
+            self.assertEqual(response.data, text.replace(". ", ".").encode("utf-8"))
+
+            client = socketio.test_client(app, auth={"token": self._login()})
+            client.get_received()
+            client.emit('narrate', {"text": text, "language": "es", "voice_preset": "api_test"})
+            received = client.get_received()
+            client.disconnect()
+        chunks = [m["args"][0] for m in received if m["name"] == "narration_chunk"]
+        self.assertEqual(len(chunks), 1) # La narración completa ya estaba en caché
+        self.assertEqual(chunks[0]["audio"], response.data)
+        self.assertEqual([m["args"][0] for m in received if m["name"] == "narration_status"],
+                         [{"status": "success", "chunks": 1, "cached_chunks": 1}])
+
+    def test_long_operations_run_as_background_jobs(self):
+        headers = {"Authorization": f"Bearer {self._login()}"}
+        devtools = module_manager.get_module("mod-devtools")
+        started = threading.Event()
+
+        def run_tests(module_name, should_cancel=None):
+            started.set()
+            while not should_cancel():
+                started.wait(0.01)
+            return {"status": "cancelled", "output": "", "stderr": ""}
+
+        with mock.patch.object(devtools, "run_tests", side_effect=run_tests):
+            response = self.client.post('/modules/devtools/run_tests', headers=headers, json={"module_name": "core", "background": True})
+            self.assertEqual(response.status_code, 202)
+            job = response.get_json()["data"]
+            self.assertEqual(response.headers["Location"], job["status_url"])
+            self.assertTrue(started.wait(5))
+            self.assertEqual(self.client.get(job["status_url"], headers=headers).get_json()["data"]["status"], "running")
+            self.assertEqual(self.client.delete(job["status_url"], headers=headers).status_code, 200)
+            events = self.client.get(f'{job["status_url"]}/events?timeout=5', headers=headers)
+            self.assertEqual(json.loads(events.data.splitlines()[-1])["status"], "cancelled")
+
+        module = module_manager.get_module("mod-educator")
+        with mock.patch.object(module.bark_model, "generate_audio", side_effect=lambda sentence, voice_preset: sentence.encode("utf-8")):
+            job_id = self.client.post('/modules/educator/narrate', headers=headers,
+                                      json={"text": "Lección en segundo plano.", "language": "es", "voice_preset": "job_test", "background": True}).get_json()["data"]["job_id"]
+            events = self.client.get(f'/jobs/{job_id}/events?timeout=5', headers=headers).data.splitlines()
+            sync = self.client.post('/modules/educator/narrate', headers=headers,
+                                    json={"text": "Lección en segundo plano.", "language": "es", "voice_preset": "job_test"}).get_json()["data"]
+        result = json.loads(events[-1])
+        self.assertEqual((result["status"], result["progress"], result["result"]["chunks"]), ("succeeded", 1.0, 1))
+        self.assertEqual(sync["audio_url"], result["result"]["audio_url"])
+        audio = self.client.get(result["result"]["audio_url"], headers=headers)
+        self.assertEqual((audio.status_code, audio.mimetype, audio.data), (200, "audio/mpeg", "Lección en segundo plano.".encode("utf-8")))
+        audio.close()
+        self.assertEqual(self.client.get(result["result"]["audio_url"]).status_code, 401)
+        self.assertEqual(self.client.get('/modules/educator/narrations/' + "0" * 64, headers=headers).status_code, 404)
+        self.assertEqual(self.client.get('/modules/educator/narrations/..%2Fx', headers=headers).status_code, 404)
+
+        db: Session
+        for db in get_db():
+            db.add(User(username="otheruser", password="otherpassword", role="user"))
+            db.commit()
+            break
+        other = self.client.post('/login', json={"username": "otheruser", "password": "otherpassword"}).get_json()["access_token"]
+        self.assertEqual(self.client.get(f'/jobs/{job_id}', headers={"Authorization": f"Bearer {other}"}).status_code, 404)
+        self.assertIn("jobs", self.client.get('/metrics', headers=headers).get_json()["data"])
+        self.assertEqual(self.client.post('/modules/devtools/run_tests', headers=headers, json={"module_name": "../x"}).status_code, 400)
+
+    def test_socket_commands_require_authentication(self):
+        client = socketio.test_client(app)
+        client.get_received()
+        client.emit('voice_command', {"action": "start"})
+        self.assertEqual(client.get_received()[0]["args"][0]["status"], "error")
+        client.disconnect()
+
+    def test_socket_is_dropped_when_its_token_stops_being_valid(self):
+        expiring = create_access_token({"sub": "apiuser"}, SECRET_KEY, timedelta(seconds=1))
+        client = socketio.test_client(app, auth={"token": expiring})
+        client.get_received()
+        client.emit('subscribe', {"modules": ["mod-voice"]})
+        self.assertIn("subscribed", [m["name"] for m in client.get_received()])
+        # Pasado el `exp`: la entrada de la caché caduca y el token ya no se puede decodificar
+        with mock.patch.object(token_cache, "clock", return_value=time.time() + 5), \
+                mock.patch("api.app.decode_access_token", return_value=None):
+            client.emit('voice_command', {"action": "stop"})
+        self.assertFalse(client.is_connected())
+        self.assertEqual(client.queue[-1]["args"][0], {"status": "error", "message": "Session expired"}) # Recibido antes de desconectar
+
+        client = socketio.test_client(app, auth={"token": self._login()})
+        client.get_received()
+        db: Session
+        for db in get_db():
+            db.delete(db.query(User).filter_by(username="apiuser").first())
+            db.commit()
+            break
+        client.emit('narrate', {"text": "Hola."})
+        self.assertFalse(client.is_connected())
+        self.assertEqual(client.queue[-1]["name"], "narration_status")
+
+class TestIPCMessageQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.broker = IPCBroker("ipc://127.0.0.1:0").start()
+
+    def tearDown(self):
+        self.broker.stop()
+
+    def _listen_in_background(self, manager, received):
+        def listen():
+            for message in manager._listen():
+                received.append(message)
+        threading.Thread(target=listen, daemon=True).start()
+
+    def test_published_messages_reach_every_worker(self):
+        workers = [IPCManager(self.broker.url) for _ in range(3)]
+        received = [[] for _ in workers]
+        for manager, messages in zip(workers, received):
+            self._listen_in_background(manager, messages)
+        tick = threading.Event()
+        while len(self.broker._subscribers) < len(workers) and not tick.wait(0.01):
+            pass
+        workers[0]._publish({"method": "emit", "event": "module_state", "host_id": workers[0].host_id})
+        for _ in range(200):
+            if all(received):
+                break
+            tick.wait(0.01)
+        for messages in received:
+            self.assertEqual(len(messages), 1)
+            self.assertIn(b'"module_state"', messages[0])
+        self.assertEqual(self.broker.messages_relayed, 1)
+
+    def test_broker_rejects_wrong_authkey(self):
+        intruder = IPCManager(self.broker.url, authkey=b"wrong-key")
+        intruder._publish({"method": "emit", "event": "x"})
+        threading.Event().wait(0.1)
+        self.assertEqual(self.broker.messages_relayed, 0)
+
+    def test_socketio_options_select_queue_backend(self):
+        self.assertEqual(parse_ipc_url("ipc://127.0.0.1:5100"), ("127.0.0.1", 5100))
+        with mock.patch("api.app.API_MESSAGE_QUEUE", self.broker.url), \
+                mock.patch("api.app.API_SERVER", "gunicorn"), mock.patch("api.app.API_WORKERS", 2):
+            options = socketio_options()
+        self.assertIsInstance(options["client_manager"], IPCManager)
+        self.assertEqual(options["transports"], ["websocket"])
+        self.assertEqual(options["async_mode"], "threading")
+        with mock.patch("api.app.API_MESSAGE_QUEUE", "redis://localhost:6379/0"):
+            self.assertEqual(socketio_options()["message_queue"], "redis://localhost:6379/0")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,21 @@
 import unittest
 import os
 import json
+import threading
+import time
 from datetime import datetime, timedelta
 
+import numpy as np
 from sqlalchemy.orm import Session
 
-from core.database import init_db, get_db, User, ModuleSetting, JournalEntry
-from core.utils import load_json_file, save_json_file, get_timestamp, hash_password, verify_password, create_access_token, decode_access_token
-from config.config import DATA_DIR, SECRET_KEY
+from core.database import init_db, get_db, create_db_engine, User, ModuleSetting, JournalEntry, Job
+from core.utils import load_json_file, save_json_file, get_timestamp, hash_password, verify_password, build_password_context, create_access_token, decode_access_token
+from core.token_cache import TokenCache, UserSnapshot
+from core.status_service import StatusSnapshotService, UNLOADED_STATUS
+from core.event_bus import ModuleEventBus
+from core.ring_buffer import AudioRingBuffer, POLICY_LATEST
+from core.jobs import JobManager, JobQueueFull, WORKER_ID
+from config.config import DATA_DIR, TEMP_DIR, SECRET_KEY
 
 class TestCore(unittest.TestCase):
 
@@ -41,6 +49,13 @@ class TestCore(unittest.TestCase):
             self.assertFalse(verify_password("wrongpassword", new_user._password_hash))
             break
 
+    def test_password_rounds_follow_the_scheme(self):
+        pbkdf2 = build_password_context(["pbkdf2_sha256"])
+        self.assertIn("$pbkdf2-sha256$29000$", pbkdf2.hash("secret")) # Por defecto de passlib, no el coste de bcrypt
+        self.assertTrue(build_password_context(["pbkdf2_sha256"], rounds=1000).needs_update(pbkdf2.hash("secret")))
+        with self.assertRaises(ValueError):
+            build_password_context(["bcrypt"], rounds=3)
+
     def test_module_setting_storage(self):
         db: Session
         for db in get_db():
@@ -120,5 +135,254 @@ class TestCore(unittest.TestCase):
         decoded_payload = decode_access_token(token, SECRET_KEY)
         self.assertIsNone(decoded_payload)
 
+
+class TestTokenCache(unittest.TestCase):
+
+    def test_entries_expire_at_token_exp_and_are_bounded(self):
+        now = [1000.0]
+        cache = TokenCache(maxsize=2, ttl_s=60, clock=lambda: now[0])
+        user = UserSnapshot(id=1, username="alice", role="user")
+        cache.put("token-a", {"sub": "alice", "exp": 1010}, user)
+        self.assertEqual(cache.get("token-a"), ({"sub": "alice", "exp": 1010}, user))
+        now[0] = 1010.0
+        self.assertIsNone(cache.get("token-a"))
+
+        for token in ("token-b", "token-c", "token-d"):
+            cache.put(token, {"sub": "alice"}, user)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("token-b"))
+        self.assertEqual(cache.invalidate_user("alice"), 2)
+        self.assertEqual(len(cache), 0)
+
+class TestStatusSnapshotService(unittest.TestCase):
+
+    def test_provider_is_only_called_when_stale(self):
+        now = [0.0]
+        calls = []
+        overlays = ["alerts"]
+        def provider():
+            calls.append(1)
+            return {"is_active": True, "active_overlays": overlays}
+        service = StatusSnapshotService(max_age_s=5.0, clock=lambda: now[0])
+        service.register("mod-streaming", provider)
+
+        first = service.get_snapshot(["mod-streaming", "mod-ally"], unloaded=["mod-ally"])
+        self.assertEqual(json.loads(first.statuses_json)["mod-ally"], UNLOADED_STATUS)
+        overlays.append("chat") # El estado cacheado no comparte la lista viva del módulo
+        self.assertIs(service.get_snapshot(["mod-streaming", "mod-ally"], unloaded=["mod-ally"]), first)
+        self.assertEqual(len(calls), 1)
+
+        service.publish("mod-streaming", {"active_overlays": overlays})
+        second = service.get_snapshot(["mod-streaming", "mod-ally"], unloaded=["mod-ally"])
+        self.assertNotEqual(second.etag, first.etag)
+        self.assertEqual(json.loads(second.statuses_json)["mod-streaming"]["active_overlays"], ["alerts", "chat"])
+        self.assertEqual(len(calls), 1)
+
+        now[0] = 6.0
+        self.assertEqual(service.get_snapshot(["mod-streaming", "mod-ally"], unloaded=["mod-ally"]).etag, second.etag)
+        self.assertEqual(len(calls), 2)
+
+    def test_slow_provider_does_not_block_publish(self):
+        inside, release = threading.Event(), threading.Event()
+        def provider():
+            inside.set()
+            release.wait(5)
+            return {"is_active": False}
+        service = StatusSnapshotService(max_age_s=5.0)
+        service.register("mod-therapy", provider)
+        snapshots = []
+        reader = threading.Thread(target=lambda: snapshots.append(service.get_snapshot(["mod-therapy"])))
+        reader.start()
+        self.assertTrue(inside.wait(5))
+        published = threading.Thread(target=service.publish, args=("mod-therapy", {"is_active": True}))
+        published.start()
+        published.join(1)
+        self.assertFalse(published.is_alive()) # No espera a que termine la consulta
+        release.set()
+        reader.join(5)
+        # El delta publicado durante la consulta no se pisa con el resultado del proveedor...
+        self.assertEqual(json.loads(snapshots[0].statuses_json)["mod-therapy"], {"is_active": True})
+        # ...y el módulo se vuelve a consultar en la siguiente lectura
+        self.assertEqual(service.get_statuses(["mod-therapy"])["mod-therapy"], {"is_active": False})
+        self.assertEqual(service.provider_calls, 2)
+
+class TestModuleEventBus(unittest.TestCase):
+
+    def test_deltas_are_coalesced_per_module(self):
+        batches = []
+        bus = ModuleEventBus(window_s=60)
+        bus.subscribe(batches.append)
+        bus.publish("mod-streaming", {"active_overlays": ["alerts"]})
+        bus.publish("mod-streaming", {"active_overlays": ["alerts", "chat"], "is_active": True})
+        bus.publish("mod-voice", {"current_preset": "robot"})
+        self.assertEqual(batches, [])
+        self.assertEqual(bus.flush(), 2)
+        events = {event.module: event for event in batches[0]}
+        self.assertEqual(events["mod-streaming"].data, {"active_overlays": ["alerts", "chat"], "is_active": True})
+        self.assertEqual(bus.get_stats()["coalesced"], 1)
+
+class TestDatabaseEngine(unittest.TestCase):
+
+    def test_sqlite_memory_uses_static_pool(self):
+        engine = create_db_engine("sqlite://")
+        self.assertEqual(type(engine.pool).__name__, "StaticPool")
+        with engine.connect() as first, engine.connect() as second:
+            self.assertIs(first.connection.dbapi_connection, second.connection.dbapi_connection)
+
+    def test_sqlite_file_uses_wal_and_queue_pool(self):
+        path = os.path.join(TEMP_DIR, "test_wal.db")
+        engine = create_db_engine(f"sqlite:///{path}")
+        try:
+            self.assertEqual(type(engine.pool).__name__, "QueuePool")
+            with engine.connect() as conn:
+                self.assertEqual(conn.exec_driver_sql("PRAGMA journal_mode").scalar(), "wal")
+        finally:
+            engine.dispose()
+
+class TestJobManager(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        init_db()
+
+    def setUp(self):
+        db: Session
+        for db in get_db():
+            db.query(Job).delete()
+            db.commit()
+        self.manager = JobManager(workers=2, kind_limits={"slow": 1}, max_pending=3, retention_s=60)
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def _wait(self, job_id):
+        return list(self.manager.watch(job_id, timeout_s=5, poll_interval_s=0.05))[-1]
+
+    def test_kind_limit_leaves_workers_for_other_kinds(self):
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def slow(ctx, params):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.1)
+            with lock:
+                running[0] -= 1
+            return params["n"]
+
+        self.manager.register("slow", slow)
+        self.manager.register("fast", lambda ctx, params: "ok")
+        slow_ids = [self.manager.submit("slow", {"n": n}, user_id=1) for n in range(3)]
+        fast = self._wait(self.manager.submit("fast", user_id=1))
+        self.assertEqual(fast["status"], "succeeded")
+        self.assertNotEqual(self.manager.get(slow_ids[-1])["status"], "succeeded") # No esperó a la cola de "slow"
+        self.assertEqual([self._wait(job_id)["result"] for job_id in slow_ids], [0, 1, 2])
+        self.assertEqual(peak[0], 1)
+
+    def test_cancel_queued_and_running_jobs(self):
+        started = threading.Event()
+
+        def loop(ctx, params):
+            started.set()
+            while True:
+                ctx.check_cancelled()
+                ctx.set_progress(0.5)
+                time.sleep(0.01)
+
+        self.manager.register("slow", loop)
+        running = self.manager.submit("slow", user_id=1)
+        queued = self.manager.submit("slow", user_id=1)
+        self.assertTrue(started.wait(5))
+        self.assertIsNone(self.manager.cancel(queued, user_id=2)) # No es suyo
+        self.assertEqual(self.manager.cancel(queued, user_id=1)["status"], "cancelled")
+        self.assertTrue(self.manager.cancel(running, user_id=1)["cancel_requested"])
+        job = self._wait(running)
+        self.assertEqual((job["status"], job["progress"]), ("cancelled", 0.5))
+        self.assertIsNone(self._wait(queued)["started_at"])
+
+    def test_cancellation_requested_from_another_process(self):
+        def loop(ctx, params):
+            while not ctx.cancelled: # Consulta la DB como mucho cada segundo
+                time.sleep(0.01)
+            return "stopped"
+
+        self.manager.register("slow", loop)
+        job_id = self.manager.submit("slow")
+        time.sleep(0.05)
+        db: Session
+        for db in get_db():
+            db.query(Job).filter(Job.id == job_id).update({"cancel_requested": True})
+            db.commit()
+        self.assertEqual(self._wait(job_id)["result"], "stopped") # El manejador decide cómo termina
+
+    def test_failures_results_and_queue_limit_are_persisted(self):
+        release = threading.Event()
+        self.manager.register("slow", lambda ctx, params: release.wait(5) and {"ok": True})
+        self.manager.register("broken", lambda ctx, params: 1 / 0)
+        self.assertEqual(self._wait(self.manager.submit("broken"))["error"], "division by zero")
+        jobs = [self.manager.submit("slow") for _ in range(4)] # Uno en curso y tres en cola
+        with self.assertRaises(JobQueueFull):
+            self.manager.submit("slow")
+        release.set()
+        finished = self._wait(jobs[-1])
+        self.assertEqual(JobManager(workers=1).get(jobs[-1]), finished) # Visible desde otro proceso
+        self.assertEqual(self.manager.get(jobs[-1])["result"], {"ok": True})
+        self.assertEqual(self.manager.get_stats()["rejected"], 1)
+
+    def test_retention_purge_and_interrupted_jobs(self):
+        self.manager.register("fast", lambda ctx, params: "ok")
+        old, recent = self.manager.submit("fast"), self.manager.submit("fast")
+        self._wait(old), self._wait(recent)
+        db: Session
+        for db in get_db():
+            db.query(Job).filter(Job.id == old).update({"finished_at": datetime.now() - timedelta(seconds=120)})
+            host = WORKER_ID.rsplit(":", 1)[0]
+            db.add(Job(id="orphan", kind="fast", status="running", worker_id=f"{host}:999999999"))
+            db.add(Job(id="elsewhere", kind="fast", status="running", worker_id="other-host:1"))
+            db.commit()
+        self.assertEqual(self.manager.purge_expired(), 1)
+        self.assertIsNone(self.manager.get(old))
+        self.assertEqual(self.manager.get(recent)["result"], "ok")
+        self.assertEqual(self.manager.recover_interrupted(), 1)
+        self.assertEqual(self.manager.get("orphan")["status"], "failed")
+        self.assertEqual(self.manager.get("elsewhere")["status"], "running")
+
+class TestAudioRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.ring = AudioRingBuffer(block_size=4, capacity=4)
+
+    def test_fanout_shares_slot_without_copies(self):
+        voice = self.ring.reader("voice")
+        vtuber = self.ring.reader("vtuber")
+        self.ring.write([0.1, 0.2, 0.3, 0.4])
+        a, b = voice.read(), vtuber.read()
+        self.assertTrue(np.shares_memory(a, b))
+        self.assertAlmostEqual(float(a[1]), 0.2, places=6)
+        self.assertFalse(a.flags.writeable)
+        self.assertIsNone(voice.read())
+
+    def test_pcm16_bytes_are_converted(self):
+        reader = self.ring.reader("relay")
+        self.ring.write(bytes([0, 0x40] * 4)) # 0x4000 = 16384 -> 0.5
+        self.assertAlmostEqual(float(reader.read()[0]), 0.5)
+
+    def test_slow_reader_drops_oldest_without_blocking_producer(self):
+        reader = self.ring.reader("slow")
+        for i in range(10):
+            self.ring.write([float(i)] * 4)
+        blocks = reader.read_available()
+        self.assertEqual([float(b[0]) for b in blocks], [7.0, 8.0, 9.0])
+        self.assertEqual(reader.overruns, 1)
+        self.assertEqual(reader.dropped_blocks, 7)
+
+    def test_latest_policy_skips_to_newest(self):
+        reader = self.ring.reader("lipsync", policy=POLICY_LATEST)
+        for i in range(10):
+            self.ring.write([float(i)] * 4)
+        self.assertEqual(float(reader.read()[0]), 9.0)
+        self.assertEqual(reader.dropped_blocks, 9)
+        self.assertEqual(self.ring.get_stats()["readers"]["lipsync"]["overruns"], 1)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,177 @@
+import unittest
+import importlib.util
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from config.config import PLUGINS_DIR
+from core.module_manager import module_manager
+
+_spec = importlib.util.spec_from_file_location("educator_narration_cache", os.path.join(PLUGINS_DIR, "mod-educator", "narration_cache.py"))
+narration_cache = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(narration_cache)
+
+LESSON = " ".join(f"Esta es la frase número {i} de la lección, con algo de contenido." for i in range(10))
+
+
+class TestNarrationCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_key_depends_on_every_parameter(self):
+        key = narration_cache.narration_key("hola", "es", "es_speaker_0", "v1")
+        self.assertEqual(key, narration_cache.narration_key("hola", "es", "es_speaker_0", "v1"))
+        self.assertEqual(len({key, narration_cache.narration_key("hola", "en", "es_speaker_0", "v1"),
+                              narration_cache.narration_key("hola", "es", "es_speaker_1", "v1"),
+                              narration_cache.narration_key("hola", "es", "es_speaker_0", "v2")}), 4)
+
+    def test_lru_eviction_by_size_survives_restart(self):
+        cache = narration_cache.NarrationCache(self.directory, max_bytes=10)
+        first = cache.put("a" * 64, b"1234")
+        cache.put("b" * 64, b"5678")
+        cache.get("a" * 64) # "b" pasa a ser la menos usada
+        cache.put("c" * 64, b"90ab")
+        self.assertIsNone(cache.get("b" * 64))
+        self.assertEqual(cache.get_stats()["size_bytes"], 8)
+
+        reopened = narration_cache.NarrationCache(self.directory, max_bytes=10)
+        self.assertEqual(reopened.get("a" * 64), first)
+        self.assertEqual(reopened.get_stats()["entries"], 2)
+        reopened.put("d" * 64, b"cdef") # "c" es ahora la menos usada
+        self.assertIsNone(reopened.get("c" * 64))
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         sorted(["narration_index.json", f"narration_{'a' * 64}.mp3", f"narration_{'d' * 64}.mp3"]))
+
+    def test_lost_index_adopts_files_and_missing_files_are_dropped(self):
+        cache = narration_cache.NarrationCache(self.directory, max_bytes=100)
+        kept = cache.put("a" * 64, b"1234")
+        os.remove(cache.put("b" * 64, b"5678"))
+        os.remove(cache.index_path)
+        reopened = narration_cache.NarrationCache(self.directory, max_bytes=100)
+        self.assertEqual(reopened.get("a" * 64), kept)
+        self.assertIsNone(reopened.get("b" * 64))
+        self.assertEqual(reopened.get_stats()["size_bytes"], 4)
+
+    def test_concurrent_requests_generate_once(self):
+        cache = narration_cache.NarrationCache(self.directory, max_bytes=100)
+        calls = []
+
+        def generate():
+            calls.append(1)
+            time.sleep(0.05)
+            return b"audio"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_create("e" * 64, generate))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(cached for _, _, cached in results), [False, True, True, True])
+        self.assertEqual({audio for _, audio, _ in results}, {b"audio"})
+
+    def test_read_returns_audio_even_if_evicted_right_after(self):
+        cache = narration_cache.NarrationCache(self.directory, max_bytes=8)
+        path, audio, cached = cache.get_or_create("a" * 64, lambda: b"1234")
+        self.assertEqual((audio, cached), (b"1234", False))
+        # Otro trozo de la misma lección expulsa el primero antes de que nadie abra su archivo
+        cache.put("b" * 64, b"56789")
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(audio, b"1234")
+        self.assertIsNone(cache.read("a" * 64))
+        self.assertEqual(cache.read("b" * 64)[1], b"56789")
+        os.remove(os.path.join(self.directory, f"narration_{'b' * 64}.mp3"))
+        self.assertIsNone(cache.read("b" * 64))
+        self.assertEqual(cache.get_stats()["entries"], 0)
+
+
+class TestSentenceSplitting(unittest.TestCase):
+
+    def setUp(self):
+        self.split = sys.modules[type(module_manager.get_module("mod-educator")).__module__.rsplit(".", 1)[0] + ".chunked_tts"].split_sentences
+
+    def test_sentences_short_ones_merged_long_ones_cut(self):
+        self.assertEqual(self.split("Hola. ¿Qué tal? Hoy veremos la fotosíntesis de las plantas.\n\nSegundo párrafo sin punto", 400, 20),
+                         ["Hola. ¿Qué tal? Hoy veremos la fotosíntesis de las plantas.", "Segundo párrafo sin punto"])
+        chunks = self.split("palabra " * 100, 50, 10)
+        self.assertTrue(all(len(chunk) <= 50 for chunk in chunks))
+        self.assertEqual(" ".join(chunks), ("palabra " * 100).strip())
+        self.assertEqual(self.split("   ", 50), [])
+
+
+class TestEducatorNarration(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.module = module_manager.get_module("mod-educator")
+        self._cache = self.module.narration_cache
+        self._synthesizer = self.module.synthesizer
+        self.module.narration_cache = type(self._cache)(self._tmp.name, max_bytes=1 << 20)
+        self.module.synthesizer = type(self._synthesizer)(self.module.narration_cache, workers=3)
+
+    def tearDown(self):
+        self.module.synthesizer.shutdown()
+        self.module.narration_cache, self.module.synthesizer = self._cache, self._synthesizer
+        self._tmp.cleanup()
+
+    def test_identical_narrations_are_synthesized_once(self):
+        with mock.patch.object(self.module.bark_model, "generate_audio", return_value=b"audio") as generate:
+            first = self.module.generate_narration("Lección uno.", "es")
+            self.assertEqual(self.module.generate_narration("Lección uno.", "es"), first)
+            other = self.module.generate_narration("Lección uno.", "es", voice_preset="es_speaker_1")
+        self.assertNotEqual(other, first)
+        self.assertEqual(generate.call_count, 2)
+        self.assertEqual(self.module.get_status()["narration_cache"]["hits"], 1)
+
+    def test_chunks_stream_in_order_before_the_lesson_is_synthesized(self):
+        synthesized = []
+
+        def generate_audio(text, voice_preset):
+            time.sleep(0.02 if len(synthesized) % 2 else 0.04) # Trozos que terminan desordenados
+            synthesized.append(text)
+            return text.encode("utf-8") + b"|"
+
+        with mock.patch.object(self.module.bark_model, "generate_audio", side_effect=generate_audio):
+            chunks = self.module.iter_narration_chunks(LESSON, "es")
+            first = next(chunks)
+            self.assertLess(len(synthesized), 10) # Primer audio sin esperar a la lección completa
+            rest = list(chunks)
+            self.assertEqual([first.index] + [chunk.index for chunk in rest], list(range(10)))
+            self.assertEqual(b"".join(chunk.audio for chunk in [first] + rest).decode(), "|".join(
+                f"Esta es la frase número {i} de la lección, con algo de contenido." for i in range(10)) + "|")
+
+            path = self.module.generate_narration(LESSON, "es") # Completa, ya en caché
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"".join(chunk.audio for chunk in [first] + rest))
+            self.assertEqual(len(synthesized), 10)
+
+            edited = LESSON.replace("número 4", "número cuatro")
+            self.assertEqual(sum(not chunk.cached for chunk in self.module.iter_narration_chunks(edited, "es")), 1)
+        self.assertEqual(len(synthesized), 11)
+
+    def test_single_sentence_with_extra_whitespace_is_cached_as_a_whole(self):
+        with mock.patch.object(self.module.bark_model, "generate_audio", return_value=b"audio") as generate:
+            first = self.module.generate_narration("  Lección   tres.\n", "es")
+            chunks = list(self.module.iter_narration_chunks("  Lección   tres.\n", "es"))
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual([(chunk.audio, chunk.cached, chunk.path) for chunk in chunks], [(b"audio", True, first)])
+        stats = self.module.narration_cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2)) # La segunda vez acierta la clave del texto completo
+
+    def test_failed_synthesis_is_not_cached(self):
+        with mock.patch.object(self.module.bark_model, "generate_audio", side_effect=RuntimeError("modelo caído")):
+            self.assertIsNone(self.module.generate_narration("Lección dos.", "es"))
+        self.assertEqual(self.module.narration_cache.get_stats()["entries"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import sys
+import time
+
+import json
+from unittest import mock
+
+from core.database import init_db, get_db, ModuleSetting
+from core.settings_store import SettingsStore
+from core.module_manager import ModuleManager, module_manager, load_entry_point, MODULE_ENTRY_POINTS, MODULE_DEPENDENCIES
+from config.config import MODULES_ENABLED
+
+class _FakeModule:
+    init_delay = 0.0
+
+    def load_settings(self, settings):
+        pass
+
+    def initialize(self):
+        time.sleep(self.init_delay)
+
+    def get_status(self):
+        return {"is_active": False}
+
+class SlowModule(_FakeModule):
+    init_delay = 0.5
+
+class FastModule(_FakeModule):
+    init_delay = 0.05
+
+class TestModuleManager(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        init_db()
+
+    def setUp(self):
+        self._enabled = dict(MODULES_ENABLED)
+        ModuleManager._modules.clear()
+        module_manager.startup_timeline.clear()
+        module_manager.invalidate_settings_snapshot()
+        module_manager._initialized = False
+
+    def tearDown(self):
+        for name in ("mod-slow", "mod-fast", "mod-after-slow"):
+            MODULE_ENTRY_POINTS.pop(name, None)
+            MODULE_DEPENDENCIES.pop(name, None)
+            MODULES_ENABLED.pop(name, None)
+        MODULES_ENABLED.update(self._enabled)
+        ModuleManager._modules.clear()
+        module_manager._initialized = False
+
+    def test_entry_points_resolve_hyphenated_plugin_dirs(self):
+        module_class = load_entry_point(MODULE_ENTRY_POINTS["mod-mobile"])
+        self.assertEqual(module_class.__name__, "MobileModule")
+        self.assertIn("plugins.mod_mobile", sys.modules)
+
+    def test_modules_are_loaded_on_first_use(self):
+        module_manager.initialize_modules(warmup=[])
+        self.assertFalse(module_manager.is_loaded("mod-accessibility"))
+        statuses = module_manager.get_all_module_statuses()
+        self.assertEqual(statuses["mod-accessibility"], {"is_active": False, "loaded": False})
+
+        module = module_manager.get_module("mod-accessibility")
+        self.assertIsNotNone(module)
+        self.assertTrue(module_manager.is_loaded("mod-accessibility"))
+        self.assertIs(module_manager.get_module("mod-accessibility"), module)
+
+    def test_warmup_list_loads_only_listed_modules(self):
+        module_manager.initialize_modules(warmup=["mod-mobile"])
+        self.assertTrue(module_manager.is_loaded("mod-mobile"))
+        self.assertFalse(module_manager.is_loaded("mod-ally"))
+
+    def test_disabled_module_is_not_loaded(self):
+        MODULES_ENABLED["mod-mobile"] = False
+        module_manager.initialize_modules(warmup=[])
+        self.assertIsNone(module_manager.get_module("mod-mobile"))
+        self.assertFalse(module_manager.is_loaded("mod-mobile"))
+
+    def _register(self, name, class_name, depends_on=None):
+        MODULE_ENTRY_POINTS[name] = f"tests.test_module_manager:{class_name}"
+        MODULES_ENABLED[name] = True
+        if depends_on:
+            MODULE_DEPENDENCIES[name] = depends_on
+
+    def test_parallel_init_does_not_wait_for_slow_module(self):
+        self._register("mod-slow", "SlowModule")
+        self._register("mod-fast", "FastModule")
+        self._register("mod-after-slow", "FastModule", depends_on=["mod-slow"])
+        started = time.perf_counter()
+        module_manager._initialized = True
+        module_manager._load_modules_parallel(["mod-slow", "mod-fast", "mod-after-slow"], max_workers=4, timeout_s=0.2)
+        self.assertLess(time.perf_counter() - started, 0.45)
+
+        report = module_manager.get_startup_report()
+        self.assertEqual(report["mod-fast"]["status"], "ok")
+        self.assertEqual(report["mod-slow"]["status"], "timeout")
+        self.assertEqual(report["mod-after-slow"]["status"], "skipped")
+        self.assertTrue(module_manager.is_loaded("mod-fast"))
+
+        # El módulo lento termina en segundo plano y su dependiente se carga en el primer uso
+        self.assertIsNotNone(module_manager.get_module("mod-after-slow"))
+        self.assertEqual(module_manager.get_startup_report()["mod-slow"]["status"], "late")
+
+    def test_settings_snapshot_is_loaded_with_one_query(self):
+        for db in get_db():
+            db.query(ModuleSetting).delete()
+            db.add(ModuleSetting(module_name="mod-accessibility", settings_json=json.dumps({"current_theme": "dark"})))
+            db.add(ModuleSetting(module_name="mod-mobile", settings_json=json.dumps({"connected_device": "test_device"})))
+            db.commit()
+            break
+
+        snapshot = module_manager.load_settings_snapshot()
+        self.assertEqual(snapshot["mod-accessibility"], {"current_theme": "dark"})
+        with mock.patch("core.module_manager.get_db") as get_db_mock:
+            module_manager._initialized = True
+            module = module_manager.get_module("mod-accessibility")
+            get_db_mock.assert_not_called()
+        self.assertEqual(module.current_theme, "dark")
+
+        module_manager.save_module_settings("mod-mobile", {"connected_device": None})
+        self.assertEqual(module_manager._get_persisted_settings("mod-mobile"), {"connected_device": None})
+
+    def test_settings_store_coalesces_writes_until_flush(self):
+        store = SettingsStore(durability="async", flush_interval_s=60)
+        for db in get_db():
+            db.query(ModuleSetting).filter_by(module_name="mod-streaming").delete()
+            db.commit()
+            break
+        for overlay in ("alerts", "chat", "goals"):
+            store.put("mod-streaming", {"active_overlay": overlay})
+        self.assertEqual(store.get_pending("mod-streaming"), {"active_overlay": "goals"})
+        for db in get_db():
+            self.assertIsNone(db.query(ModuleSetting).filter_by(module_name="mod-streaming").first())
+            break
+
+        self.assertEqual(store.flush(), 1)
+        for db in get_db():
+            record = db.query(ModuleSetting).filter_by(module_name="mod-streaming").first()
+            self.assertEqual(json.loads(record.settings_json), {"active_overlay": "goals"})
+            break
+        self.assertEqual(store.get_stats()["writes_coalesced"], 2)
+        store.close()
+
+    def test_settings_store_sync_mode_persists_immediately(self):
+        store = SettingsStore(durability="sync")
+        store.put("mod-streaming", {"active_overlay": None})
+        self.assertEqual(store.pending_count, 0)
+        for db in get_db():
+            record = db.query(ModuleSetting).filter_by(module_name="mod-streaming").first()
+            self.assertEqual(json.loads(record.settings_json), {"active_overlay": None})
+            break
+        with self.assertRaises(ValueError):
+            SettingsStore(durability="eventual")
+
+if __name__ == '__main__':
+    unittest.main()
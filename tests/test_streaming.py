@@ -0,0 +1,226 @@
+import unittest
+import importlib.util
+import os
+import random
+import re
+import sys
+import time
+from unittest import mock
+
+from config.config import PLUGINS_DIR, STREAMING_MODERATION_ACTION
+from core.database import init_db
+from core.mocks import ChatServerMock
+from core.module_manager import module_manager
+
+_spec = importlib.util.spec_from_file_location("streaming_moderation", os.path.join(PLUGINS_DIR, "mod-streaming", "moderation.py"))
+moderation = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(moderation)
+
+_spec = importlib.util.spec_from_file_location("streaming_chat_pipeline", os.path.join(PLUGINS_DIR, "mod-streaming", "chat_pipeline.py"))
+chat_pipeline = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(chat_pipeline)
+
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def test_overlapping_keywords_are_all_found(self):
+        matcher = moderation.KeywordMatcher(["he", "she", "his", "hers"], word_boundaries=False)
+        found = {(m.keyword, m.start, m.end) for m in matcher.find("ushers")}
+        self.assertEqual(found, {("she", 1, 4), ("he", 2, 4), ("hers", 2, 6)})
+
+    def test_unicode_normalization_and_casefold(self):
+        matcher = moderation.KeywordMatcher(["badword", "straße", "café"])
+        self.assertEqual([m.keyword for m in matcher.find("Ｂａｄｗｏｒｄ!")], ["badword"])
+        self.assertEqual([m.keyword for m in matcher.find("STRASSE")], ["straße"])
+        # "e" + acento combinante: las posiciones se refieren al mensaje original
+        message = "un cafe\u0301 por favor"
+        match = matcher.find(message)[0]
+        self.assertEqual(message[match.start:match.end], "cafe\u0301")
+
+    def test_word_boundaries(self):
+        matcher = moderation.KeywordMatcher(["ass"])
+        self.assertEqual(matcher.find("first class"), [])
+        self.assertEqual(len(matcher.find("you ass!")), 1)
+        matcher.add("scam", word_boundaries=False)
+        self.assertEqual([m.keyword for m in matcher.find("scammers")], ["scam"])
+
+    def test_incremental_add_recompiles_lazily(self):
+        matcher = moderation.KeywordMatcher(["alpha"])
+        self.assertEqual(len(matcher.find("alpha beta")), 1)
+        self.assertEqual(matcher.compilations, 1)
+        self.assertTrue(matcher.add("beta"))
+        self.assertTrue(matcher.add("gamma"))
+        self.assertFalse(matcher.add("BETA")) # Duplicado tras normalizar
+        self.assertEqual(matcher.compilations, 1)
+        self.assertEqual([m.keyword for m in matcher.find("alpha beta gamma")], ["alpha", "beta", "gamma"])
+        self.assertEqual(matcher.compilations, 2)
+
+    def test_matches_equal_regex_scan(self):
+        rng = random.Random(7)
+        alphabet = "abcde"
+        keywords = sorted({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(60)})
+        matcher = moderation.KeywordMatcher(keywords, word_boundaries=False)
+        for _ in range(50):
+            text = "".join(rng.choice(alphabet + " ") for _ in range(40))
+            expected = sorted((k, m.start(), m.start() + len(k)) for k in keywords for m in re.finditer(f"(?={re.escape(k)})", text))
+            self.assertEqual(sorted(tuple(m) for m in matcher.find(text)), expected)
+
+    def test_mask_matches(self):
+        matcher = moderation.KeywordMatcher(["bad word", "word"])
+        message = "a bad word here"
+        self.assertEqual(moderation.mask_matches(message, matcher.find(message)), "a *** **** here")
+
+class TestStreamingModeration(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        init_db() # El módulo lee su configuración de la DB al cargarse
+
+    def setUp(self):
+        self.module = module_manager.get_module("mod-streaming")
+        self.module.load_settings({"moderation_keywords": ["badword1", "badword2"]})
+        # No tocar el archivo de palabras clave de data/
+        self.file_patch = mock.patch.object(sys.modules[type(self.module).__module__], "save_json_file")
+        self.file_patch.start()
+
+    def tearDown(self):
+        self.module.stop_chat()
+        self.module.load_settings({"moderation_keywords": ["badword1", "badword2"]})
+        self.module.save_settings()
+        self.file_patch.stop()
+
+    def test_moderate_batch_uses_added_keywords(self):
+        self.module.add_moderation_keyword("Spoiler")
+        results = self.module.moderate_batch(["hola a todos", "SPOILER: muere al final", "badword1 y badword2"])
+        self.assertEqual([r["flagged"] for r in results], [False, True, True])
+        self.assertEqual(results[1]["censored"], "*******: muere al final")
+        self.assertEqual([m["keyword"] for m in results[2]["matches"]], ["badword1", "badword2"])
+        self.assertIn("Spoiler", self.module.moderation_keywords)
+        self.module.load_settings({"moderation_keywords": ["badword1", "badword2"]})
+        self.assertFalse(self.module.moderate("spoiler")["flagged"])
+
+    def test_chat_pipeline_moderates_live_messages(self):
+        server = ChatServerMock().start()
+        try:
+            started = time.perf_counter()
+            self.module.start_chat(chat_pipeline.NDJSONChatSource(server.url))
+            self.assertLess(time.perf_counter() - started, 1.0) # No bloquea al llamante
+            self._wait(lambda: server.client_count == 1)
+            server.send("hola\x00   a todos", message_id="1")
+            server.send("eres un BADWORD1", user="troll", message_id="2")
+            server.send("   ", message_id="3")
+            self._wait(lambda: server.actions)
+            self.assertEqual(server.actions, [{"action": STREAMING_MODERATION_ACTION, "id": "2", "user": "troll", "keywords": ["badword1"]}])
+            stats = self.module.get_chat_stats()["stages"]
+            self.assertEqual(stats["ingest"]["processed"], 3)
+            self.assertEqual(stats["normalize"]["dropped"], 1)
+            self.assertEqual(stats["moderate"]["processed"], 2)
+            self.assertEqual(self.module.recent_flags[-1]["censored"], "eres un ********")
+        finally:
+            self.module.stop_chat()
+            server.stop()
+        self.assertFalse(self.module.get_status()["chat_running"])
+
+    def _wait(self, condition, timeout=5.0):
+        deadline = time.time() + timeout
+        while not condition():
+            self.assertLess(time.time(), deadline, "timed out")
+            time.sleep(0.01)
+
+
+class TestChatPipelineBackpressure(unittest.TestCase):
+
+    def test_slow_moderation_bounds_queues(self):
+        server = ChatServerMock(rate=5000, total=2000).start()
+        def slow_moderate(texts):
+            time.sleep(0.005)
+            return [{"flagged": False} for _ in texts]
+        pipeline = chat_pipeline.ChatPipeline(chat_pipeline.NDJSONChatSource(server.url), slow_moderate,
+                                              queue_size=16, batch_size=8)
+        pipeline.start()
+        try:
+            max_depth = 0
+            deadline = time.time() + 10
+            while pipeline.stats["moderate"].processed < 2000 and time.time() < deadline:
+                max_depth = max([max_depth] + list(pipeline.get_stats()["queue_depths"].values()))
+                time.sleep(0.005)
+            self.assertEqual(pipeline.stats["moderate"].processed, 2000)
+            self.assertLessEqual(max_depth, 16)
+            self.assertGreater(pipeline.stats["moderate"].batches, 1)
+        finally:
+            pipeline.stop()
+            server.stop()
+
+class TestChatIngestRecovery(unittest.TestCase):
+
+    def _wait_for(self, condition, timeout=5.0):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_oversized_line_is_discarded_and_ingest_continues(self):
+        server = ChatServerMock().start()
+        pipeline = chat_pipeline.ChatPipeline(chat_pipeline.NDJSONChatSource(server.url), lambda texts: [{"flagged": False} for _ in texts])
+        pipeline.start()
+        try:
+            self.assertTrue(self._wait_for(lambda: server.client_count == 1))
+            server.send("x" * (100 * 1024)) # Más que el límite de 64 KiB del StreamReader
+            for n in range(7):
+                server.send(f"mensaje {n}")
+            self.assertTrue(self._wait_for(lambda: pipeline.stats["moderate"].processed == 7))
+            self.assertTrue(pipeline.connected)
+        finally:
+            pipeline.stop()
+            server.stop()
+
+    def test_unexpected_source_error_reconnects(self):
+        class FlakySource(chat_pipeline.ChatSource):
+            connects = 0
+
+            async def connect(self):
+                self.connects += 1
+
+            async def messages(self):
+                if self.connects == 1:
+                    raise RuntimeError("respuesta inesperada")
+                yield chat_pipeline.ChatMessage("1", "viewer", "hola", time.perf_counter())
+
+        source = FlakySource()
+        pipeline = chat_pipeline.ChatPipeline(source, lambda texts: [{"flagged": False} for _ in texts], reconnect_max_s=0.1)
+        pipeline.start()
+        try:
+            self.assertTrue(self._wait_for(lambda: pipeline.stats["moderate"].processed == 1))
+            self.assertGreaterEqual(source.connects, 2)
+        finally:
+            pipeline.stop()
+
+    def test_source_is_closed_before_every_reconnect(self):
+        class EndingSource(chat_pipeline.ChatSource):
+            connects = leaked = 0
+            open = False
+
+            async def connect(self):
+                self.connects += 1
+                self.leaked += self.open
+                self.open = True
+
+            async def messages(self):
+                yield chat_pipeline.ChatMessage(str(self.connects), "viewer", "hola", time.perf_counter())
+
+            async def close(self):
+                self.open = False
+
+        source = EndingSource()
+        pipeline = chat_pipeline.ChatPipeline(source, lambda texts: [{"flagged": False} for _ in texts], reconnect_max_s=0.01)
+        pipeline.start()
+        try:
+            self.assertTrue(self._wait_for(lambda: source.connects >= 3)) # Cierres limpios (EOF) seguidos de reconexión
+        finally:
+            pipeline.stop()
+        self.assertEqual(source.leaked, 0)
+        with self.assertRaises(TypeError):
+            chat_pipeline.ChatSource()
+
+if __name__ == '__main__':
+    unittest.main()
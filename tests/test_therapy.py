@@ -0,0 +1,237 @@
+import unittest
+import importlib.util
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from cryptography.fernet import Fernet, InvalidToken
+from sqlalchemy.orm import Session
+
+from config.config import PLUGINS_DIR
+from core.database import init_db, get_db, engine, JournalEntry, JournalSentimentAggregate
+from core.module_manager import module_manager
+
+_spec = importlib.util.spec_from_file_location("therapy_journal_crypto", os.path.join(PLUGINS_DIR, "mod-therapy", "journal_crypto.py"))
+journal_crypto = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(journal_crypto)
+_spec = importlib.util.spec_from_file_location("therapy_sentiment", os.path.join(PLUGINS_DIR, "mod-therapy", "sentiment.py"))
+sentiment = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sentiment)
+
+USER_ID = 9001
+OTHER_USER_ID = 9002
+
+
+class TestTherapyJournal(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        init_db()
+
+    def setUp(self):
+        self.module = module_manager.get_module("mod-therapy")
+        self.module.plaintext_cache.clear()
+        self._clear()
+
+    def tearDown(self):
+        self._clear()
+
+    def _clear(self):
+        db: Session
+        for db in get_db():
+            db.query(JournalEntry).filter(JournalEntry.user_id.in_([USER_ID, OTHER_USER_ID])).delete(synchronize_session=False)
+            db.query(JournalSentimentAggregate).filter(JournalSentimentAggregate.user_id.in_([USER_ID, OTHER_USER_ID])).delete(synchronize_session=False)
+            db.commit()
+
+    def _add_entries(self, user_id, count, start=datetime(2024, 1, 1)):
+        # Varias entradas comparten created_at para comprobar el desempate por id
+        records = [{"content": f"entrada {i}", "created_at": (start + timedelta(minutes=i // 3)).isoformat()} for i in range(count)]
+        self.assertEqual(self.module.import_journal_entries(user_id, records, batch_size=7)["imported"], count)
+
+    def test_keyset_pages_cover_all_entries_newest_first(self):
+        self._add_entries(USER_ID, 25)
+        self._add_entries(OTHER_USER_ID, 5)
+        seen, cursor = [], None
+        with mock.patch.object(self.module.fernet, "decrypt", wraps=self.module.fernet.decrypt) as decrypt:
+            while True:
+                page = self.module.get_journal_page(USER_ID, limit=10, cursor=cursor)
+                seen.extend(entry["content"] for entry in page["entries"])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+        self.assertEqual(seen, [f"entrada {i}" for i in reversed(range(25))])
+        self.assertEqual(decrypt.call_count, 25) # Solo las entradas de cada página
+
+    def test_rerendering_a_page_hits_the_plaintext_cache(self):
+        self._add_entries(USER_ID, 10)
+        first = self.module.get_journal_page(USER_ID, limit=5)
+        with mock.patch.object(self.module.fernet, "decrypt", wraps=self.module.fernet.decrypt) as decrypt:
+            self.assertEqual(self.module.get_journal_page(USER_ID, limit=5), first)
+            self.assertEqual(decrypt.call_count, 0)
+            self.module.add_journal_entry(USER_ID, "nueva entrada")
+            self.module.get_journal_page(USER_ID, limit=5)
+            self.assertEqual(decrypt.call_count, 5) # La escritura invalidó la caché del usuario
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            self.module.get_journal_page(USER_ID, cursor="not-a-cursor")
+
+    def test_encrypted_export_import_round_trip(self):
+        self._add_entries(USER_ID, 12)
+        exported = list(self.module.export_journal_entries(USER_ID, decrypt=False, batch_size=5))
+        self.assertEqual(len(exported), 12)
+        self.assertNotIn("content", exported[0])
+        tampered = dict(exported[0], encrypted_content=exported[0]["encrypted_content"][:-4] + "AAAA")
+        result = self.module.import_journal_entries(OTHER_USER_ID, exported + [tampered, {"sentiment": "neutral"}])
+        self.assertEqual(result, {"imported": 12, "skipped": 2})
+        self.assertEqual([e["content"] for e in self.module.get_journal_entries(OTHER_USER_ID)],
+                         [f"entrada {i}" for i in range(12)])
+
+    def test_import_rejects_unknown_sentiment_labels(self):
+        self._add_entries(USER_ID, 2)
+        exported = list(self.module.export_journal_entries(USER_ID, decrypt=False))
+        records = [dict(exported[0], sentiment="positive"), dict(exported[1], sentiment="<script>")]
+        self.assertEqual(self.module.import_journal_entries(OTHER_USER_ID, records)["imported"], 2)
+        self.assertEqual([e["sentiment"] for e in self.module.get_journal_entries(OTHER_USER_ID)], ["positive", None])
+        self.assertEqual(self.module.get_mood_trend(OTHER_USER_ID)["totals"], {"positive": 1, "unknown": 1})
+
+    def test_mood_trend_from_aggregates(self):
+        # 2024-01-01 es lunes
+        records = [{"content": text, "created_at": f"2024-01-{day:02d}T10:00:00"} for day, text in
+                   [(1, "estoy feliz"), (1, "muy triste"), (1, "feliz otra vez"), (3, "un día normal"), (8, "con miedo")]]
+        self.module.import_journal_entries(USER_ID, records)
+        self.module.add_journal_entry(OTHER_USER_ID, "feliz")
+        with mock.patch.object(self.module.fernet, "decrypt") as decrypt:
+            days = self.module.get_mood_trend(USER_ID, period="day", start=date(2024, 1, 1), end=date(2024, 1, 3))
+            weeks = self.module.get_mood_trend(USER_ID, period="week")
+            decrypt.assert_not_called()
+        self.assertEqual(days["buckets"], [
+            {"start": "2024-01-01", "counts": {"positive": 2, "negative": 1}, "total": 3},
+            {"start": "2024-01-03", "counts": {"neutral": 1}, "total": 1},
+        ])
+        self.assertEqual([(b["start"], b["total"]) for b in weeks["buckets"]], [("2024-01-01", 4), ("2024-01-08", 1)])
+        self.assertEqual(weeks["totals"], {"positive": 2, "negative": 2, "neutral": 1})
+        self.assertEqual(self.module.count_journal_entries(USER_ID), 5)
+        with self.assertRaises(ValueError):
+            self.module.get_mood_trend(USER_ID, period="month")
+
+    def test_rebuild_matches_incremental_aggregates(self):
+        self._add_entries(USER_ID, 30)
+        self.module.add_journal_entry(USER_ID, "hoy estoy feliz")
+        incremental = self.module.get_mood_trend(USER_ID, period="week")
+        self.assertEqual(self.module.rebuild_sentiment_aggregates(USER_ID), 31)
+        self.assertEqual(self.module.get_mood_trend(USER_ID, period="week"), incremental)
+        self.assertEqual(self.module.count_journal_entries(USER_ID), 31)
+
+    def test_rescore_updates_changed_entries_and_aggregates(self):
+        self.module.import_journal_entries(USER_ID, [{"content": text, "created_at": "2024-01-01T10:00:00"}
+                                                     for text in ("estoy cansado", "estoy feliz", "día tranquilo")])
+        scorer = self.module.sentiment_scorer
+        try:
+            self.module.sentiment_scorer = sentiment.LexiconScorer({"cansado": -1, "feliz": 1})
+            self.assertEqual(self.module.rescore_journal(USER_ID, batch_size=2), {"scored": 3, "changed": 1})
+        finally:
+            self.module.sentiment_scorer = scorer
+        self.assertEqual([e["sentiment"] for e in self.module.get_journal_entries(USER_ID)], ["negative", "positive", "neutral"])
+        self.assertEqual(self.module.get_mood_trend(USER_ID)["totals"], {"negative": 1, "positive": 1, "neutral": 1})
+
+    def test_page_query_uses_user_created_index(self):
+        db: Session
+        for db in get_db():
+            query = self.module._journal_query(db, USER_ID, (datetime(2024, 1, 1), 5), newest_first=True).limit(10)
+            sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = " ".join(str(row[-1]) for row in db.execute(f"EXPLAIN QUERY PLAN {sql}"))
+        self.assertIn("ix_journal_entries_user_created", plan)
+
+
+class TestJournalCrypto(unittest.TestCase):
+
+    def test_parallel_decryption_keeps_order_and_reports_bad_tokens(self):
+        fernet = Fernet(Fernet.generate_key())
+        tokens = [fernet.encrypt(f"texto {i}".encode()) for i in range(50)]
+        tokens[17] = b"corrupto"
+        decryptor = journal_crypto.JournalDecryptor(fernet, workers=4, chunk_size=8, min_parallel=10)
+        try:
+            results = decryptor.decrypt_many(tokens)
+        finally:
+            decryptor.shutdown()
+        self.assertIsInstance(results[17], InvalidToken)
+        self.assertEqual([r for i, r in enumerate(results) if i != 17], [f"texto {i}".encode() for i in range(50) if i != 17])
+
+    def test_cache_zeroizes_on_eviction_expiry_and_invalidation(self):
+        now = [0.0]
+        cache = journal_crypto.DecryptedEntryCache(max_bytes=10, ttl_s=5, clock=lambda: now[0])
+        cache.put(1, 1, b"hola")
+        buffer = cache._entries[(1, 1)][0]
+        cache.put(1, 2, b"adios")
+        cache.put(2, 1, b"xyz") # 12 bytes > 10: expulsa la más antigua
+        self.assertIsNone(cache.get(1, 1))
+        self.assertEqual(buffer, bytearray(4))
+        self.assertEqual(cache.get(1, 2), "adios")
+
+        buffer = cache._entries[(1, 2)][0]
+        cache.invalidate_user(1)
+        self.assertEqual(buffer, bytearray(5))
+        self.assertEqual(cache.get(2, 1), "xyz")
+
+        now[0] = 6.0
+        self.assertIsNone(cache.get(2, 1))
+        self.assertEqual(cache.get_stats()["size_bytes"], 0)
+
+
+class KeywordPipeline:
+    """Sustituto serializable de un pipeline de scikit-learn (predict con etiquetas numéricas)."""
+
+    def predict(self, texts):
+        return [1 if "bien" in text else 0 for text in texts]
+
+
+class TestSentimentScorer(unittest.TestCase):
+
+    def test_lexicon_batch_matches_single_scoring(self):
+        scorer = sentiment.LexiconScorer()
+        texts = ["Estoy FELIZ", "muy triste y con miedo", "feliz pero triste", "", "sin más", "infeliz"]
+        self.assertEqual(scorer.score_batch(texts), ["positive", "negative", "neutral", "neutral", "neutral", "neutral"])
+        self.assertEqual([scorer.score(text) for text in texts], scorer.score_batch(texts))
+        self.assertEqual(scorer.score_batch([]), [])
+        weighted = sentiment.LexiconScorer({"feliz": 1, "triste": -2}, threshold=0.5)
+        self.assertEqual(weighted.score_batch(["feliz pero triste", "feliz feliz triste"]), ["negative", "neutral"])
+
+    def test_lexicon_ignores_unknown_tokens(self):
+        scorer = sentiment.LexiconScorer()
+        # Tokens fuera del léxico no suman nada, aunque antes colisionaran en el vector hasheado
+        self.assertEqual(scorer.score_batch(["hoy fue un dia sgxi", "sgxi feliz"]), ["neutral", "positive"])
+        self.assertEqual(sentiment.LexiconScorer({}).score_batch(["feliz"]), ["neutral"])
+        with self.assertRaises(TypeError):
+            sentiment.SentimentScorer()
+
+    @unittest.skipUnless(importlib.util.find_spec("joblib"), "joblib no instalado")
+    def test_sklearn_pipeline_loads_once_and_falls_back(self):
+        import joblib
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.pkl")
+            joblib.dump(KeywordPipeline(), path)
+            scorer = sentiment.create_sentiment_scorer("auto", path)
+            self.assertIsInstance(scorer, sentiment.SklearnPipelineScorer)
+            self.assertFalse(scorer.loaded)
+            self.assertEqual(scorer.score_batch(["todo bien", "todo mal"]), ["positive", "negative"])
+            pipeline = scorer._pipeline
+            scorer.score("bien")
+            self.assertIs(scorer._pipeline, pipeline)
+
+            missing = sentiment.create_sentiment_scorer("sklearn", os.path.join(tmp, "missing.pkl"))
+            self.assertEqual(missing.score_batch(["feliz"]), ["positive"])
+            self.assertTrue(missing.get_stats()["load_failed"])
+        self.assertIsInstance(sentiment.create_sentiment_scorer("auto", "/nonexistent/model.pkl"), sentiment.LexiconScorer)
+
+    def test_sklearn_pipeline_without_joblib_uses_the_lexicon(self):
+        with tempfile.NamedTemporaryFile(suffix=".pkl") as f, mock.patch.dict(sys.modules, {"joblib": None}):
+            scorer = sentiment.create_sentiment_scorer("sklearn", f.name)
+            self.assertEqual(scorer.score_batch(["feliz", "triste"]), ["positive", "negative"])
+            self.assertTrue(scorer.get_stats()["load_failed"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import importlib.util
+import os
+
+import numpy as np
+
+from config.config import PLUGINS_DIR
+
+_spec = importlib.util.spec_from_file_location("voice_dsp", os.path.join(PLUGINS_DIR, "mod-voice", "dsp.py"))
+dsp = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(dsp)
+
+
+def _dominant_frequency(signal, sample_rate):
+    spectrum = np.abs(np.fft.rfft(signal * np.hanning(len(signal))))
+    return np.argmax(spectrum) * sample_rate / len(signal)
+
+
+class TestVoiceEffectEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 48000
+        self.block_size = 256
+
+    def _run(self, engine, frequency, seconds=0.5):
+        n_blocks = int(seconds * self.sample_rate / self.block_size)
+        t = np.arange(n_blocks * self.block_size) / self.sample_rate
+        signal = (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+        blocks = [engine.process_block(b) for b in signal.reshape(n_blocks, self.block_size)]
+        return np.concatenate(blocks)
+
+    def test_bypass_preset_is_identity(self):
+        engine = dsp.VoiceEffectEngine.from_settings({}, sample_rate=self.sample_rate, block_size=self.block_size)
+        self.assertTrue(engine.bypass)
+        self.assertEqual(engine.added_latency_ms, 0.0)
+        block = np.linspace(-0.5, 0.5, self.block_size, dtype=np.float32)
+        np.testing.assert_allclose(engine.process_block(block), block, atol=1e-6)
+
+    def test_unity_settings_reconstruct_signal_with_one_block_delay(self):
+        engine = dsp.VoiceEffectEngine(self.sample_rate, self.block_size, pitch=1.0, formant=1.01)
+        out = self._run(engine, 440.0)
+        t = np.arange(len(out)) / self.sample_rate
+        signal = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+        # Tras el arranque, la salida es la entrada retrasada un bloque (hop del overlap-add)
+        np.testing.assert_allclose(out[4096:], signal[4096 - self.block_size:-self.block_size], atol=0.01)
+
+    def test_pitch_shift_moves_fundamental(self):
+        engine = dsp.VoiceEffectEngine(self.sample_rate, self.block_size, pitch=1.5, formant=1.5)
+        out = self._run(engine, 400.0)
+        self.assertAlmostEqual(_dominant_frequency(out[-8192:], self.sample_rate), 600.0, delta=20.0)
+
+    def test_latency_within_budget(self):
+        engine = dsp.VoiceEffectEngine(self.sample_rate, self.block_size, pitch=0.8, formant=1.2)
+        self.assertLess(engine.added_latency_ms, 20.0)
+
+    def test_process_bytes_keeps_block_size(self):
+        engine = dsp.VoiceEffectEngine(self.sample_rate, self.block_size, pitch=0.7, formant=0.9)
+        data = np.zeros(self.block_size, dtype=np.int16).tobytes()
+        self.assertEqual(len(engine.process_bytes(data)), len(data))
+        self.assertEqual(engine.get_stats()["blocks_processed"], 1)
+
+    def test_rejects_wrong_block_size(self):
+        engine = dsp.VoiceEffectEngine(self.sample_rate, self.block_size, pitch=1.2)
+        with self.assertRaises(ValueError):
+            engine.process_block(np.zeros(self.block_size + 1))
+
+
+class TestPresetChainCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = dsp.PresetChainCache(maxsize=2, sample_rate=48000, block_size=256)
+
+    def test_compiles_once_per_preset_version(self):
+        robot = {"pitch": 0.8, "formant": 1.2}
+        first = self.cache.get("robot", robot)
+        self.assertIs(self.cache.get("robot", dict(reversed(list(robot.items())))), first)
+        self.assertEqual(self.cache.get_stats()["misses"], 1)
+        self.assertIsNot(self.cache.get("robot", {"pitch": 0.9}), first)
+
+    def test_lru_eviction_and_invalidation(self):
+        self.cache.get("robot", {"pitch": 0.8})
+        self.cache.get("deep", {"pitch": 0.7})
+        self.cache.get("robot", {"pitch": 0.8})
+        self.cache.get("chipmunk", {"pitch": 1.5})
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.invalidate(["robot"]), 1)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_chain_is_immutable(self):
+        chain = self.cache.get("deep", {"pitch": 0.7, "formant": 0.9})
+        with self.assertRaises(AttributeError):
+            chain.pitch = 2.0
+        with self.assertRaises(ValueError):
+            chain.window[0] = 1.0
+
+    def test_engine_switches_chain_mid_stream(self):
+        engine = dsp.VoiceEffectEngine(chain=self.cache.get("standard", {}))
+        block = 0.5 * np.sin(np.arange(256) * 0.3)
+        engine.process_block(block)
+        engine.process_block(block)
+        engine.set_chain(self.cache.get("chipmunk", {"pitch": 1.5}))
+        self.assertEqual(engine.pitch, 1.5)
+        # La fase de referencia sale del audio recibido en bypass, no de la de antes del bypass
+        np.testing.assert_allclose(engine._last_phase, np.angle(np.fft.rfft(np.tile(block, 2) * engine.chain.window)))
+        self.assertEqual(engine.process_block(np.zeros(256)).shape, (256,))
+        with self.assertRaises(ValueError):
+            engine.set_chain(dsp.EffectChain(block_size=128))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import importlib.util
+import os
+
+import numpy as np
+
+from config.config import PLUGINS_DIR
+
+_spec = importlib.util.spec_from_file_location("vtuber_lipsync", os.path.join(PLUGINS_DIR, "mod-vtuber", "lipsync.py"))
+lipsync = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(lipsync)
+
+
+class TestLipsyncAnalyzer(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = lipsync.LipsyncAnalyzer(sample_rate=48000, frame_size=1024)
+
+    def test_streaming_feed_keeps_remainder(self):
+        self.assertEqual(self.analyzer.feed(np.zeros(700)).get("rms").shape[0], 0)
+        features = self.analyzer.feed(np.zeros(700))
+        self.assertEqual(features["rms"].shape[0], 1)
+        self.assertEqual(self.analyzer.frames_analyzed, 1)
+
+    def test_silence_and_voiced_frames(self):
+        t = np.arange(48000) / 48000
+        voiced = 0.4 * np.sin(2 * np.pi * 220 * t)
+        features = self.analyzer.feed(np.concatenate([np.zeros(4096), voiced]))
+        self.assertEqual(features["viseme"][0], 0)
+        self.assertEqual(features["mouth_open"][0], 0.0)
+        self.assertGreater(features["mouth_open"][-1], 0.5)
+        self.assertNotEqual(features["viseme"][-1], 0)
+        self.assertAlmostEqual(float(features["centroid"][-1]), 220.0, delta=60.0)
+
+
+class TestLipsyncDriver(unittest.TestCase):
+
+    def test_updates_are_coalesced_at_target_rate(self):
+        updates = []
+        analyzer = lipsync.LipsyncAnalyzer(sample_rate=48000, frame_size=1024, hop_size=128)
+        driver = lipsync.LipsyncDriver(updates.append, target_fps=60)
+        signal = 0.3 * np.sin(2 * np.pi * 300 * np.arange(48000) / 48000)
+        for i in range(0, 48000, 256):
+            driver.push(analyzer.feed(signal[i:i + 256]))
+            driver.tick(now=(i + 256) / 48000)
+        self.assertLessEqual(len(updates), 61)
+        self.assertGreaterEqual(len(updates), 55)
+        self.assertGreater(driver.frames_coalesced, len(updates))
+        self.assertIn(updates[-1]["viseme"], lipsync.VISEMES)
+
+if __name__ == '__main__':
+    unittest.main()